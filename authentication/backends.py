@@ -0,0 +1,32 @@
+from django.conf import settings
+from graphql_jwt.backends import JSONWebTokenBackend as BaseJSONWebTokenBackend
+from graphql_jwt.utils import get_credentials, get_payload, get_user_by_payload
+from common.roles import set_roles_from_claims
+from .models import TokenUser
+
+class JSONWebTokenBackend(BaseJSONWebTokenBackend):
+    """
+    Authenticates requests carrying a JWT and takes the user's roles from the token's verified
+    groups claim, so role checks do not need to query the groups table. With
+    GRAPHQL_JWT_STATELESS_USER enabled the user itself is built from the token's claims and
+    the users table is only read if a resolver needs more than the id and username. Tokens
+    issued before the user was disabled or deleted fall back to the users table lookup, which
+    rejects them.
+    """
+    def authenticate(self, request=None, **kwargs):
+        if request is None or getattr(request, "_jwt_token_auth", False):
+            return None
+
+        token = get_credentials(request, **kwargs)
+        if token is None:
+            return None
+
+        payload = get_payload(token, request)
+        user = None
+        if getattr(settings, 'GRAPHQL_JWT_STATELESS_USER', False):
+            user = TokenUser.from_claims(payload)
+        if user is None:
+            user = get_user_by_payload(payload)
+        if user is not None:
+            set_roles_from_claims(user, payload)
+        return user
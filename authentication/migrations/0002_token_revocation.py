@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('roles_changed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
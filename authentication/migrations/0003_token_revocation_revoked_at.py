@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_token_revocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tokenrevocation',
+            name='revoked_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
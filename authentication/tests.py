@@ -1,6 +1,11 @@
 from graphene_django.utils.testing import GraphQLTestCase
 from common.utils import execute_mutation
 from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from .models import TokenRevocation, TokenUser
 
 class AuthenticationMutationTests(GraphQLTestCase):
     def setUp(self):
@@ -131,4 +136,76 @@ class AuthenticationMutationTests(GraphQLTestCase):
         response = self.query(mutation, variables={'token': 'badtoken.badtoken'}, operation_name='verifyToken')
 
         self.assertResponseHasErrors(response)
-        self.assertIn("Error decoding signature", str(response.content))
\ No newline at end of file
+        self.assertIn("Error decoding signature", str(response.content))
+
+@override_settings(GRAPHQL_JWT_STATELESS_USER=True)
+class StatelessUserTests(GraphQLTestCase):
+    def setUp(self):
+        self.user_group, _ = Group.objects.get_or_create(name='user')
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='password')
+        self.user.groups.add(self.user_group)
+        TokenRevocation.objects.all().delete()
+        cache.clear()
+
+    def token(self):
+        mutation = """
+        mutation tokenAuth($username: String!, $password: String!) {
+            tokenAuth(username: $username, password: $password) {
+                token
+            }
+        }
+        """
+
+        response = self.query(mutation, variables={'username': 'testuser', 'password': 'password'}, operation_name='tokenAuth')
+        return response.json()['data']['tokenAuth']['token']
+
+    def test_authenticated_request_skips_user_lookup(self):
+        query = """
+        query {
+            allOrders {
+                totalCount
+            }
+        }
+        """
+        token = self.token()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query, headers={'Authorization': f'JWT {token}'})
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['allOrders']['totalCount'], 0)
+        self.assertFalse(any('auth_user' in query['sql'] for query in context.captured_queries))
+
+    def test_disabled_or_deleted_user_token_rejected(self):
+        query = """
+        query {
+            allOrders {
+                totalCount
+            }
+        }
+        """
+        token = self.token()
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.query(query, headers={'Authorization': f'JWT {token}'})
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("User is disabled", str(response.content))
+
+        self.user.delete()
+
+        response = self.query(query, headers={'Authorization': f'JWT {token}'})
+
+        self.assertResponseHasErrors(response)
+        self.assertIsNone(response.json()['data']['allOrders'])
+
+    def test_token_user_loads_row_lazily(self):
+        user = TokenUser.from_claims({'user_id': self.user.pk, 'username': 'testuser'})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'test@test.com')
+            self.assertEqual(user.date_joined, self.user.date_joined)
+
+        self.assertEqual(user, self.user)
+        self.assertIsNone(TokenUser.from_claims({'username': 'testuser'}))
@@ -0,0 +1,22 @@
+import os
+import time
+import django
+
+def setup():
+    """
+    Configures Django so a benchmark can be run as a script with `python -m benchmarks.<name>`.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce_api.settings')
+    django.setup()
+
+def timed(function, iterations):
+    """
+    Calls a function repeatedly.
+
+    Returns:
+        The mean duration of a call in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1_000_000
@@ -0,0 +1,93 @@
+"""
+Compares verifying the JWT of a request with a graphene middleware that wraps every resolved
+field against verifying it once per request in the GraphQL view, on a 500 order response.
+
+    python -m benchmarks.authentication
+"""
+from benchmarks import setup, timed
+
+setup()
+
+import graphene
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import RequestFactory, override_settings
+from graphql import execute, get_operation_ast, parse
+from graphql_jwt.middleware import JSONWebTokenMiddleware
+from graphql_jwt.utils import jwt_encode, jwt_payload
+from gql.views import GraphQLView
+
+class Item(graphene.ObjectType):
+    id = graphene.Int()
+    quantity = graphene.Int()
+    cost = graphene.Float()
+
+class Order(graphene.ObjectType):
+    id = graphene.Int()
+    total_cost = graphene.Float()
+    items = graphene.List(Item)
+
+class Query(graphene.ObjectType):
+    all_orders = graphene.List(Order)
+
+    def resolve_all_orders(self, info):
+        return ORDERS
+
+ORDERS = [
+    {
+        'id': order_id,
+        'total_cost': 50.0,
+        'items': [{'id': item_id, 'quantity': 2, 'cost': 5.0} for item_id in range(5)],
+    }
+    for order_id in range(500)
+]
+
+QUERY = '''
+query {
+    allOrders {
+        id
+        totalCost
+        items {
+            id
+            quantity
+            cost
+        }
+    }
+}
+'''
+
+ITERATIONS = 50
+
+def token():
+    user = User(id=1, username='benchmark')
+    payload = jwt_payload(user)
+    payload.update({'user_id': user.pk, 'groups': [], 'iat': payload['origIat']})
+    return jwt_encode(payload)
+
+def main():
+    graphql_schema = graphene.Schema(query=Query).graphql_schema
+    document = parse(QUERY)
+    operation_ast = get_operation_ast(document)
+    request = RequestFactory().post('/graphql', HTTP_AUTHORIZATION=f'JWT {token()}')
+    view = GraphQLView()
+
+    def per_field():
+        request.user = AnonymousUser()
+        result = execute(graphql_schema, document, context_value=request, middleware=[JSONWebTokenMiddleware()])
+        assert not result.errors and request.user.is_authenticated
+
+    def per_request():
+        request.user = AnonymousUser()
+        view.authenticate_request(request, graphql_schema, operation_ast)
+        result = execute(graphql_schema, document, context_value=request)
+        assert not result.errors and request.user.is_authenticated
+
+    with override_settings(GRAPHQL_JWT_STATELESS_USER=True):
+        field_cost = timed(per_field, ITERATIONS)
+        request_cost = timed(per_request, ITERATIONS)
+
+    print(f"token check per field:   {field_cost:10.1f} us")
+    print(f"token check per request: {request_cost:10.1f} us")
+    print(f"speedup:                 {field_cost / request_cost:10.1f}x")
+
+if __name__ == '__main__':
+    main()
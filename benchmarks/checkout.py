@@ -0,0 +1,103 @@
+"""
+Places orders for a handful of hot products from many threads at once and reports orders per
+second, rejected orders and whether more was sold than was in stock. The conditional F()
+decrement used by CreateOrder is compared with reading the supply, checking it in Python and
+saving it back. The seeded rows are deleted afterwards.
+
+    python -m benchmarks.checkout [threads] [orders per thread]
+"""
+from benchmarks import setup
+
+setup()
+
+import random
+import sys
+import time
+from threading import Lock, Thread
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection, transaction
+from orders.checkout import place_order
+from orders.models import OrderItem
+from products.models import Product
+
+HOT_PRODUCTS = 5
+SUPPLY = 300
+
+def read_then_write(user, lines, products):
+    """
+    Checkout without a conditional update: the supply check and the write are separate
+    statements, so concurrent checkouts can both pass the check and overwrite each other.
+    """
+    with transaction.atomic():
+        for product_id, quantity in sorted(lines):
+            product = Product.objects.get(pk=product_id)
+            if product.supply < quantity:
+                transaction.set_rollback(True)
+                return None, [(0, "Insufficient stock.")]
+            product.supply -= quantity
+            product.save(update_fields=['supply'])
+    return True, []
+
+def run(checkout, user, products, threads, orders_per_thread):
+    counts = {'accepted': 0, 'rejected': 0, 'failed': 0, 'sold': 0}
+    lock = Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(orders_per_thread):
+                lines = [(product.pk, rng.randint(1, 3)) for product in rng.sample(products, rng.randint(1, 2))]
+                try:
+                    order, errors = checkout(user, lines, {product.pk: product for product in products})
+                except DatabaseError:
+                    outcome, sold = 'failed', 0
+                else:
+                    outcome, sold = ('rejected', 0) if errors else ('accepted', sum(quantity for _, quantity in lines))
+                with lock:
+                    counts[outcome] += 1
+                    counts['sold'] += sold
+        finally:
+            connection.close()
+
+    workers = [Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    counts['seconds'] = time.perf_counter() - start
+    return counts
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    orders_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    user = User.objects.create(username='benchmark-checkout')
+
+    try:
+        for name, checkout in (('conditional F() update', place_order), ('read, check, save', read_then_write)):
+            products = Product.objects.bulk_create([
+                Product(name=f'Hot product {n}', description='Seeded by the checkout benchmark', cost=1, supply=SUPPLY)
+                for n in range(HOT_PRODUCTS)
+            ])
+            counts = run(checkout, user, products, threads, orders_per_thread)
+
+            remaining = sum(Product.objects.filter(pk__in=[product.pk for product in products]).values_list('supply', flat=True))
+            if checkout is place_order:
+                recorded = sum(OrderItem.objects.filter(order__user=user, product__in=products).values_list('quantity', flat=True))
+                consistent = recorded == counts['sold'] == HOT_PRODUCTS * SUPPLY - remaining
+            else:
+                consistent = counts['sold'] == HOT_PRODUCTS * SUPPLY - remaining
+            oversold = counts['sold'] > HOT_PRODUCTS * SUPPLY or remaining < 0 or not consistent
+
+            print(
+                f"{name:24} {counts['accepted'] / counts['seconds']:8.1f} orders/s  "
+                f"{counts['accepted']} accepted, {counts['rejected']} rejected, {counts['failed']} failed  "
+                f"sold {counts['sold']} of {HOT_PRODUCTS * SUPPLY}, {remaining} left  "
+                f"{'OVERSOLD' if oversold else 'no oversell'}"
+            )
+            Product.objects.filter(pk__in=[product.pk for product in products]).delete()
+    finally:
+        user.delete()
+
+if __name__ == '__main__':
+    main()
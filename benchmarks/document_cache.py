@@ -0,0 +1,61 @@
+"""
+Compares parsing and validating a document on every request with serving it from the
+document cache used by the GraphQL view.
+
+    python -m benchmarks.document_cache
+"""
+from benchmarks import setup, timed
+
+setup()
+
+from graphql import parse
+from graphql.validation import validate
+from gql.documents import DocumentCache
+from gql.schema import schema
+
+QUERY = '''
+query searchProducts($name: String, $after: String) {
+    searchProducts(name: $name, first: 20, after: $after) {
+        totalCount
+        pageInfo {
+            hasNextPage
+            endCursor
+        }
+        edges {
+            node {
+                id
+                name
+                cost
+                supply
+                tags {
+                    name
+                }
+                reviews {
+                    title
+                    rating
+                    user {
+                        username
+                    }
+                }
+            }
+        }
+    }
+}
+'''
+
+ITERATIONS = 2000
+
+def main():
+    graphql_schema = schema.graphql_schema
+    cache = DocumentCache()
+
+    uncached = timed(lambda: validate(graphql_schema, parse(QUERY)), ITERATIONS)
+    cached = timed(lambda: cache.get(graphql_schema, QUERY), ITERATIONS)
+
+    print(f"parse + validate per request: {uncached:10.1f} us")
+    print(f"document cache lookup:        {cached:10.1f} us")
+    print(f"speedup:                      {uncached / cached:10.1f}x")
+    print(f"cache stats: {cache.stats()}")
+
+if __name__ == '__main__':
+    main()
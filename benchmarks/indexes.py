@@ -0,0 +1,97 @@
+"""
+Seeds a large catalogue and shows the query plan and duration of the search filters and
+orderings with the composite indexes removed and then restored. The seeded rows are deleted afterwards.
+
+    python -m benchmarks.indexes [products]
+"""
+from benchmarks import setup, timed
+
+setup()
+
+import random
+import sys
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from orders.models import Order
+from products.models import Product
+from reviews.models import Review
+from tags.models import Tag
+
+ITERATIONS = 20
+
+def seed(size):
+    rng = random.Random(0)
+    now = timezone.now()
+    users = User.objects.bulk_create([User(username=f'benchmark-indexes-{n}') for n in range(100)])
+    products = Product.objects.bulk_create(
+        (
+            Product(name=f'Product {n}', description='Seeded by the index benchmark', cost=Decimal(rng.randint(100, 100000)) / 100, supply=rng.randint(0, 1000), average_rating=rng.randint(10, 100) / 10)
+            for n in range(size)
+        ),
+        batch_size=2000,
+    )
+    orders = Order.objects.bulk_create(
+        (Order(user=rng.choice(users), total_cost=Decimal(rng.randint(100, 100000)) / 100) for _ in range(size)),
+        batch_size=2000,
+    )
+    reviews = Review.objects.bulk_create(
+        (Review(title='Review', body='Seeded', rating=rng.randint(1, 10), product=rng.choice(products[:100]), user=rng.choice(users)) for _ in range(size)),
+        batch_size=2000,
+    )
+
+    # auto_now_add ignores explicit values on insert, so spread the timestamps afterwards.
+    for model, rows in ((Product, products), (Order, orders), (Review, reviews)):
+        for row in rows:
+            row.created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        model.objects.bulk_update(rows, ['created_at'], batch_size=2000)
+    return users, products
+
+def queries(users, products):
+    now = timezone.now()
+    return {
+        'products by cost range': lambda: Product.objects.filter(cost__gte=10, cost__lte=11).order_by('created_at', 'id')[:20],
+        'products by supply range': lambda: Product.objects.filter(supply__gte=10, supply__lte=12).order_by('created_at', 'id')[:20],
+        'most expensive products': lambda: Product.objects.order_by('-cost', '-id')[:20],
+        'products with least supply': lambda: Product.objects.order_by('supply', 'id')[:20],
+        'best rated products': lambda: Product.objects.order_by('-average_rating', '-id')[:20],
+        'products created last week': lambda: Product.objects.filter(created_at__gte=now - timedelta(days=7)).order_by('created_at', 'id')[:20],
+        "a user's orders": lambda: Order.objects.filter(user=users[0]).order_by('created_at', 'id')[:20],
+        'orders by total cost range': lambda: Order.objects.filter(total_cost__gte=10, total_cost__lte=11).order_by('created_at', 'id')[:20],
+        "a product's reviews by rating": lambda: Review.objects.filter(product=products[0], rating__gte=9).order_by('created_at', 'id')[:20],
+    }
+
+def report(title, users, products):
+    print(f"\n{title}")
+    for name, query in queries(users, products).items():
+        plan = query().explain().replace('\n', ' | ')
+        duration = timed(lambda: list(query()), ITERATIONS)
+        print(f"  {name:32} {duration:10.1f} us  {plan[:160]}")
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    users, products = seed(size)
+    indexes = [(model, index) for model in (Product, Order, Review, Tag) for index in model._meta.indexes]
+
+    try:
+        with connection.schema_editor() as schema_editor:
+            for model, index in indexes:
+                schema_editor.remove_index(model, index)
+        report("without indexes", users, products)
+    finally:
+        with connection.schema_editor() as schema_editor:
+            for model, index in indexes:
+                schema_editor.add_index(model, index)
+
+    try:
+        report("with indexes", users, products)
+    finally:
+        Review.objects.filter(user__in=users).delete()
+        Order.objects.filter(user__in=users).delete()
+        Product.objects.filter(pk__in=[product.pk for product in products]).delete()
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+if __name__ == '__main__':
+    main()
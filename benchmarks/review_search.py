@@ -0,0 +1,76 @@
+"""
+Compares searching a popular product's reviews with icontains filters against the in-process
+BM25 review index. The seeded rows are rolled back when the benchmark finishes.
+
+    python -m benchmarks.review_search
+"""
+from benchmarks import setup, timed
+
+setup()
+
+import random
+import time
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from products.models import Product
+from reviews.models import Review
+from reviews.search import ReviewIndex
+
+REVIEWS = 20000
+WORDS = [f'word{rank}' for rank in range(1, 5001)]
+WEIGHTS = [1 / rank for rank in range(1, 5001)]
+QUERY = 'word200 word350'
+ITERATIONS = 20
+
+def seed():
+    rng = random.Random(0)
+    user = User.objects.create_user(username='benchmark-reviewer')
+    product = Product.objects.create(name='Benchmark product', description='Seeded by the review search benchmark', cost=1, supply=1)
+    Review.objects.bulk_create(
+        (
+            Review(
+                title=' '.join(rng.choices(WORDS, WEIGHTS, k=3)),
+                body=' '.join(rng.choices(WORDS, WEIGHTS, k=40)),
+                rating=rng.randint(1, 10),
+                product=product,
+                user=user,
+            )
+            for _ in range(REVIEWS)
+        ),
+        batch_size=1000,
+    )
+    return product
+
+def main():
+    with transaction.atomic():
+        product = seed()
+        index = ReviewIndex()
+
+        def orm():
+            condition = Q()
+            for word in QUERY.split():
+                condition |= Q(title__icontains=word) | Q(body__icontains=word)
+            queryset = Review.objects.filter(product=product).filter(condition)
+            return queryset.count(), list(queryset.order_by('created_at', 'id').values_list('id', flat=True)[:20])
+
+        def search():
+            ranked = index.search(product.id, QUERY)
+            return len(ranked), ranked[:20]
+
+        start = time.perf_counter()
+        index.get(product.id)
+        build = (time.perf_counter() - start) * 1000
+
+        orm_cost = timed(orm, ITERATIONS)
+        index_cost = timed(search, ITERATIONS)
+
+        print(f"index build for {REVIEWS} reviews: {build:10.1f} ms")
+        print(f"icontains scan per search:       {orm_cost:10.1f} us")
+        print(f"BM25 index per search:           {index_cost:10.1f} us")
+        print(f"speedup:                         {orm_cost / index_cost:10.1f}x")
+
+        transaction.set_rollback(True)
+
+if __name__ == '__main__':
+    main()
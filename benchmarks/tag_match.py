@@ -0,0 +1,68 @@
+"""
+Compares filtering products by tags with the old join through the tag table against the
+IN semi-join (ANY) and the grouped semi-join (ALL) used by searchProducts, on thousands of
+products each carrying dozens of tags. The seeded rows are deleted afterwards.
+
+    python -m benchmarks.tag_match [products]
+"""
+from benchmarks import setup, timed
+
+setup()
+
+import random
+import sys
+from django.db.models import Count
+from products.models import Product
+from tags.models import Tag
+
+TAGS = 200
+TAGS_PER_PRODUCT = 30
+ITERATIONS = 20
+
+def seed(size):
+    rng = random.Random(0)
+    tags = Tag.objects.bulk_create([Tag(name=f'benchmark-tag-{n}', description='Seeded') for n in range(TAGS)])
+    products = Product.objects.bulk_create(
+        (Product(name=f'Product {n}', description='Seeded by the tag benchmark', cost=1, supply=1) for n in range(size)),
+        batch_size=2000,
+    )
+    Through = Tag.product.through
+    Through.objects.bulk_create(
+        (Through(tag_id=tag.pk, product_id=product.pk) for product in products for tag in rng.sample(tags, TAGS_PER_PRODUCT)),
+        batch_size=5000,
+    )
+    return tags, products
+
+def any_join(tag_ids):
+    queryset = Product.objects.filter(tags__id__in=tag_ids)
+    return queryset.count(), list(queryset.order_by('created_at', 'id')[:20])
+
+def any_join_distinct(tag_ids):
+    queryset = Product.objects.filter(tags__id__in=tag_ids).distinct()
+    return queryset.count(), list(queryset.order_by('created_at', 'id')[:20])
+
+def any_in(tag_ids):
+    queryset = Product.objects.filter(pk__in=Product.tags.through.objects.filter(tag_id__in=tag_ids).values('product_id'))
+    return queryset.count(), list(queryset.order_by('created_at', 'id')[:20])
+
+def all_grouped(tag_ids):
+    matching = Product.tags.through.objects.filter(tag_id__in=tag_ids).values('product_id').annotate(tag_count=Count('tag_id')).filter(tag_count=len(tag_ids))
+    queryset = Product.objects.filter(pk__in=matching.values('product_id'))
+    return queryset.count(), list(queryset.order_by('created_at', 'id')[:20])
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tags, products = seed(size)
+    tag_ids = [tag.pk for tag in tags[:3]]
+
+    try:
+        for name, function in (('ANY, join', any_join), ('ANY, join + DISTINCT', any_join_distinct), ('ANY, IN semi-join', any_in), ('ALL, grouped semi-join', all_grouped)):
+            count, _ = function(tag_ids)
+            duration = timed(lambda: function(tag_ids), ITERATIONS)
+            print(f"{name:24} {duration:12.1f} us  {count} rows")
+    finally:
+        Product.objects.filter(pk__in=[product.pk for product in products]).delete()
+        Tag.objects.filter(pk__in=[tag.pk for tag in tags]).delete()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone as dt_timezone
+from django.core.cache import cache
+from django.utils import timezone
+from authentication.models import TokenRevocation
+
+ROLES_TIMEOUT = 300
+
+def _roles_key(user_id, changed_at):
+    return f'roles:{user_id}:{changed_at.timestamp() if changed_at else 0}'
+
+def roles_changed_at(user):
+    """
+    Returns the time the user's groups last changed, or None if they never changed. Read from
+    the database once per request and memoized on the user object.
+    """
+    if not hasattr(user, '_roles_changed_at'):
+        user._roles_changed_at = TokenRevocation.objects.filter(pk=user.pk).values_list('roles_changed_at', flat=True).first()
+    return user._roles_changed_at
+
+def get_roles(user):
+    """
+    Returns the names of the groups a user belongs to. Roles are memoized on the user object
+    for the rest of the request, taken from verified token claims when available, and
+    otherwise loaded with a single query that is cached between requests. The cache key
+    includes the time the roles last changed, so a change made by any process misses it.
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, '_roles', None)
+    if roles is None:
+        key = _roles_key(user.pk, roles_changed_at(user))
+        roles = cache.get(key)
+        if roles is None:
+            roles = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, roles, ROLES_TIMEOUT)
+        user._roles = roles
+    return roles
+
+def set_roles_from_claims(user, payload):
+    """
+    Uses the groups claim of a verified token as the user's roles, unless the user's roles
+    changed after the token was issued.
+    """
+    groups = payload.get('groups')
+    issued_at = payload.get('iat')
+    if groups is None or issued_at is None:
+        return
+
+    changed_at = roles_changed_at(user)
+    if changed_at is not None and changed_at >= datetime.fromtimestamp(issued_at, dt_timezone.utc):
+        return
+    user._roles = frozenset(groups)
+
+def revoke_tokens(user_id):
+    """
+    Records that a user was disabled or deleted, so stateless users are no longer built from
+    any token issued before now.
+    """
+    TokenRevocation.objects.update_or_create(user_id=user_id, defaults={'revoked_at': timezone.now()})
+
+def invalidate_roles(user):
+    """
+    Records that a user's groups changed, so the groups claim of every token issued before now
+    is distrusted and the cached roles are no longer used. Called whenever a user's groups
+    change.
+    """
+    TokenRevocation.objects.update_or_create(user_id=user.pk, defaults={'roles_changed_at': timezone.now()})
+    user.__dict__.pop('_roles', None)
+    user.__dict__.pop('_roles_changed_at', None)
+
+def is_admin(user):
+    return 'admin' in get_roles(user)
@@ -1,3 +1,4 @@
+from django.utils import timezone
 from graphql_jwt.utils import jwt_payload
 
 def jwt_payload_handler(user, request):
@@ -8,6 +9,8 @@ def jwt_payload_handler(user, request):
 
     groups = user.groups.all().values_list('name', flat=True)
     payload['groups'] = list(groups)
+    payload['user_id'] = user.pk
+    payload['iat'] = int(timezone.now().timestamp())
     return payload
 
 def execute_mutation(self, mutation_name, variables):
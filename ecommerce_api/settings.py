@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'reviews',
     'tags',
     'authentication',
+    'gql',
 ]
 
 MIDDLEWARE = [
@@ -78,6 +79,21 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by every server process. Holds the GraphQL response cache, so a response cached by
+    # one process is served by all of them. Create the table with createcachetable.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+    },
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -118,7 +134,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Authentication
 
 AUTHENTICATION_BACKENDS = [
-    "graphql_jwt.backends.JSONWebTokenBackend",
+    "authentication.backends.JSONWebTokenBackend",
     "django.contrib.auth.backends.ModelBackend",
 ]
 
@@ -129,11 +145,61 @@ GRAPHQL_JWT = {
     "JWT_AUDIENCE": "ecommerce.jacobarthurs.com",
 }
 
+GRAPHQL_JWT_STATELESS_USER = False
+
 # GraphQL
 
 GRAPHENE = {
     'SCHEMA': 'gql.schema.schema',
-    "MIDDLEWARE": [
-        "graphql_jwt.middleware.JSONWebTokenMiddleware",
+    'RELAY_CONNECTION_MAX_LIMIT': 100,
+    "MIDDLEWARE": [],
+}
+
+GRAPHQL_DOCUMENT_CACHE_SIZE = 256
+
+GRAPHQL_PERSISTED_QUERY_CACHE_SIZE = 1024
+
+GRAPHQL_PERSISTED_QUERY_MAX_ROWS = 10000
+
+GRAPHQL_PERSISTED_QUERY_MAX_LENGTH = 20000
+
+GRAPHQL_QUERY_COST = {
+    "MAX_COST": 5000,
+    "MAX_DEPTH": 10,
+    "LIST_SIZE": 10,
+    "FIELD_COSTS": {
+        "Query.searchProducts": 5,
+        "Query.productFacets": 5,
+        "Query.searchOrders": 5,
+        "Query.searchReviews": 5,
+    },
+    "LIST_SIZES": {
+        "ProductType.orderItems": 50,
+        "ProductType.reviews": 25,
+        "TagType.product": 50,
+    },
+}
+
+GRAPHQL_RESPONSE_CACHE = {
+    "CACHE_ALIAS": "shared",
+    "TIMEOUT": 300,
+    "FIELDS": [
+        "allProducts",
+        "productById",
+        "searchProducts",
+        "productFacets",
+        "allReviews",
+        "searchReviews",
     ],
-}
\ No newline at end of file
+}
+
+# Orders
+
+ORDER_INTAKE = {
+    "ENABLED": False,
+    "PARTITIONS": 4,
+    "BATCH_SIZE": 100,
+}
+
+# Seconds an idempotency key and the result it stored are kept before clear_idempotency_keys removes them.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
\ No newline at end of file
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.conf import settings
 from django.urls import path
-from graphene_django.views import GraphQLView
+from gql.views import GraphQLView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
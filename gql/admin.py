@@ -0,0 +1,4 @@
+from django.contrib import admin
+from gql.models import PersistedQuery
+
+admin.site.register(PersistedQuery)
@@ -0,0 +1,168 @@
+import graphene
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, get_named_type, get_nullable_type, is_list_type
+from graphql.execution.values import get_argument_values, get_variable_values
+from graphql.language import FragmentSpreadNode, InlineFragmentNode, OperationDefinitionNode
+
+DEFAULTS = {
+    'MAX_COST': 5000,
+    'MAX_DEPTH': 10,
+    'OBJECT_COST': 1,
+    'SCALAR_COST': 0,
+    'LIST_SIZE': 10,
+    'FIELD_COSTS': {},
+    'LIST_SIZES': {},
+}
+
+def cost_settings():
+    """
+    Returns the GRAPHQL_QUERY_COST settings merged over the defaults.
+    """
+    return {**DEFAULTS, **getattr(settings, 'GRAPHQL_QUERY_COST', {})}
+
+def _is_connection(graphql_type):
+    graphene_type = getattr(graphql_type, 'graphene_type', None)
+    return isinstance(graphene_type, type) and issubclass(graphene_type, graphene.relay.Connection)
+
+class QueryCostAnalysis:
+    """
+    Static cost and depth analysis of an operation, run after validation and before any
+    resolver. Every selected field, including each alias of the same field, adds its weight.
+    The cost of the selections under a list is multiplied by the expected list size: the
+    `first` argument (or the page size limit) for connections and a configurable estimate for
+    other lists. The cost and depth of each fragment are computed once per parent type, so
+    fragments that spread other fragments many times cannot make the analysis itself expensive.
+    """
+    def __init__(self, schema, document, operation_name=None, variables=None, config=None):
+        self.schema = schema
+        self.document = document
+        self.operation_name = operation_name
+        self.variables = variables or {}
+        self.config = config or cost_settings()
+        self.fragments = {}
+        self.fragment_costs = {}
+        self.cost = 0
+        self.depth = 0
+
+    def _operation(self):
+        operations = []
+        for definition in self.document.definitions:
+            if isinstance(definition, OperationDefinitionNode):
+                operations.append(definition)
+            else:
+                self.fragments[definition.name.value] = definition
+
+        for operation in operations:
+            if self.operation_name is None or (operation.name and operation.name.value == self.operation_name):
+                return operation
+        return None
+
+    def _field_cost(self, parent_type, field_name, field_type):
+        key = f'{parent_type.name}.{field_name}'
+        if key in self.config['FIELD_COSTS']:
+            return self.config['FIELD_COSTS'][key]
+        if hasattr(get_named_type(field_type), 'fields'):
+            return self.config['OBJECT_COST']
+        return self.config['SCALAR_COST']
+
+    def _list_size(self, parent_type, field_name, field_type, arguments):
+        if _is_connection(get_named_type(field_type)):
+            first = arguments.get('first')
+            return graphene_settings.RELAY_CONNECTION_MAX_LIMIT if first is None else first
+
+        if field_name == 'edges' and _is_connection(parent_type):
+            return 1
+
+        if is_list_type(get_nullable_type(field_type)):
+            return self.config['LIST_SIZES'].get(f'{parent_type.name}.{field_name}', self.config['LIST_SIZE'])
+        return 1
+
+    def _fragment_cost(self, parent_type, name, depth):
+        """
+        Returns the cost of a fragment spread under a parent type, memoized with the depth the
+        fragment reaches below the spread.
+        """
+        key = (name, parent_type.name)
+        if key not in self.fragment_costs:
+            outer_depth, self.depth = self.depth, 0
+            cost = self._selection_cost(parent_type, self.fragments[name].selection_set, 0)
+            self.fragment_costs[key] = (cost, self.depth)
+            self.depth = outer_depth
+
+        cost, fragment_depth = self.fragment_costs[key]
+        self.depth = max(self.depth, depth + fragment_depth)
+        return cost
+
+    def _selection_cost(self, parent_type, selection_set, depth):
+        self.depth = max(self.depth, depth)
+        total = 0
+
+        for node in selection_set.selections:
+            if isinstance(node, InlineFragmentNode):
+                total += self._selection_cost(parent_type, node.selection_set, depth)
+                continue
+            if isinstance(node, FragmentSpreadNode):
+                total += self._fragment_cost(parent_type, node.name.value, depth)
+                continue
+
+            field_name = node.name.value
+            if field_name.startswith('__'):
+                continue
+
+            field = parent_type.fields.get(field_name)
+            if field is None:
+                continue
+
+            try:
+                arguments = get_argument_values(field, node, self.variables)
+            except GraphQLError:
+                arguments = {}
+
+            cost = self._field_cost(parent_type, field_name, field.type)
+            if node.selection_set is not None:
+                size = self._list_size(parent_type, field_name, field.type, arguments)
+                cost += size * self._selection_cost(get_named_type(field.type), node.selection_set, depth + 1)
+            total += cost
+
+        return total
+
+    def analyze(self):
+        """
+        Computes the cost and depth of the operation.
+
+        Returns:
+            The analysis, with cost and depth set.
+        """
+        operation = self._operation()
+        if operation is None:
+            return self
+
+        coerced = get_variable_values(self.schema, operation.variable_definitions or (), self.variables)
+        if isinstance(coerced, dict):
+            self.variables = coerced
+
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is not None:
+            self.cost = self._selection_cost(root_type, operation.selection_set, 1)
+        return self
+
+    def errors(self):
+        """
+        Returns the errors for an operation that exceeds the cost budget or maximum depth.
+        """
+        errors = []
+        if self.cost > self.config['MAX_COST']:
+            errors.append(GraphQLError(
+                f"Query cost {self.cost} exceeds the maximum cost of {self.config['MAX_COST']}.",
+                extensions={'code': 'QUERY_TOO_EXPENSIVE'},
+            ))
+        if self.depth > self.config['MAX_DEPTH']:
+            errors.append(GraphQLError(
+                f"Query depth {self.depth} exceeds the maximum depth of {self.config['MAX_DEPTH']}.",
+                extensions={'code': 'QUERY_TOO_DEEP'},
+            ))
+        return errors
+
+    def extensions(self):
+        return {'cost': {'requested': self.cost, 'maximum': self.config['MAX_COST'], 'depth': self.depth}}
@@ -0,0 +1,64 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from graphql import parse
+from graphql.validation import validate
+
+class DocumentCache:
+    """
+    Bounded LRU cache of parsed and validated GraphQL documents keyed by the sha256 hash of the
+    query text. Clients send a small set of distinct operations, so caching the parse and
+    validation results takes both steps off the hot path after the first request.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(query):
+        return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+    def get(self, schema, query, validation_rules=None, max_errors=None):
+        """
+        Parses and validates a query, reusing a previous result for the same query text.
+        Parse errors are raised to the caller and never cached.
+
+        Returns:
+            A tuple of (document, validation errors).
+        """
+        key = self.key(query)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        document = parse(query)
+        entry = (document, validate(schema, document, validation_rules, max_errors))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return entry
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'max_size': self.max_size}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,99 @@
+from django.db.models import prefetch_related_objects
+
+class LoaderRegistry:
+    """
+    Per-request registry that batches relation loads across a GraphQL response. Model instances
+    are grouped by the level of the response they appear at (the response path without list
+    indexes), and the first time a relation is resolved at a level it is loaded for every
+    instance at that level with a single IN (...) query.
+    """
+    def __init__(self):
+        self._levels = {}
+        self._seen = {}
+        self._loaded = {}
+
+    def register(self, level, instances):
+        """
+        Records instances as appearing at the given response level.
+
+        Returns:
+            The instances as a list.
+        """
+        instances = list(instances)
+        batch = self._levels.setdefault(level, [])
+        seen = self._seen.setdefault(level, set())
+
+        for instance in instances:
+            if id(instance) not in seen:
+                seen.add(id(instance))
+                batch.append(instance)
+
+        return instances
+
+    def load(self, instance, relation, level, child_level):
+        """
+        Loads a relation of an instance, batching the load with every other instance registered
+        at the same level that has not loaded it yet.
+
+        Returns:
+            The related instance for forward relations, or a list of related instances otherwise.
+        """
+        self.register(level, [instance])
+        batch = self._levels[level]
+        start = self._loaded.get((level, relation), 0)
+
+        if start < len(batch):
+            pending = batch[start:]
+            prefetch_related_objects(pending, relation)
+            self._loaded[(level, relation)] = len(batch)
+
+            for obj in pending:
+                self.register(child_level, _related(obj, relation))
+
+        value = getattr(instance, relation)
+        if hasattr(value, 'all'):
+            return list(value.all())
+        return value
+
+def _related(instance, relation):
+    value = getattr(instance, relation)
+    if value is None:
+        return []
+    if hasattr(value, 'all'):
+        return value.all()
+    return [value]
+
+def _level(path):
+    return tuple(key for key in path.as_list() if not isinstance(key, int))
+
+def get_loaders(info):
+    """
+    Returns the loader registry attached to the request context, creating it on first use.
+    """
+    context = info.context
+    if context is None:
+        return LoaderRegistry()
+
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = LoaderRegistry()
+        context.loaders = loaders
+    return loaders
+
+def register_instances(info, instances, suffix=()):
+    """
+    Registers the instances returned by a list resolver so relations selected beneath them are
+    batched. The suffix names the nested fields the instances are returned under, e.g. 'edges'
+    and 'node' for a connection.
+
+    Returns:
+        The evaluated list of instances.
+    """
+    return get_loaders(info).register(_level(info.path) + tuple(suffix), instances)
+
+def load_related(info, instance, relation):
+    """
+    Resolves a relation of a model instance through the request's loader registry.
+    """
+    level = _level(info.path)
+    return get_loaders(info).load(instance, relation, level[:-1], level)
@@ -0,0 +1,16 @@
+from django.db import models
+
+class PersistedQuery(models.Model):
+    sha256_hash = models.CharField(max_length=64, unique=True)
+    query = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256_hash
+
+class VersionStamp(models.Model):
+    key = models.CharField(max_length=255, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
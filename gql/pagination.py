@@ -0,0 +1,212 @@
+import json
+from bisect import bisect_right
+from itertools import islice
+import graphene
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+from .loaders import register_instances
+from .planner import plan_queryset, selection_sets_at
+
+class CountableConnection(graphene.relay.Connection):
+    """
+    Relay connection that can also report the total number of matching rows. The count query
+    only runs when totalCount is selected.
+    """
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int(required=True, description="The total number of items matching the query, ignoring pagination.")
+
+    total = None
+
+    def resolve_total_count(self, info):
+        if self.total is not None:
+            return self.total
+        return self.queryset.count()
+
+def connection_args():
+    """
+    Returns the arguments accepted by every keyset paginated connection field.
+    """
+    return {
+        'first': graphene.Int(default_value=None, description="The number of items to return. Defaults to the server's maximum page size, and larger values are rejected with an error."),
+        'after': graphene.String(default_value=None, description="Return items after this cursor."),
+    }
+
+def _key_name(key):
+    return key[1:] if key.startswith('-') else key
+
+def _model_field(model, key):
+    try:
+        return model._meta.get_field(_key_name(key))
+    except FieldDoesNotExist:
+        return None
+
+def encode_cursor(instance, keys):
+    """
+    Encodes the keyset values of an instance into an opaque cursor. Keys that are not model
+    fields, such as annotations, are encoded as plain JSON values.
+    """
+    values = []
+    for key in keys:
+        field = _model_field(type(instance), key)
+        values.append(getattr(instance, _key_name(key)) if field is None else field.value_to_string(instance))
+    return base64(json.dumps(values))
+
+def decode_cursor(model, cursor, keys):
+    """
+    Decodes a cursor created by encode_cursor back into keyset values.
+    """
+    try:
+        values = json.loads(unbase64(cursor))
+        if len(values) != len(keys):
+            raise ValueError
+        decoded = []
+        for key, value in zip(keys, values):
+            field = _model_field(model, key)
+            decoded.append(value if field is None else field.to_python(value))
+        return decoded
+    except Exception:
+        raise GraphQLError("Invalid cursor.")
+
+def _after(keys, values):
+    """
+    Builds the filter selecting rows strictly after the keyset values. Keys prefixed with '-'
+    are descending.
+    """
+    names = [_key_name(key) for key in keys]
+    condition = Q()
+    for index, key in enumerate(keys):
+        equal = {prior: value for prior, value in zip(names[:index], values[:index])}
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{names[index]}__{lookup}': values[index]})
+    return condition
+
+def _page_size(info, first):
+    max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+    if first is None:
+        return max_limit
+    if first < 0:
+        raise GraphQLError("The `first` argument must be a non-negative integer.")
+    if first > max_limit:
+        raise GraphQLError(f"Requesting {first} records on the `{info.field_name}` connection exceeds the `first` limit of {max_limit} records.")
+    return first
+
+def _connection(info, rows, cursors, has_next_page, after):
+    connection_type = info.return_type
+    while hasattr(connection_type, 'of_type'):
+        connection_type = connection_type.of_type
+    connection_type = connection_type.graphene_type
+
+    edges = [connection_type.Edge(node=row, cursor=cursor) for row, cursor in zip(rows, cursors)]
+    return connection_type(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=has_next_page,
+            has_previous_page=after is not None,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
+
+def paginate(info, queryset, first=None, after=None, keys=('created_at', 'id')):
+    """
+    Resolves a keyset paginated connection. Rows are ordered by the keys and the cursor is
+    applied as a range filter on them, so every page costs the same regardless of its position.
+    Keys may be descending ('-cost') or name annotations of the queryset.
+
+    Returns:
+        An instance of the field's connection type.
+    """
+    first = _page_size(info, first)
+
+    page = queryset.order_by(*keys)
+    if after is not None:
+        page = page.filter(_after(keys, decode_cursor(queryset.model, after, keys)))
+
+    required = [_key_name(key) for key in keys if _model_field(queryset.model, key) is not None]
+    page = plan_queryset(info, page, selection_sets_at(info, 'edges', 'node'), required)
+    rows = list(page[:first + 1])
+    has_next_page = len(rows) > first
+    rows = register_instances(info, rows[:first], ('edges', 'node'))
+
+    connection = _connection(info, rows, [encode_cursor(row, keys) for row in rows], has_next_page, after)
+    connection.queryset = queryset
+    return connection
+
+def paginate_ranked(info, queryset, ranked, first=None, after=None):
+    """
+    Resolves a connection over results ranked outside the database, such as by a search index.
+    The ranking is a list of (score, id) pairs, best first, and the cursor holds the score and
+    id of the last row; only the rows of the requested page are fetched.
+
+    Returns:
+        An instance of the field's connection type.
+    """
+    first = _page_size(info, first)
+
+    position = 0
+    if after is not None:
+        try:
+            score, pk = json.loads(unbase64(after))
+        except Exception:
+            raise GraphQLError("Invalid cursor.")
+        position = bisect_right(ranked, (-score, pk), key=lambda item: (-item[0], item[1]))
+
+    page = ranked[position:position + first + 1]
+    has_next_page = len(page) > first
+    page = page[:first]
+
+    scores = {pk: score for score, pk in page}
+    rows = plan_queryset(info, queryset.filter(pk__in=scores), selection_sets_at(info, 'edges', 'node')).in_bulk()
+    rows = [rows[pk] for score, pk in page if pk in rows]
+    for row in rows:
+        row.relevance = scores[row.pk]
+    rows = register_instances(info, rows, ('edges', 'node'))
+
+    connection = _connection(info, rows, [base64(json.dumps([row.relevance, row.pk])) for row in rows], has_next_page, after)
+    connection.queryset = queryset
+    connection.total = len(ranked)
+    return connection
+
+def _iter_bits(bitmap, after=None):
+    if after is not None:
+        bitmap = bitmap >> (after + 1) << (after + 1)
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
+
+def paginate_bitmap(info, queryset, bitmap, first=None, after=None):
+    """
+    Resolves a connection over the ids set in a bitmap, in ascending id order. The page is read
+    from the bitmap and only its rows are fetched; the total is the number of set bits.
+
+    Returns:
+        An instance of the field's connection type.
+    """
+    first = _page_size(info, first)
+
+    after_id = None
+    if after is not None:
+        try:
+            after_id, = json.loads(unbase64(after))
+            if not isinstance(after_id, int) or after_id < 0:
+                raise ValueError
+        except Exception:
+            raise GraphQLError("Invalid cursor.")
+
+    ids = list(islice(_iter_bits(bitmap, after_id), first + 1))
+    has_next_page = len(ids) > first
+    ids = ids[:first]
+
+    rows = plan_queryset(info, queryset.filter(pk__in=ids), selection_sets_at(info, 'edges', 'node')).in_bulk()
+    rows = register_instances(info, [rows[pk] for pk in ids if pk in rows], ('edges', 'node'))
+
+    connection = _connection(info, rows, [base64(json.dumps([row.pk])) for row in rows], has_next_page, after)
+    connection.queryset = queryset
+    connection.total = bitmap.bit_count()
+    return connection
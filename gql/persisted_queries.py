@@ -0,0 +1,112 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from django.db import IntegrityError
+from graphql import GraphQLError
+from .models import PersistedQuery
+
+class PersistedQueryNotFound(GraphQLError):
+    def __init__(self):
+        super().__init__("PersistedQueryNotFound", extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+
+class PersistedQueryStore:
+    """
+    Store for automatic persisted queries. Query text is looked up by its sha256 hash in a
+    bounded in-memory LRU first and in the PersistedQuery table second, so registered queries
+    survive restarts and are shared between processes. Only queries that parsed and validated
+    are registered. Queries longer than max_length are executed but not stored, and the table
+    keeps only the newest max_rows queries. A client whose query was evicted gets
+    PersistedQueryNotFound and registers it again.
+    """
+    def __init__(self, max_size=1024, max_rows=10000, max_length=20000):
+        self.max_size = max_size
+        self.max_rows = max_rows
+        self.max_length = max_length
+        self._memory = OrderedDict()
+        self._lock = Lock()
+
+    def _remember(self, sha256_hash, query):
+        with self._lock:
+            self._memory[sha256_hash] = query
+            self._memory.move_to_end(sha256_hash)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def get(self, sha256_hash):
+        """
+        Returns the query text registered under a hash, or None if it is unknown.
+        """
+        with self._lock:
+            query = self._memory.get(sha256_hash)
+            if query is not None:
+                self._memory.move_to_end(sha256_hash)
+                return query
+
+        query = PersistedQuery.objects.filter(sha256_hash=sha256_hash).values_list('query', flat=True).first()
+        if query is not None:
+            self._remember(sha256_hash, query)
+        return query
+
+    @staticmethod
+    def check_hash(sha256_hash, query):
+        if hashlib.sha256(query.encode('utf-8')).hexdigest() != sha256_hash:
+            raise GraphQLError("provided sha does not match query", extensions={'code': 'PERSISTED_QUERY_HASH_MISMATCH'})
+
+    def register(self, sha256_hash, query):
+        """
+        Registers query text under its hash after checking that the hash matches. Must only be
+        called for queries that parsed and validated. Registering evicts the oldest rows beyond
+        max_rows.
+        """
+        self.check_hash(sha256_hash, query)
+        if len(query) > self.max_length:
+            return
+
+        with self._lock:
+            if sha256_hash in self._memory:
+                return
+
+        try:
+            row, created = PersistedQuery.objects.get_or_create(sha256_hash=sha256_hash, defaults={'query': query})
+        except IntegrityError:
+            created = False
+        if created:
+            PersistedQuery.objects.filter(pk__lte=row.pk - self.max_rows).delete()
+        self._remember(sha256_hash, query)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def resolve(self, extensions, query):
+        """
+        Applies the persisted query protocol to a request: checks the hash when both the text
+        and its hash are sent, and looks the text up when only the hash is sent. The caller
+        registers a sent query with register once it has parsed and validated.
+
+        Returns:
+            A tuple of (the query text to execute, and the hash to register it under, or None
+            when there is nothing to register).
+        """
+        if not isinstance(extensions, dict):
+            return query, None
+
+        persisted_query = extensions.get('persistedQuery')
+        if not persisted_query:
+            return query, None
+
+        if persisted_query.get('version') != 1:
+            raise GraphQLError("Unsupported persisted query version.", extensions={'code': 'PERSISTED_QUERY_NOT_SUPPORTED'})
+
+        sha256_hash = persisted_query.get('sha256Hash')
+        if not sha256_hash:
+            raise GraphQLError("Persisted query is missing sha256Hash.")
+
+        if query:
+            self.check_hash(sha256_hash, query)
+            return query, sha256_hash
+
+        query = self.get(sha256_hash)
+        if query is None:
+            raise PersistedQueryNotFound()
+        return query, None
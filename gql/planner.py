@@ -0,0 +1,118 @@
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+def _selected_fields(info, selection_sets):
+    """
+    Flattens selection sets, expanding fragments, into a mapping of field name to the selection
+    sets nested beneath that field.
+    """
+    fields = {}
+    pending = list(selection_sets)
+
+    while pending:
+        selection_set = pending.pop()
+        if selection_set is None:
+            continue
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                nested = fields.setdefault(selection.name.value, [])
+                if selection.selection_set is not None:
+                    nested.append(selection.selection_set)
+            elif isinstance(selection, InlineFragmentNode):
+                pending.append(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                pending.append(info.fragments[selection.name.value].selection_set)
+
+    return fields
+
+def selection_sets_at(info, *names):
+    """
+    Descends from the field being resolved through the named nested fields, e.g. 'edges' and
+    'node' of a connection.
+
+    Returns:
+        The selection sets found at the end of the path.
+    """
+    selection_sets = [field_node.selection_set for field_node in info.field_nodes]
+    for name in names:
+        selection_sets = _selected_fields(info, selection_sets).get(name, [])
+    return selection_sets
+
+def _model_relations(model):
+    relations = {}
+    for field in model._meta.get_fields():
+        if field.is_relation and field.auto_created and not field.concrete:
+            relations[field.get_accessor_name()] = field
+        else:
+            relations[field.name] = field
+    return relations
+
+def _plan(info, model, selection_sets, prefix=''):
+    """
+    Walks the selection sets for a model and works out the columns to load, the forward
+    relations to join and the relations to prefetch.
+
+    Returns:
+        A tuple of (only fields or None when all columns are needed, select_related lookups,
+        prefetch_related lookups).
+    """
+    model_fields = _model_relations(model)
+    only = {prefix + model._meta.pk.name}
+    select = []
+    prefetch = []
+    load_all = False
+
+    for name, nested in _selected_fields(info, selection_sets).items():
+        if name.startswith('__'):
+            continue
+
+        field = model_fields.get(to_snake_case(name))
+        if field is None:
+            load_all = True
+            continue
+
+        if not field.is_relation:
+            only.add(prefix + field.name)
+        elif field.concrete and (field.many_to_one or field.one_to_one):
+            only.add(prefix + field.name)
+            if nested:
+                select.append(prefix + field.name)
+                nested_only, nested_select, nested_prefetch = _plan(info, field.related_model, nested, prefix + field.name + '__')
+                if nested_only is None:
+                    load_all = True
+                else:
+                    only.update(nested_only)
+                select.extend(nested_select)
+                prefetch.extend(nested_prefetch)
+        else:
+            related_name = field.name if field.concrete else field.get_accessor_name()
+            queryset = field.related_model._default_manager.all()
+            if nested:
+                required = [field.field.name] if field.one_to_many else []
+                queryset = plan_queryset(info, queryset, nested, required)
+            prefetch.append(Prefetch(prefix + related_name, queryset=queryset))
+
+    return (None if load_all else only), select, prefetch
+
+def plan_queryset(info, queryset, selection_sets=None, required=()):
+    """
+    Shapes a queryset to match the GraphQL selection being resolved: only the selected columns
+    are loaded, selected forward relations are joined with select_related() and selected
+    reverse and many-to-many relations are prefetched with prefetch_related().
+
+    Returns:
+        The planned queryset.
+    """
+    if selection_sets is None:
+        selection_sets = selection_sets_at(info)
+
+    only, select, prefetch = _plan(info, queryset.model, selection_sets)
+
+    if only is not None:
+        queryset = queryset.only(*only, *required)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
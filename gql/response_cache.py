@@ -0,0 +1,109 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from graphql import OperationType, print_ast
+from graphql.language import FieldNode
+from common.roles import get_roles
+from .stamps import bump_version, read_version
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'shared',
+    'TIMEOUT': 300,
+    'FIELDS': [],
+}
+
+VERSION_KEY = 'graphql:catalogue:version'
+
+PROCESS_LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+def response_cache_settings():
+    """
+    Returns the GRAPHQL_RESPONSE_CACHE settings merged over the defaults.
+    """
+    return {**DEFAULTS, **getattr(settings, 'GRAPHQL_RESPONSE_CACHE', {})}
+
+def shared_cache():
+    """
+    Returns the cache every process shares, which holds the cached responses.
+    """
+    return caches[response_cache_settings()['CACHE_ALIAS']]
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Requires the response cache alias to name a defined cache, and warns when it is process
+    local. The catalogue version stamp is kept in the database, so responses cached per process
+    are still invalidated, but each process then caches and misses on its own.
+    """
+    alias = response_cache_settings()['CACHE_ALIAS']
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend is None:
+        return [checks.Error(f"GRAPHQL_RESPONSE_CACHE['CACHE_ALIAS'] names the undefined cache {alias!r}.", id='gql.E001')]
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [checks.Warning(
+            f"GRAPHQL_RESPONSE_CACHE['CACHE_ALIAS'] names the process-local cache {alias!r}.",
+            hint="Use a cache shared between processes, such as DatabaseCache or RedisCache, so processes share cached responses.",
+            id='gql.W002',
+        )]
+    return []
+
+def catalogue_version():
+    """
+    Returns the current catalogue version stamp, which is part of every response cache key.
+    """
+    return read_version(VERSION_KEY)
+
+def invalidate_catalogue():
+    """
+    Bumps the catalogue version stamp so every cached catalogue response stops matching. Called
+    by the mutations that change products, tags or reviews.
+    """
+    bump_version(VERSION_KEY)
+
+def _role(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    return ','.join(sorted(get_roles(user)))
+
+def is_cacheable(operation_ast):
+    """
+    Returns whether an operation only selects root query fields listed in the response cache
+    settings.
+    """
+    if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+        return False
+
+    fields = set(response_cache_settings()['FIELDS'])
+    return all(
+        isinstance(selection, FieldNode) and selection.name.value in fields
+        for selection in operation_ast.selection_set.selections
+    )
+
+def cache_key(request, document, operation_name, variables):
+    """
+    Builds the response cache key from the normalized document, operation name, variables,
+    the requesting user's role and the catalogue version.
+
+    Returns:
+        The key, or None when the role cannot be determined and the response must not be cached.
+    """
+    try:
+        role = _role(request)
+    except Exception:
+        return None
+
+    payload = json.dumps(
+        [print_ast(document), operation_name, variables or {}, role, catalogue_version()],
+        sort_keys=True,
+        default=str,
+    )
+    return 'graphql:response:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_response(key):
+    return shared_cache().get(key)
+
+def store_response(key, data):
+    shared_cache().set(key, data, response_cache_settings()['TIMEOUT'])
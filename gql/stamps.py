@@ -0,0 +1,79 @@
+import time
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import VersionStamp
+
+def read_versions(keys):
+    """
+    Returns:
+        A dict of the current version of every key. Keys that were never bumped are at 0.
+    """
+    versions = dict(VersionStamp.objects.filter(pk__in=keys).values_list('key', 'version'))
+    return {key: versions.get(key, 0) for key in keys}
+
+def read_version(key):
+    """
+    Returns:
+        The current version of the key, 0 if it was never bumped.
+    """
+    return read_versions([key])[key]
+
+def bump_version(key):
+    """
+    Increments the version of the key. The increment is a single UPDATE that locks the row, and
+    the new version is read back in the same transaction, so concurrent bumps in any process
+    each get a distinct version and a process can tell whether it was the only change since
+    the version it last saw.
+
+    Returns:
+        The new version.
+    """
+    stamps = VersionStamp.objects.filter(pk=key)
+    with transaction.atomic():
+        if not stamps.update(version=F('version') + 1):
+            try:
+                with transaction.atomic():
+                    VersionStamp.objects.create(key=key, version=1)
+                return 1
+            except IntegrityError:
+                stamps.update(version=F('version') + 1)
+        return stamps.values_list('version', flat=True).get()
+
+class Stamp:
+    """
+    The version stamp of one key, as seen by this process. With a max_age, the version read is
+    reused for that many seconds, so changes made by other processes are seen up to max_age
+    late in exchange for not reading the database on every lookup. Bumps made here are seen
+    at once.
+    """
+    def __init__(self, key, max_age=0):
+        self.key = key
+        self.max_age = max_age
+        self._seen = None
+
+    def current(self):
+        """
+        Returns:
+            The current version of the key.
+        """
+        seen, now = self._seen, time.monotonic()
+        if seen is not None and now - seen[1] < self.max_age:
+            return seen[0]
+        version = read_version(self.key)
+        self._seen = (version, now)
+        return version
+
+    def bump(self):
+        """
+        Returns:
+            The new version, see bump_version.
+        """
+        version = bump_version(self.key)
+        self._seen = (version, time.monotonic())
+        return version
+
+    def forget(self):
+        """
+        Makes the next lookup read the version from the database.
+        """
+        self._seen = None
@@ -0,0 +1,414 @@
+import hashlib
+import json
+import os
+import tempfile
+from unittest import mock
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql import parse
+from gql.cost import QueryCostAnalysis
+from gql.documents import DocumentCache
+from gql.models import PersistedQuery
+from gql.persisted_queries import PersistedQueryStore
+from gql.response_cache import VERSION_KEY, check_shared_cache, invalidate_catalogue
+from gql.schema import schema
+from gql.stamps import Stamp, bump_version, read_version, read_versions
+from products.models import Product
+from common.utils import execute_mutation
+from gql.views import document_cache, persisted_queries
+
+class VersionStampTests(GraphQLTestCase):
+    def test_bump_version(self):
+        self.assertEqual(read_versions(['a', 'b']), {'a': 0, 'b': 0})
+        self.assertEqual([bump_version('a') for _ in range(3)], [1, 2, 3])
+        self.assertEqual(read_versions(['a', 'b']), {'a': 3, 'b': 0})
+
+    def test_stamp_max_age(self):
+        stamp = Stamp('a', max_age=60)
+        self.assertEqual(stamp.current(), 0)
+
+        bump_version('a')
+        self.assertEqual(stamp.current(), 0)
+        self.assertEqual(stamp.bump(), 2)
+        self.assertEqual(stamp.current(), 2)
+
+        bump_version('a')
+        stamp.forget()
+        self.assertEqual(stamp.current(), 3)
+
+class DocumentCacheTests(SimpleTestCase):
+    def test_document_cache_hit(self):
+        cache = DocumentCache(max_size=2)
+
+        first = cache.get(schema.graphql_schema, '{ allProducts { totalCount } }')
+        second = cache.get(schema.graphql_schema, '{ allProducts { totalCount } }')
+
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_document_cache_evicts_least_recently_used(self):
+        cache = DocumentCache(max_size=2)
+
+        cache.get(schema.graphql_schema, '{ allProducts { totalCount } }')
+        cache.get(schema.graphql_schema, '{ allReviews { totalCount } }')
+        cache.get(schema.graphql_schema, '{ allProducts { totalCount } }')
+        cache.get(schema.graphql_schema, '{ allUsers { totalCount } }')
+        cache.get(schema.graphql_schema, '{ allProducts { totalCount } }')
+        cache.get(schema.graphql_schema, '{ allReviews { totalCount } }')
+
+        self.assertEqual(cache.stats()['size'], 2)
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_document_cache_keeps_validation_errors(self):
+        cache = DocumentCache()
+
+        document, errors = cache.get(schema.graphql_schema, '{ allProducts { missingField } }')
+
+        self.assertIsNotNone(document)
+        self.assertEqual(len(errors), 1)
+
+class GraphQLViewTests(GraphQLTestCase):
+    def setUp(self):
+        document_cache.clear()
+
+    def test_repeated_query_uses_document_cache(self):
+        query = '''
+        query {
+            allProducts {
+                totalCount
+            }
+        }
+        '''
+
+        self.assertResponseNoErrors(self.query(query))
+        self.assertResponseNoErrors(self.query(query))
+
+        self.assertEqual(document_cache.stats()['misses'], 1)
+        self.assertEqual(document_cache.stats()['hits'], 1)
+
+    def test_invalid_query_returns_validation_errors(self):
+        query = '''
+        query {
+            allProducts {
+                missingField
+            }
+        }
+        '''
+
+        self.assertResponseHasErrors(self.query(query))
+        response = self.query(query)
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("Cannot query field", str(response.content))
+        self.assertEqual(document_cache.stats()['hits'], 1)
+
+    def test_token_verified_once_per_request(self):
+        group, _ = Group.objects.get_or_create(name='user')
+        user = User.objects.create_user(username='testuser', email='test@test.com', password='password')
+        user.groups.add(group)
+        mutation = '''
+        mutation tokenAuth($username: String!, $password: String!) {
+            tokenAuth(username: $username, password: $password) {
+                token
+            }
+        }
+        '''
+        response = self.query(mutation, variables={'username': 'testuser', 'password': 'password'}, operation_name='tokenAuth')
+        token = response.json()['data']['tokenAuth']['token']
+        query = '''
+        query {
+            allOrders {
+                totalCount
+            }
+            allProducts {
+                totalCount
+            }
+        }
+        '''
+
+        with mock.patch('gql.views.authenticate', wraps=authenticate) as authenticate_mock:
+            response = self.query(query, headers={'Authorization': f'JWT {token}'})
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(authenticate_mock.call_count, 1)
+
+    def test_invalid_token_rejected(self):
+        query = '''
+        query {
+            allProducts {
+                totalCount
+            }
+        }
+        '''
+
+        response = self.query(query, headers={'Authorization': 'JWT badtoken.badtoken'})
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("Error decoding signature", str(response.content))
+
+class PersistedQueryTests(GraphQLTestCase):
+    query_text = 'query { allProducts { totalCount } }'
+
+    def setUp(self):
+        persisted_queries.clear()
+        self.sha256_hash = hashlib.sha256(self.query_text.encode('utf-8')).hexdigest()
+
+    def persisted_query(self, query=None, sha256_hash=None):
+        body = {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': sha256_hash or self.sha256_hash}}}
+        if query is not None:
+            body['query'] = query
+        return self.client.post(self.GRAPHQL_URL, json.dumps(body), content_type='application/json')
+
+    def test_unknown_hash_not_found(self):
+        response = self.persisted_query()
+
+        self.assertResponseHasErrors(response)
+        self.assertEqual(response.json()['errors'][0]['message'], 'PersistedQueryNotFound')
+
+    def test_register_then_execute_by_hash(self):
+        response = self.persisted_query(self.query_text)
+
+        self.assertResponseNoErrors(response)
+        self.assertTrue(PersistedQuery.objects.filter(sha256_hash=self.sha256_hash).exists())
+
+        response = self.persisted_query()
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['allProducts']['totalCount'], 0)
+
+    def test_execute_by_hash_from_database(self):
+        PersistedQuery.objects.create(sha256_hash=self.sha256_hash, query=self.query_text)
+
+        response = self.persisted_query()
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['allProducts']['totalCount'], 0)
+
+    def test_execute_by_hash_with_get(self):
+        self.persisted_query(self.query_text)
+        extensions = json.dumps({'persistedQuery': {'version': 1, 'sha256Hash': self.sha256_hash}})
+
+        response = self.client.get(self.GRAPHQL_URL, {'extensions': extensions}, HTTP_ACCEPT='application/json')
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['allProducts']['totalCount'], 0)
+
+    def test_register_hash_mismatch(self):
+        response = self.persisted_query(self.query_text, sha256_hash='0' * 64)
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("provided sha does not match query", str(response.content))
+        self.assertFalse(PersistedQuery.objects.exists())
+
+    def test_invalid_query_not_registered(self):
+        query = 'query { missingField }'
+
+        response = self.persisted_query(query, hashlib.sha256(query.encode('utf-8')).hexdigest())
+
+        self.assertResponseHasErrors(response)
+        self.assertFalse(PersistedQuery.objects.exists())
+
+    def test_register_limits_length_and_rows(self):
+        store = PersistedQueryStore(max_rows=2, max_length=40)
+
+        for query in ['{ a }', '{ b }', '{ c }', '{ ' + 'd' * 40 + ' }']:
+            store.register(hashlib.sha256(query.encode('utf-8')).hexdigest(), query)
+
+        self.assertEqual(list(PersistedQuery.objects.order_by('id').values_list('query', flat=True)), ['{ b }', '{ c }'])
+
+class QueryCostTests(GraphQLTestCase):
+    def analyze(self, query, variables=None):
+        return QueryCostAnalysis(schema.graphql_schema, parse(query), variables=variables).analyze()
+
+    def test_cost_uses_page_size_and_list_size(self):
+        analysis = self.analyze('{ allProducts(first: 10) { edges { node { name tags { name } } } } }')
+
+        self.assertEqual(analysis.cost, 31)
+        self.assertEqual(analysis.depth, 5)
+
+    def test_nested_fragment_spreads_are_costed_once(self):
+        fragments = ['fragment F0 on Query { allProducts(first: 1) { totalCount } }']
+        fragments += [f'fragment F{n} on Query {{ ...F{n - 1} ...F{n - 1} }}' for n in range(1, 40)]
+
+        analysis = self.analyze('{ ...F39 } ' + ' '.join(fragments))
+
+        self.assertEqual(analysis.cost, 2 ** 39)
+        self.assertEqual(analysis.depth, 2)
+        self.assertEqual(len(analysis.fragment_costs), 40)
+
+    def test_cost_reads_page_size_from_variables(self):
+        query = 'query products($first: Int) { allProducts(first: $first) { edges { node { name tags { name } } } } }'
+
+        self.assertEqual(self.analyze(query, {'first': 20}).cost, 61)
+
+    def test_cost_counts_aliases(self):
+        single = self.analyze('{ allProducts(first: 10) { edges { node { name } } } }')
+        aliased = self.analyze('{ a: allProducts(first: 10) { edges { node { name } } } b: allProducts(first: 10) { edges { node { name } } } }')
+
+        self.assertEqual(aliased.cost, 2 * single.cost)
+
+    def test_cost_reported_in_extensions(self):
+        response = self.query('''
+        query {
+            allProducts(first: 10) {
+                edges {
+                    node {
+                        name
+                    }
+                }
+            }
+        }
+        ''')
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['extensions']['cost']['requested'], 21)
+
+    def test_expensive_query_rejected(self):
+        response = self.query('''
+        query {
+            allProducts {
+                edges {
+                    node {
+                        orderItems {
+                            order {
+                                items {
+                                    product {
+                                        name
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        ''')
+
+        self.assertResponseHasErrors(response)
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'QUERY_TOO_EXPENSIVE')
+        self.assertGreater(response.json()['extensions']['cost']['requested'], response.json()['extensions']['cost']['maximum'])
+
+    @override_settings(GRAPHQL_QUERY_COST={'MAX_DEPTH': 3})
+    def test_deep_query_rejected(self):
+        response = self.query('''
+        query {
+            allProducts(first: 1) {
+                edges {
+                    node {
+                        tags {
+                            name
+                        }
+                    }
+                }
+            }
+        }
+        ''')
+
+        self.assertResponseHasErrors(response)
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'QUERY_TOO_DEEP')
+
+class ResponseCacheTests(GraphQLTestCase):
+    query_text = '''
+    query {
+        allProducts {
+            edges {
+                node {
+                    name
+                }
+            }
+        }
+    }
+    '''
+
+    def setUp(self):
+        cache.clear()
+        self.admin_group, _ = Group.objects.get_or_create(name='admin')
+        self.admin_user = User.objects.create_user(username='adminuser', email='admin@admin.com', password='password')
+        self.admin_user.groups.add(self.admin_group)
+        self.product = Product.objects.create(name='Journal', description='A great journal for your brain', cost=5.25, supply=10)
+
+    def test_public_query_served_from_cache(self):
+        response = self.query(self.query_text)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['extensions']['responseCache'], 'MISS')
+
+        response = self.query(self.query_text)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['extensions']['responseCache'], 'HIT')
+        self.assertEqual(response.json()['data']['allProducts']['edges'][0]['node']['name'], 'Journal')
+
+    def test_cache_keyed_by_role(self):
+        self.query(self.query_text)
+        self.client.force_login(self.admin_user)
+
+        response = self.query(self.query_text)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['extensions']['responseCache'], 'MISS')
+
+    def test_mutation_invalidates_cache(self):
+        self.query(self.query_text)
+        self.client.force_login(self.admin_user)
+        execute_mutation(self, 'updateProduct', {
+            'id': {'type': 'ID!', 'value': self.product.id},
+            'name': {'type': 'String', 'value': 'Notebook'},
+        })
+        self.client.logout()
+
+        response = self.query(self.query_text)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['extensions']['responseCache'], 'MISS')
+        self.assertEqual(response.json()['data']['allProducts']['edges'][0]['node']['name'], 'Notebook')
+
+    def test_private_query_not_cached(self):
+        self.client.force_login(self.admin_user)
+        query = '''
+        query {
+            allTags {
+                totalCount
+            }
+        }
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertNotIn('responseCache', response.json()['extensions'])
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.path.join(tempfile.gettempdir(), 'ecommerce_api_test_cache')},
+    })
+    def test_file_backend(self):
+        caches['shared'].clear()
+
+        self.assertEqual(self.query(self.query_text).json()['extensions']['responseCache'], 'MISS')
+        self.assertEqual(self.query(self.query_text).json()['extensions']['responseCache'], 'HIT')
+
+        caches['shared'].clear()
+
+    def test_invalidate_catalogue_bumps_version(self):
+        self.query(self.query_text)
+        version = read_version(VERSION_KEY)
+
+        invalidate_catalogue()
+
+        self.assertEqual(read_version(VERSION_KEY), version + 1)
+        self.assertEqual(self.query(self.query_text).json()['extensions']['responseCache'], 'MISS')
+
+    def test_check_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['gql.E001'])
+
+        with override_settings(GRAPHQL_RESPONSE_CACHE={'CACHE_ALIAS': 'default'}):
+            messages = check_shared_cache(None)
+            self.assertEqual([message.id for message in messages], ['gql.W002'])
+            self.assertFalse(messages[0].is_serious())
\ No newline at end of file
@@ -0,0 +1,214 @@
+import json
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import connection, transaction
+from django.http import HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView as BaseGraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate_schema
+from graphql.language import FieldNode
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.settings import jwt_settings
+from graphql_jwt.utils import get_http_authorization
+from . import response_cache
+from .cost import QueryCostAnalysis
+from .documents import DocumentCache
+from .persisted_queries import PersistedQueryStore
+
+document_cache = DocumentCache(getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 256))
+persisted_queries = PersistedQueryStore(
+    getattr(settings, 'GRAPHQL_PERSISTED_QUERY_CACHE_SIZE', 1024),
+    getattr(settings, 'GRAPHQL_PERSISTED_QUERY_MAX_ROWS', 10000),
+    getattr(settings, 'GRAPHQL_PERSISTED_QUERY_MAX_LENGTH', 20000),
+)
+
+class GraphQLView(BaseGraphQLView):
+    """
+    GraphQL endpoint that reuses parsed and validated documents from the shared document cache
+    instead of parsing and validating every request, supports automatic persisted queries so
+    clients can send a query hash in place of the query text, and rejects operations whose
+    static cost exceeds the budget before any resolver runs. The computed cost is returned in
+    the response extensions. Public catalogue queries are served from the response cache.
+    The JWT of a request is verified once before execution rather than by a middleware that
+    wraps every resolved field.
+    """
+    document_cache = document_cache
+    persisted_queries = persisted_queries
+
+    @staticmethod
+    def get_extensions(request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except Exception:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        return extensions
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = self.execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+            if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        try:
+            query, persisted_hash = self.persisted_queries.resolve(self.get_extensions(request, data), query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, validation_errors = self.document_cache.get(
+                schema, query, self.validation_rules, graphene_settings.MAX_VALIDATION_ERRORS
+            )
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if request.method.lower() == "get" and operation_ast is not None and operation_ast.operation != OperationType.QUERY:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseNotAllowed(["POST"], f"Can only perform a {operation_ast.operation.value} operation from a POST request."))
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        if persisted_hash is not None:
+            self.persisted_queries.register(persisted_hash, query)
+
+        analysis = QueryCostAnalysis(schema, document, operation_name, variables).analyze()
+        cost_errors = analysis.errors()
+        if cost_errors:
+            return ExecutionResult(data=None, errors=cost_errors, extensions=analysis.extensions())
+
+        try:
+            self.authenticate_request(request, schema, operation_ast)
+        except JSONWebTokenError as e:
+            return ExecutionResult(data=None, errors=[e])
+
+        key = None
+        if response_cache.is_cacheable(operation_ast):
+            key = response_cache.cache_key(request, document, operation_name, variables)
+
+        if key is not None:
+            data = response_cache.get_response(key)
+            if data is not None:
+                return ExecutionResult(data=data, extensions={**analysis.extensions(), 'responseCache': 'HIT'})
+
+        result = self.execute_document(request, schema, document, operation_ast, variables, operation_name)
+        result.extensions = {**(result.extensions or {}), **analysis.extensions()}
+
+        if key is not None and not result.errors:
+            response_cache.store_response(key, result.data)
+            result.extensions['responseCache'] = 'MISS'
+        return result
+
+    @staticmethod
+    def allow_any(schema, operation_ast):
+        """
+        Returns whether every root field of an operation is one of the JWT_ALLOW_ANY_CLASSES,
+        such as tokenAuth, which must keep working when the request carries an expired token.
+        """
+        if operation_ast is None or not jwt_settings.JWT_ALLOW_ANY_CLASSES:
+            return False
+
+        root_type = schema.get_root_type(operation_ast.operation)
+        for selection in operation_ast.selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                return False
+            field = root_type.fields.get(selection.name.value)
+            graphene_type = getattr(getattr(field, 'type', None), 'graphene_type', None)
+            if graphene_type is None or not issubclass(graphene_type, tuple(jwt_settings.JWT_ALLOW_ANY_CLASSES)):
+                return False
+        return True
+
+    def authenticate_request(self, request, schema, operation_ast):
+        """
+        Verifies the token of an anonymous request carrying an Authorization header and
+        attaches the user to the request, which is the context of every resolver.
+        """
+        user = getattr(request, 'user', None)
+        if (user is not None and not user.is_anonymous) or get_http_authorization(request) is None:
+            return
+
+        try:
+            user = authenticate(request=request)
+        except JSONWebTokenError:
+            if self.allow_any(schema, operation_ast):
+                return
+            raise
+
+        if user is not None:
+            request.user = user
+
+    def execute_document(self, request, schema, document, operation_ast, variables, operation_name):
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (graphene_settings.ATOMIC_MUTATIONS is True or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True)
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models import F
+from products.models import Product
+from .models import Order, OrderItem
+
+def adjust_supply(changes):
+    """
+    Takes positive quantity changes out of the products' supply and returns negative ones to
+    it. Must be called in a transaction. Supply is updated with a conditional UPDATE per
+    product, in product ID order so that concurrent writers lock rows in the same order and
+    cannot deadlock. A product whose supply is too low matches no row and is left unchanged.
+
+    Returns:
+        A dict of the available supply of the products that were too short, which is empty if
+        every change was applied. The caller rolls back the transaction if it is not empty.
+    """
+    short = []
+    for product_id in sorted(changes):
+        quantity = changes[product_id]
+        if quantity > 0:
+            if not Product.objects.filter(pk=product_id, supply__gte=quantity).update(supply=F('supply') - quantity):
+                short.append(product_id)
+        elif quantity < 0:
+            Product.objects.filter(pk=product_id).update(supply=F('supply') - quantity)
+
+    if not short:
+        return {}
+    available = dict(Product.objects.filter(pk__in=short).values_list('id', 'supply'))
+    return {product_id: available.get(product_id, 0) for product_id in short}
+
+def insufficient_stock(product_id, available):
+    return f"Insufficient stock for product {product_id}: {available} available."
+
+def place_order(user, lines, products):
+    """
+    Creates an order and takes its quantities out of the products' supply with adjust_supply in
+    one transaction. If any product's supply is too low the whole order is rolled back.
+
+    Returns:
+        A tuple of (the order, or None if it was rejected, and the (line index, message) pairs
+        of the lines that could not be supplied).
+    """
+    quantities = {}
+    for product_id, quantity in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    with transaction.atomic():
+        short = adjust_supply(quantities)
+        if short:
+            transaction.set_rollback(True)
+            return None, [
+                (index, insufficient_stock(product_id, short[product_id]))
+                for index, (product_id, quantity) in enumerate(lines) if product_id in short
+            ]
+
+        order = Order.objects.create(user=user, total_cost=sum(products[product_id].cost * quantity for product_id, quantity in lines))
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[product_id], quantity=quantity, cost=products[product_id].cost)
+            for product_id, quantity in lines
+        ])
+
+    return order, []
@@ -0,0 +1,87 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from graphql import get_named_type
+from gql.types import OperationResult
+from .models import IdempotencyKey, OrderTicket
+from .types import OrderItemErrorType
+
+MAX_KEY_LENGTH = 255
+
+def idempotency_key_ttl():
+    """
+    Returns how long the result of a request with an idempotency key is kept.
+    """
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+def request_hash(arguments):
+    """
+    Returns a hash of a mutation's arguments, stored with the key so that reusing a key for a
+    different request is rejected instead of returning the first request's result.
+    """
+    return hashlib.sha256(json.dumps(arguments, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _serialize(payload):
+    result = {'success': payload.operation_result.success, 'message': payload.operation_result.message}
+    if getattr(payload, 'errors', None) is not None:
+        result['errors'] = [[error.index, error.message] for error in payload.errors]
+    if getattr(payload, 'ticket', None) is not None:
+        result['ticket'] = payload.ticket.pk
+    return result
+
+def _deserialize(mutation, result):
+    fields = {'operation_result': OperationResult(success=result['success'], message=result['message'])}
+    if 'errors' in result:
+        fields['errors'] = [OrderItemErrorType(index=index, message=message) for index, message in result['errors']]
+    if 'ticket' in result:
+        fields['ticket'] = OrderTicket.objects.filter(pk=result['ticket']).first()
+    return mutation(**fields)
+
+def idempotent(mutate):
+    """
+    Adds idempotency key handling to an order mutation's mutate method. The first request with
+    a key claims it by inserting an IdempotencyKey row in the transaction that runs the mutation,
+    and stores the result and a hash of the arguments there. A retry with the same arguments
+    returns the stored result without running the mutation, and a retry with different ones is
+    rejected. A concurrent duplicate's insert waits on the first request's uncommitted unique
+    index entry, on InnoDB and PostgreSQL, and fails on the unique constraint once that commits.
+    It then returns the committed result. No lock is taken explicitly.
+    """
+    @wraps(mutate)
+    def wrapper(root, info, idempotency_key=None, **kwargs):
+        if idempotency_key is None:
+            return mutate(root, info, **kwargs)
+
+        mutation = get_named_type(info.return_type).graphene_type
+        if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+            return mutation(operation_result=OperationResult(success=False, message=f"The idempotency key must be between 1 and {MAX_KEY_LENGTH} characters."))
+
+        digest = request_hash(kwargs)
+        mismatch = mutation(operation_result=OperationResult(success=False, message="This idempotency key was already used with different arguments."))
+        keys = IdempotencyKey.objects.filter(user_id=info.context.user.pk, operation=info.field_name, key=idempotency_key)
+        stored = keys.first()
+        if stored is not None:
+            if stored.created_at >= timezone.now() - idempotency_key_ttl():
+                return _deserialize(mutation, stored.result) if stored.request_hash == digest else mismatch
+            stored.delete()
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    claim = IdempotencyKey.objects.create(user_id=info.context.user.pk, operation=info.field_name, key=idempotency_key, request_hash=digest, result={})
+            except IntegrityError:
+                stored = keys.first()
+                if stored is None or not stored.result:
+                    return mutation(operation_result=OperationResult(success=False, message="A request with this idempotency key is already in progress."))
+                return _deserialize(mutation, stored.result) if stored.request_hash == digest else mismatch
+
+            payload = mutate(root, info, **kwargs)
+            IdempotencyKey.objects.filter(pk=claim.pk).update(result=_serialize(payload))
+
+        return payload
+
+    return wrapper
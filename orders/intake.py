@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from gql.response_cache import invalidate_catalogue
+from products.models import Product
+from .models import Order, OrderItem, OrderTicket
+
+DEFAULTS = {
+    'ENABLED': False,
+    'PARTITIONS': 4,
+    'BATCH_SIZE': 100,
+}
+
+def intake_settings():
+    """
+    Returns the ORDER_INTAKE settings merged over the defaults.
+    """
+    return {**DEFAULTS, **getattr(settings, 'ORDER_INTAKE', {})}
+
+def partition_for(product_ids):
+    """
+    Returns the worker partition of an order. Orders are partitioned by their lowest product ID,
+    so every order for a single hot product is processed by the same worker.
+    """
+    return min(product_ids) % intake_settings()['PARTITIONS']
+
+def enqueue_order(user, lines):
+    """
+    Stores an order request for the intake workers instead of writing the order.
+
+    Returns:
+        The pending OrderTicket.
+    """
+    return OrderTicket.objects.create(
+        user=user,
+        items=[[product_id, quantity] for product_id, quantity in lines],
+        partition=partition_for([product_id for product_id, _ in lines]),
+    )
+
+def process_batch(partition=None, batch_size=None):
+    """
+    Processes the oldest pending tickets of a partition, or of every partition, in one
+    transaction. Tickets are checked in order against the supply read once per product, so each
+    product's supply is decremented with one UPDATE for the whole batch instead of once per
+    order. Tickets that cannot be supplied are rejected with an error per line.
+
+    Returns:
+        The number of tickets processed.
+    """
+    batch_size = batch_size or intake_settings()['BATCH_SIZE']
+
+    with transaction.atomic():
+        tickets = OrderTicket.objects.select_for_update().filter(status=OrderTicket.PENDING)
+        if partition is not None:
+            tickets = tickets.filter(partition=partition)
+        tickets = list(tickets.order_by('id')[:batch_size])
+        if not tickets:
+            return 0
+
+        product_ids = sorted({product_id for ticket in tickets for product_id, _ in ticket.items})
+        products = {product.pk: product for product in Product.objects.select_for_update().filter(pk__in=product_ids).order_by('id')}
+        supply = {product_id: product.supply for product_id, product in products.items()}
+        now = timezone.now()
+
+        accepted = []
+        for ticket in tickets:
+            quantities = {}
+            for product_id, quantity in ticket.items:
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+            short = {product_id for product_id, quantity in quantities.items() if supply.get(product_id, 0) < quantity}
+            ticket.processed_at = now
+            if short:
+                ticket.status = OrderTicket.REJECTED
+                ticket.errors = [
+                    [index, f"Insufficient stock for product {product_id}: {supply.get(product_id, 0)} available."]
+                    for index, (product_id, _) in enumerate(ticket.items) if product_id in short
+                ]
+                continue
+
+            for product_id, quantity in quantities.items():
+                supply[product_id] -= quantity
+            ticket.status = OrderTicket.ACCEPTED
+            accepted.append(ticket)
+
+        for product_id, product in products.items():
+            if supply[product_id] != product.supply:
+                Product.objects.filter(pk=product_id).update(supply=F('supply') - (product.supply - supply[product_id]))
+
+        items = []
+        for ticket in accepted:
+            ticket.order = Order.objects.create(
+                user_id=ticket.user_id,
+                total_cost=sum(products[product_id].cost * quantity for product_id, quantity in ticket.items),
+            )
+            items.extend(
+                OrderItem(order=ticket.order, product=products[product_id], quantity=quantity, cost=products[product_id].cost)
+                for product_id, quantity in ticket.items
+            )
+        OrderItem.objects.bulk_create(items)
+        OrderTicket.objects.bulk_update(tickets, ['status', 'order', 'errors', 'processed_at'])
+
+        if accepted:
+            transaction.on_commit(invalidate_catalogue)
+
+    return len(tickets)
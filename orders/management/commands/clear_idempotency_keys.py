@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from orders.idempotency import idempotency_key_ttl
+from orders.models import IdempotencyKey
+
+class Command(BaseCommand):
+    help = "Deletes the idempotency keys of order mutations that are older than IDEMPOTENCY_KEY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="The number of keys deleted per statement.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - idempotency_key_ttl()
+        deleted = 0
+        while True:
+            ids = list(IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from orders.intake import intake_settings, process_batch
+
+class Command(BaseCommand):
+    help = (
+        "Processes order tickets queued in intake mode. Run one worker per partition so the orders "
+        "for each product are processed sequentially, or one worker without --partition for all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partition', type=int, help="The partition to process. Defaults to every partition.")
+        parser.add_argument('--batch-size', type=int, help="The number of tickets processed per transaction.")
+        parser.add_argument('--interval', type=float, default=0.2, help="The seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty instead of waiting for tickets.")
+
+    def handle(self, *args, **options):
+        partition = options['partition']
+        if partition is not None and not 0 <= partition < intake_settings()['PARTITIONS']:
+            raise CommandError(f"--partition must be between 0 and {intake_settings()['PARTITIONS'] - 1}.")
+
+        processed = 0
+        try:
+            while True:
+                count = process_batch(partition, options['batch_size'])
+                processed += count
+                if not count:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} order tickets."))
@@ -8,6 +8,13 @@ class Order(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='order_created_at_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_at_idx'),
+            models.Index(fields=['total_cost'], name='order_total_cost_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
@@ -21,3 +28,53 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.quantity} of {self.product.name} in Order {self.order.id}"
+
+class OrderTicket(models.Model):
+    """
+    An order request accepted in intake mode and waiting for an intake worker. The items are
+    stored as [product id, quantity] pairs and the partition decides which worker processes it.
+    """
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+    STATUSES = [(PENDING, 'Pending'), (ACCEPTED, 'Accepted'), (REJECTED, 'Rejected')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='order_tickets')
+    items = models.JSONField()
+    partition = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    order = models.OneToOneField(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='ticket')
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'partition', 'id'], name='order_ticket_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order ticket {self.id} by {self.user.username}"
+
+class IdempotencyKey(models.Model):
+    """
+    The stored result of an order mutation sent with an idempotency key, so a retried request
+    returns the original result instead of repeating the write.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    operation = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64, default='')
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'operation', 'key'], name='idempotency_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_key_created_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.operation} {self.key} by user {self.user_id}"
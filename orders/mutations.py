@@ -1,23 +1,43 @@
 import graphene
+from django.db import transaction
 from gql.types import OperationResult
+from .checkout import adjust_supply, insufficient_stock, place_order
+from .idempotency import MAX_KEY_LENGTH, idempotent
+from .intake import enqueue_order, intake_settings
 from .models import Order, OrderItem
-from .types import CreateOrderInput
+from .totals import update_order_total
+from .types import CreateOrderInput, OrderItemChangeInput, OrderItemErrorType, OrderTicketType
 from products.models import Product
 from graphql_jwt.decorators import login_required
+from common.roles import is_admin
+from gql.response_cache import invalidate_catalogue
+from django.utils import timezone
+
+MAX_ORDER_ITEM_CHANGES = 1000
 
 class CreateOrder(graphene.Mutation):
     """
     Creates a order based on the provided inputs. Validates input to ensure any provided cost or
-    supply values are positive if provided.
+    supply values are positive if provided. The ordered quantities are taken out of the
+    products' supply, and the order is rejected if any line exceeds the remaining supply.
+    When ORDER_INTAKE is enabled the order is queued for the intake workers instead and a
+    ticket is returned for the client to poll.
     """
     class Arguments:
         order_items = graphene.List(CreateOrderInput, required=True, description="The items in the order with quantities, required.")
+        idempotency_key = graphene.String(description=f"A key unique to this request, at most {MAX_KEY_LENGTH} characters. Retrying with the same key returns the first result.")
 
     operation_result = graphene.Field(OperationResult)
+    errors = graphene.List(graphene.NonNull(OrderItemErrorType), description="The order items that could not be supplied.")
+    ticket = graphene.Field(OrderTicketType, description="The ticket of the queued order when intake mode is enabled.")
 
     @login_required
     @staticmethod
+    @idempotent
     def mutate(root, info, order_items):
+        if not order_items:
+            return CreateOrder(operation_result=OperationResult(success=False, message="An order must have at least one item."))
+
         product_ids = [int(item.product_id) for item in order_items]
         products = Product.objects.in_bulk(product_ids)
 
@@ -27,109 +47,254 @@ class CreateOrder(graphene.Mutation):
         if any(item.quantity < 1 for item in order_items):
             return CreateOrder(operation_result=OperationResult(success=False, message="One or more quantities are less than 1."))
 
-        order = Order(total_cost=sum(products[int(item.product_id)].cost * item.quantity for item in order_items), user=info.context.user)
-        order.save()
+        lines = [(int(item.product_id), item.quantity) for item in order_items]
+        if intake_settings()['ENABLED']:
+            ticket = enqueue_order(info.context.user, lines)
+            return CreateOrder(operation_result=OperationResult(success=True, message="Order queued successfully."), ticket=ticket)
 
-        OrderItem.objects.bulk_create([
-            OrderItem(
-                order=order,
-                product=products[int(item.product_id)],
-                quantity=item.quantity,
-                cost=products[int(item.product_id)].cost
-            ) for item in order_items
-        ])
+        order, errors = place_order(info.context.user, lines, products)
+        if order is None:
+            return CreateOrder(
+                operation_result=OperationResult(success=False, message="One or more products do not have enough supply."),
+                errors=[OrderItemErrorType(index=index, message=message) for index, message in errors],
+            )
+        # Inside an idempotent request's transaction, the catalogue must not be invalidated
+        # before the supply decrement commits.
+        transaction.on_commit(invalidate_catalogue)
 
         return CreateOrder(operation_result=OperationResult(success=True, message="Order created successfully."))
 
 class UpdateOrderItem(graphene.Mutation):
     """
     Updates an existing order item's details based on the provided inputs.
-    The price will be set to the product's current price.
+    The price will be set to the product's current price. The change in quantity is taken out
+    of or returned to the product's supply and the order total is recomputed in the database,
+    all in the same transaction.
     """
     class Arguments:
         id = graphene.ID(required=True, description="The ID of the order item to update, required.")
         quantity = graphene.Int(required=True, description="The quantity of the order item, required.")
+        idempotency_key = graphene.String(description=f"A key unique to this request, at most {MAX_KEY_LENGTH} characters. Retrying with the same key returns the first result.")
 
     operation_result = graphene.Field(OperationResult)
 
     @login_required
     @staticmethod
+    @idempotent
     def mutate(root, info, id, quantity):
         if quantity < 1:
             return UpdateOrderItem(operation_result=OperationResult(success=False, message="One or more quantities are less than 1."))
 
         try:
-            order_item = OrderItem.objects.get(pk=id)
+            order_item = OrderItem.objects.select_related('order', 'product').only('id', 'order', 'order__user_id', 'product', 'product__cost').get(pk=id)
         except OrderItem.DoesNotExist:
             return UpdateOrderItem(operation_result=OperationResult(success=False, message="Order item not found."))
         
-        if order_item.order.user != info.context.user and not info.context.user.groups.filter(name='admin').exists():
+        if order_item.order.user_id != info.context.user.pk and not is_admin(info.context.user):
             return UpdateOrderItem(operation_result=OperationResult(success=False, message="You can only edit your own orders."))
 
-        order_item.quantity = quantity
-        order_item.cost = order_item.product.cost
-        order_item.save()
+        with transaction.atomic():
+            previous = OrderItem.objects.select_for_update().filter(pk=order_item.pk).values_list('quantity', flat=True).first()
+            if previous is None:
+                return UpdateOrderItem(operation_result=OperationResult(success=False, message="Order item not found."))
+
+            short = adjust_supply({order_item.product_id: quantity - previous})
+            if short:
+                transaction.set_rollback(True)
+                return UpdateOrderItem(operation_result=OperationResult(success=False, message=insufficient_stock(order_item.product_id, short[order_item.product_id])))
 
-        order = order_item.order
-        order.total_cost = sum(order_item.cost * order_item.quantity for order_item in order.items.all())
-        order.save()
+            order_item.quantity = quantity
+            order_item.cost = order_item.product.cost
+            order_item.save(update_fields=['quantity', 'cost', 'updated_at'])
+            update_order_total(order_item.order_id)
+            transaction.on_commit(invalidate_catalogue)
         
         return UpdateOrderItem(operation_result=OperationResult(success=True, message="Order item updated successfully."))
 
+def _as_id(value):
+    """
+    Converts an optional ID argument to an int. Malformed IDs become 0, which matches no row.
+    """
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+class UpdateOrderItems(graphene.Mutation):
+    """
+    Applies many quantity changes, removals and additions to an order at once. Changed and added
+    items are priced at their product's current cost, read with a single product fetch. The
+    changes are written with bulk updates, deletes and inserts, the net change in quantity of
+    each product is taken out of or returned to its supply, and the order total is recomputed
+    once, all in one transaction. If any change is invalid or cannot be supplied nothing is
+    written.
+    """
+    class Arguments:
+        order_id = graphene.ID(required=True, description="The ID of the order to edit, required.")
+        changes = graphene.List(graphene.NonNull(OrderItemChangeInput), required=True, description=f"The changes to apply, at most {MAX_ORDER_ITEM_CHANGES}.")
+        idempotency_key = graphene.String(description=f"A key unique to this request, at most {MAX_KEY_LENGTH} characters. Retrying with the same key returns the first result.")
+
+    operation_result = graphene.Field(OperationResult)
+    errors = graphene.List(graphene.NonNull(OrderItemErrorType), description="The changes that are invalid or cannot be supplied.")
+
+    @login_required
+    @staticmethod
+    @idempotent
+    def mutate(root, info, order_id, changes):
+        if len(changes) > MAX_ORDER_ITEM_CHANGES:
+            return UpdateOrderItems(operation_result=OperationResult(success=False, message=f"At most {MAX_ORDER_ITEM_CHANGES} changes can be applied at once."))
+
+        order = Order.objects.only('id', 'user_id').filter(pk=order_id).first()
+        if order is None:
+            return UpdateOrderItems(operation_result=OperationResult(success=False, message="Order not found."))
+
+        if order.user_id != info.context.user.pk and not is_admin(info.context.user):
+            return UpdateOrderItems(operation_result=OperationResult(success=False, message="You can only edit your own orders."))
+
+        changes = [(change, _as_id(change.id), _as_id(change.product_id)) for change in changes]
+        # The items are locked so their previous quantities cannot change underneath.
+        with transaction.atomic():
+            items = OrderItem.objects.select_for_update().filter(order_id=order.pk, pk__in=[item_id for _, item_id, _ in changes if item_id is not None]).only('id', 'product_id', 'quantity').in_bulk()
+            products = Product.objects.only('id', 'cost').in_bulk(
+                {items[item_id].product_id for _, item_id, _ in changes if item_id in items}
+                | {product_id for _, item_id, product_id in changes if item_id is None and product_id is not None}
+            )
+
+            now = timezone.now()
+            errors, updated, removed, added = [], [], [], []
+            seen = set()
+            supply_changes, increases = {}, []
+            for index, (change, item_id, product_id) in enumerate(changes):
+                if (item_id is None) == (product_id is None):
+                    errors.append((index, "A change needs either an order item ID or a product ID."))
+                elif item_id is not None and item_id not in items:
+                    errors.append((index, "Order item not found."))
+                elif item_id in seen:
+                    errors.append((index, "An order item can only be changed once."))
+                elif change.remove:
+                    if item_id is None:
+                        errors.append((index, "Only existing order items can be removed."))
+                    else:
+                        seen.add(item_id)
+                        removed.append(item_id)
+                        product_id = items[item_id].product_id
+                        supply_changes[product_id] = supply_changes.get(product_id, 0) - items[item_id].quantity
+                elif change.quantity is None or change.quantity < 1:
+                    errors.append((index, "One or more quantities are less than 1."))
+                elif item_id is not None:
+                    seen.add(item_id)
+                    item = items[item_id]
+                    supply_changes[item.product_id] = supply_changes.get(item.product_id, 0) + change.quantity - item.quantity
+                    if change.quantity > item.quantity:
+                        increases.append((index, item.product_id))
+                    item.quantity = change.quantity
+                    item.cost = products[item.product_id].cost
+                    item.updated_at = now
+                    updated.append(item)
+                elif product_id not in products:
+                    errors.append((index, "Product not found."))
+                else:
+                    added.append(OrderItem(order_id=order.pk, product=products[product_id], quantity=change.quantity, cost=products[product_id].cost))
+                    supply_changes[product_id] = supply_changes.get(product_id, 0) + change.quantity
+                    increases.append((index, product_id))
+
+            if errors:
+                return UpdateOrderItems(
+                    operation_result=OperationResult(success=False, message="One or more changes are invalid."),
+                    errors=[OrderItemErrorType(index=index, message=message) for index, message in errors],
+                )
+
+            short = adjust_supply(supply_changes)
+            if short:
+                transaction.set_rollback(True)
+                return UpdateOrderItems(
+                    operation_result=OperationResult(success=False, message="One or more products do not have enough supply."),
+                    errors=[OrderItemErrorType(index=index, message=insufficient_stock(product_id, short[product_id])) for index, product_id in increases if product_id in short],
+                )
+
+            OrderItem.objects.bulk_update(updated, ['quantity', 'cost', 'updated_at'])
+            OrderItem.objects.filter(pk__in=removed).delete()
+            OrderItem.objects.bulk_create(added)
+            update_order_total(order.pk)
+            transaction.on_commit(invalidate_catalogue)
+
+        return UpdateOrderItems(operation_result=OperationResult(success=True, message="Order items updated successfully."))
+
 class DeleteOrder(graphene.Mutation):
     """
-    Deletes a order by its ID.
+    Deletes a order by its ID and returns its items' quantities to the products' supply in the
+    same transaction.
     """
     class Arguments:
         id = graphene.ID(required=True, description="The ID of the order to be deleted.")
+        idempotency_key = graphene.String(description=f"A key unique to this request, at most {MAX_KEY_LENGTH} characters. Retrying with the same key returns the first result.")
 
     operation_result = graphene.Field(OperationResult)
 
     @login_required
     @staticmethod
+    @idempotent
     def mutate(root, info, id):
         try:
             order = Order.objects.get(pk=id)
         except Order.DoesNotExist:
             return DeleteOrder(operation_result=OperationResult(success=False, message="Order not found."))
         
-        if order.user != info.context.user  and not info.context.user.groups.filter(name='admin').exists():
+        if order.user != info.context.user  and not is_admin(info.context.user):
             return DeleteOrder(operation_result=OperationResult(success=False, message="You can only delete your own orders."))
 
-        order.delete()
+        with transaction.atomic():
+            quantities = {}
+            for product_id, quantity in OrderItem.objects.select_for_update().filter(order_id=order.pk).values_list('product_id', 'quantity'):
+                quantities[product_id] = quantities.get(product_id, 0) - quantity
+            adjust_supply(quantities)
+            order.delete()
+            if quantities:
+                transaction.on_commit(invalidate_catalogue)
 
         return DeleteOrder(operation_result=OperationResult(success=True, message="Order deleted successfully."))
     
 class DeleteOrderItem(graphene.Mutation):
     """
-    Deletes a order item by its ID.
+    Deletes a order item by its ID, returns its quantity to the product's supply and recomputes
+    the order total in the database in the same transaction.
     """
     class Arguments:
         id = graphene.ID(required=True, description="The ID of the order item to be deleted.")
+        idempotency_key = graphene.String(description=f"A key unique to this request, at most {MAX_KEY_LENGTH} characters. Retrying with the same key returns the first result.")
 
     operation_result = graphene.Field(OperationResult)
 
     @login_required
     @staticmethod
+    @idempotent
     def mutate(root, info, id):
         try:
-            order_item = OrderItem.objects.get(pk=id)
+            order_item = OrderItem.objects.select_related('order').only('id', 'order', 'order__user_id').get(pk=id)
         except OrderItem.DoesNotExist:
             return DeleteOrderItem(operation_result=OperationResult(success=False, message="Order item not found."))
         
-        if order_item.order.user != info.context.user and not info.context.user.groups.filter(name='admin').exists():
+        if order_item.order.user_id != info.context.user.pk and not is_admin(info.context.user):
             return DeleteOrderItem(operation_result=OperationResult(success=False, message="You can only delete your own orders."))
 
-        order_item.delete()
+        with transaction.atomic():
+            item = OrderItem.objects.select_for_update().filter(pk=order_item.pk).values_list('product_id', 'quantity').first()
+            if item is None:
+                return DeleteOrderItem(operation_result=OperationResult(success=False, message="Order item not found."))
 
-        order = order_item.order
-        order.total_cost = sum(order_item.cost * order_item.quantity for order_item in order.items.all())
-        order.save()
+            product_id, quantity = item
+            OrderItem.objects.filter(pk=order_item.pk).delete()
+            adjust_supply({product_id: -quantity})
+            update_order_total(order_item.order_id)
+            transaction.on_commit(invalidate_catalogue)
 
         return DeleteOrderItem(operation_result=OperationResult(success=True, message="Order item deleted successfully."))
 
 class OrderMutations(graphene.ObjectType):
     create_order = CreateOrder.Field(description="Creates a new order with the specified details.")
     update_order_item = UpdateOrderItem.Field(description="Updates an existing order with new values.")
+    update_order_items = UpdateOrderItems.Field(description="Applies quantity changes, removals and additions to an order in one transaction.")
     delete_order = DeleteOrder.Field(description="Deletes the order identified by the given ID.")
     delete_order_item = DeleteOrderItem.Field(description="Deletes the order item identified by the given ID.")
\ No newline at end of file
@@ -4,15 +4,18 @@ from django.db.models.functions import TruncMonth
 from django.utils.timezone import now
 from dateutil.relativedelta import relativedelta
 from datetime import datetime, time
-from .types import OrderType, OrdersPerMonthType
-from .models import Order
+from .types import OrderType, OrderConnection, OrderTicketType, OrdersPerMonthType
+from .models import Order, OrderTicket
+from gql.pagination import connection_args, paginate
 from graphql_jwt.decorators import user_passes_test
 from graphql_jwt.decorators import login_required
 from django.utils import timezone
+from common.roles import is_admin
 
 class OrderQuery(graphene.ObjectType):
-    all_orders = graphene.List(
-        OrderType, 
+    all_orders = graphene.Field(
+        OrderConnection,
+        **connection_args(),
         description="Retrieve all orders."
     )
     order_by_id = graphene.Field(
@@ -20,8 +23,14 @@ class OrderQuery(graphene.ObjectType):
         id=graphene.Int(required=True, description="The ID of the order to retrieve."), 
         description="Retrieve a single order by its ID."
     )
-    search_orders = graphene.List(
-        OrderType,
+    order_ticket = graphene.Field(
+        OrderTicketType,
+        id=graphene.ID(required=True, description="The ID of the ticket returned by createOrder in intake mode."),
+        description="Retrieve the status of an order queued in intake mode."
+    )
+    search_orders = graphene.Field(
+        OrderConnection,
+        **connection_args(),
         min_cost=graphene.Float(default_value=None, description="The minimum cost of orders to retrieve."),
         max_cost=graphene.Float(default_value=None, description="The maximum cost of orders to retrieve."),
         start_date=graphene.Date(default_value=None, description="The start date of orders to retrieve."),
@@ -34,16 +43,16 @@ class OrderQuery(graphene.ObjectType):
     )
 
     @login_required
-    def resolve_all_orders(self, info):
+    def resolve_all_orders(self, info, first, after):
         """
         Fetches all order instances from the database.
         
         Returns:
-            List of all Order instances.
+            A page of Order instances.
         """
-        if info.context.user.groups.filter(name='admin').exists():
-            return Order.objects.all()
-        return Order.objects.filter(user=info.context.user)
+        if is_admin(info.context.user):
+            return paginate(info, Order.objects.all(), first, after)
+        return paginate(info, Order.objects.filter(user=info.context.user), first, after)
     
     @login_required
     def resolve_order_by_id(self, info, id):
@@ -55,19 +64,33 @@ class OrderQuery(graphene.ObjectType):
         """
         order = Order.objects.filter(pk=id).first()
 
-        if order and order.user == info.context.user or info.context.user.groups.filter(name='admin').exists():
+        if order and order.user == info.context.user or is_admin(info.context.user):
             return order
         return None
 
     @login_required
-    def resolve_search_orders(self, info, **kwargs):
+    def resolve_order_ticket(self, info, id):
+        """
+        Retrieves a queued order's ticket by its ID.
+
+        Returns:
+            The OrderTicket if found and owned by the user, None otherwise.
+        """
+        ticket = OrderTicket.objects.filter(pk=id).first()
+
+        if ticket and (ticket.user_id == info.context.user.pk or is_admin(info.context.user)):
+            return ticket
+        return None
+
+    @login_required
+    def resolve_search_orders(self, info, first, after, **kwargs):
         """
         Searches for orders matching the given criteria.
         
         Returns:
-            List of Order instances matching the search criteria.
+            A page of Order instances matching the search criteria.
         """
-        if info.context.user.groups.filter(name='admin').exists():
+        if is_admin(info.context.user):
             queryset = Order.objects.all()
         else:
             queryset = Order.objects.all().filter(user=info.context.user)
@@ -83,9 +106,9 @@ class OrderQuery(graphene.ObjectType):
             end_datetime = timezone.make_aware(datetime.combine(kwargs['end_date'], time.max), timezone.get_default_timezone())
             queryset = queryset.filter(created_at__lte=end_datetime)
 
-        return queryset
+        return paginate(info, queryset, first, after)
     
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     def resolve_orders_per_month(self, info, last_n_months):
         """
         Calculates the number of orders created and the cost of orders created each month for the last N months.
@@ -97,7 +120,10 @@ class OrderQuery(graphene.ObjectType):
         start_date = end_date.replace(day=1) - relativedelta(months=last_n_months-1)
 
         queryset = Order.objects \
-            .filter(created_at__date__gte=start_date, created_at__date__lte=end_date) \
+            .filter(
+                created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min), timezone.get_current_timezone()),
+                created_at__lte=timezone.make_aware(datetime.combine(end_date, time.max), timezone.get_current_timezone()),
+            ) \
             .annotate(month=TruncMonth('created_at')) \
             .values('month') \
             .annotate(order_count=Count('id'), order_cost=Sum('total_cost')) \
@@ -1,7 +1,14 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from products.models import Product
-from .models import Order, OrderItem
+from .models import IdempotencyKey, Order, OrderItem, OrderTicket
 from graphene_django.utils.testing import GraphQLTestCase
 from common.utils import execute_mutation
 from django.contrib.auth.models import User, Group
@@ -39,6 +46,117 @@ class OrderMutationTests(GraphQLTestCase):
         self.assertResponseNoErrors(response)
         self.assertTrue(response.json()['data']['createOrder']['operationResult']['success'])
 
+    def test_create_order_decrements_supply(self):
+        product1 = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10.75, supply=3)
+        product2 = Product.objects.create(name='Product 2', description='Product 2 Description', cost=5, supply=20)
+        mutation = '''
+        mutation createOrder($orderItems: [CreateOrderInput]!) {
+            createOrder(orderItems: $orderItems) {
+                operationResult {
+                    success
+                }
+                errors {
+                    index
+                    message
+                }
+            }
+        }
+        '''
+        order_items = [
+            {"productId": product2.id, "quantity": 2},
+            {"productId": product1.id, "quantity": 2},
+        ]
+
+        response = self.query(mutation, operation_name='createOrder', variables={'orderItems': order_items})
+
+        self.assertResponseNoErrors(response)
+        self.assertTrue(response.json()['data']['createOrder']['operationResult']['success'])
+        product1.refresh_from_db()
+        product2.refresh_from_db()
+        self.assertEqual((product1.supply, product2.supply), (1, 18))
+
+        response = self.query(mutation, operation_name='createOrder', variables={'orderItems': order_items})
+
+        self.assertResponseNoErrors(response)
+        self.assertFalse(response.json()['data']['createOrder']['operationResult']['success'])
+        self.assertEqual(response.json()['data']['createOrder']['errors'], [
+            {'index': 1, 'message': f"Insufficient stock for product {product1.id}: 1 available."},
+        ])
+        product1.refresh_from_db()
+        product2.refresh_from_db()
+        self.assertEqual((product1.supply, product2.supply), (1, 18))
+        self.assertEqual(Order.objects.count(), 1)
+
+    @override_settings(ORDER_INTAKE={'ENABLED': True, 'PARTITIONS': 2})
+    def test_create_order_intake_mode(self):
+        product = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10, supply=3)
+        mutation = '''
+        mutation createOrder($orderItems: [CreateOrderInput]!) {
+            createOrder(orderItems: $orderItems) {
+                operationResult {
+                    success
+                }
+                ticket {
+                    id
+                    status
+                }
+            }
+        }
+        '''
+        tickets = []
+        for quantity in (2, 1, 1):
+            response = self.query(mutation, operation_name='createOrder', variables={'orderItems': [{"productId": product.id, "quantity": quantity}]})
+            self.assertResponseNoErrors(response)
+            self.assertTrue(response.json()['data']['createOrder']['operationResult']['success'])
+            self.assertEqual(response.json()['data']['createOrder']['ticket']['status'], 'PENDING')
+            tickets.append(response.json()['data']['createOrder']['ticket']['id'])
+
+        product.refresh_from_db()
+        self.assertEqual(product.supply, 3)
+        self.assertFalse(Order.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('process_order_intake', once=True, stdout=StringIO())
+
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "products_product"') for query in queries.captured_queries), 1)
+
+        product.refresh_from_db()
+        self.assertEqual(product.supply, 0)
+        self.assertEqual(list(OrderTicket.objects.order_by('id').values_list('status', flat=True)), ['accepted', 'accepted', 'rejected'])
+
+        query = '''
+        query orderTicket($id: ID!) {
+            orderTicket(id: $id) {
+                status
+                order {
+                    totalCost
+                }
+                errors {
+                    index
+                    message
+                }
+            }
+        }
+        '''
+        response = self.query(query, operation_name='orderTicket', variables={'id': tickets[0]})
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['orderTicket']['status'], 'ACCEPTED')
+        self.assertEqual(response.json()['data']['orderTicket']['order']['totalCost'], '20.00')
+
+        response = self.query(query, operation_name='orderTicket', variables={'id': tickets[2]})
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['orderTicket']['errors'], [
+            {'index': 0, 'message': f"Insufficient stock for product {product.id}: 0 available."},
+        ])
+
+        self.client.force_login(self.user2)
+        response = self.query(query, operation_name='orderTicket', variables={'id': tickets[0]})
+
+        self.assertResponseNoErrors(response)
+        self.assertIsNone(response.json()['data']['orderTicket'])
+
     def test_create_order_invalid_quantity(self):
         product1 = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10.75, supply=100)
 
@@ -56,6 +174,20 @@ class OrderMutationTests(GraphQLTestCase):
         self.assertFalse(response.json()['data']['createOrder']['operationResult']['success'])
         self.assertIn("One or more quantities are less than 1.", response.json()['data']['createOrder']['operationResult']['message'])
 
+    @override_settings(ORDER_INTAKE={'ENABLED': True, 'PARTITIONS': 2})
+    def test_create_order_no_items(self):
+        variables = {
+            'orderItems': {'type': '[CreateOrderInput]!', 'value': []}
+        }
+
+        response = execute_mutation(self, 'createOrder', variables)
+
+        self.assertResponseNoErrors(response)
+        self.assertFalse(response.json()['data']['createOrder']['operationResult']['success'])
+        self.assertIn("An order must have at least one item.", response.json()['data']['createOrder']['operationResult']['message'])
+        self.assertFalse(OrderTicket.objects.exists())
+        self.assertFalse(Order.objects.exists())
+
     def test_create_order_invalid_product(self):
         order_items = [
             {"productId": 9999, "quantity": 1}
@@ -71,6 +203,48 @@ class OrderMutationTests(GraphQLTestCase):
         self.assertFalse(response.json()['data']['createOrder']['operationResult']['success'])
         self.assertIn("One or more products not found.", response.json()['data']['createOrder']['operationResult']['message'])
 
+    def test_create_order_idempotency_key(self):
+        product = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10, supply=3)
+
+        variables = {
+            'orderItems': {'type': '[CreateOrderInput]!', 'value': [{"productId": product.id, "quantity": 2}]},
+            'idempotencyKey': {'type': 'String', 'value': 'order-1'},
+        }
+
+        first = execute_mutation(self, 'createOrder', variables)
+        retry = execute_mutation(self, 'createOrder', variables)
+
+        self.assertResponseNoErrors(first)
+        self.assertResponseNoErrors(retry)
+        self.assertEqual(retry.json()['data'], first.json()['data'])
+        self.assertTrue(retry.json()['data']['createOrder']['operationResult']['success'])
+        self.assertEqual(Order.objects.filter(user=self.user1).count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.supply, 1)
+
+        variables['idempotencyKey']['value'] = 'order-2'
+        response = execute_mutation(self, 'createOrder', variables)
+
+        self.assertFalse(response.json()['data']['createOrder']['operationResult']['success'])
+        self.assertEqual(Order.objects.filter(user=self.user1).count(), 1)
+
+        variables['idempotencyKey']['value'] = 'order-1'
+        variables['orderItems']['value'] = [{"productId": product.id, "quantity": 1}]
+        response = execute_mutation(self, 'createOrder', variables)
+
+        self.assertFalse(response.json()['data']['createOrder']['operationResult']['success'])
+        self.assertEqual(response.json()['data']['createOrder']['operationResult']['message'], "This idempotency key was already used with different arguments.")
+        self.assertEqual(Order.objects.filter(user=self.user1).count(), 1)
+
+    def test_clear_idempotency_keys(self):
+        IdempotencyKey.objects.create(user=self.user1, operation='createOrder', key='fresh', result={})
+        expired = IdempotencyKey.objects.create(user=self.user1, operation='createOrder', key='expired', result={})
+        IdempotencyKey.objects.filter(pk=expired.pk).update(created_at=timezone.now() - timedelta(days=2))
+
+        call_command('clear_idempotency_keys', stdout=StringIO())
+
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['fresh'])
+
     def test_create_order_unauthorized(self):
         self.client.logout()
 
@@ -130,6 +304,131 @@ class OrderMutationTests(GraphQLTestCase):
         self.assertResponseNoErrors(response)
         self.assertTrue(response.json()['data']['updateOrderItem']['operationResult']['success'])
 
+    def test_order_item_changes_update_order_total(self):
+        order = Order.objects.create(user=self.user1, total_cost=31)
+        product = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10.75, supply=100)
+        order_item = OrderItem.objects.create(product=product, cost=11, quantity=1, order=order)
+        OrderItem.objects.create(product=product, cost=10, quantity=2, order=order)
+
+        # The session and user, the item with its order and product, the savepoint, the locked
+        # quantity, the supply update and the two writes.
+        with self.assertNumQueries(9):
+            execute_mutation(self, 'updateOrderItem', {
+                'id': {'type': 'ID!', 'value': order_item.id},
+                'quantity': {'type': 'Int!', 'value': 4}
+            })
+
+        order.refresh_from_db()
+        order_item.refresh_from_db()
+        self.assertEqual((order_item.quantity, order_item.cost), (4, Decimal('10.75')))
+        self.assertEqual(order.total_cost, Decimal('63.00'))
+
+        response = execute_mutation(self, 'deleteOrderItem', {'id': {'type': 'ID!', 'value': order_item.id}})
+
+        self.assertTrue(response.json()['data']['deleteOrderItem']['operationResult']['success'])
+        order.refresh_from_db()
+        self.assertEqual(order.total_cost, Decimal('20.00'))
+
+    def test_order_edits_reserve_and_restock_supply(self):
+        order = Order.objects.create(user=self.user1, total_cost=20)
+        product1 = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10, supply=5)
+        product2 = Product.objects.create(name='Product 2', description='Product 2 Description', cost=4, supply=3)
+        item = OrderItem.objects.create(product=product1, cost=10, quantity=2, order=order)
+        mutation = '''
+        mutation updateOrderItems($orderId: ID!, $changes: [OrderItemChangeInput!]!) {
+            updateOrderItems(orderId: $orderId, changes: $changes) {
+                operationResult {
+                    success
+                    message
+                }
+                errors {
+                    index
+                    message
+                }
+            }
+        }
+        '''
+
+        response = self.query(mutation, operation_name='updateOrderItems', variables={'orderId': order.id, 'changes': [
+            {'productId': str(product2.id), 'quantity': 1},
+            {'id': str(item.id), 'quantity': 8},
+        ]})
+
+        self.assertResponseNoErrors(response)
+        self.assertFalse(response.json()['data']['updateOrderItems']['operationResult']['success'])
+        self.assertEqual(response.json()['data']['updateOrderItems']['errors'], [
+            {'index': 1, 'message': f"Insufficient stock for product {product1.id}: 5 available."},
+        ])
+        self.assertEqual(list(Product.objects.order_by('id').values_list('supply', flat=True)), [5, 3])
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 1)
+
+        response = self.query(mutation, operation_name='updateOrderItems', variables={'orderId': order.id, 'changes': [
+            {'productId': str(product2.id), 'quantity': 3},
+            {'id': str(item.id), 'quantity': 4},
+        ]})
+
+        self.assertTrue(response.json()['data']['updateOrderItems']['operationResult']['success'])
+        self.assertEqual(list(Product.objects.order_by('id').values_list('supply', flat=True)), [3, 0])
+
+        execute_mutation(self, 'updateOrderItem', {'id': {'type': 'ID!', 'value': item.id}, 'quantity': {'type': 'Int!', 'value': 1}})
+        self.assertEqual(list(Product.objects.order_by('id').values_list('supply', flat=True)), [6, 0])
+
+        added = OrderItem.objects.get(order=order, product=product2)
+        execute_mutation(self, 'deleteOrderItem', {'id': {'type': 'ID!', 'value': added.id}})
+        self.assertEqual(list(Product.objects.order_by('id').values_list('supply', flat=True)), [6, 3])
+
+        execute_mutation(self, 'deleteOrder', {'id': {'type': 'ID!', 'value': order.id}})
+        self.assertEqual(list(Product.objects.order_by('id').values_list('supply', flat=True)), [7, 3])
+
+    def test_update_order_items(self):
+        order = Order.objects.create(user=self.user1, total_cost=31)
+        product1 = Product.objects.create(name='Product 1', description='Product 1 Description', cost=10.75, supply=100)
+        product2 = Product.objects.create(name='Product 2', description='Product 2 Description', cost=4, supply=100)
+        changed = OrderItem.objects.create(product=product1, cost=11, quantity=1, order=order)
+        removed = OrderItem.objects.create(product=product1, cost=10, quantity=2, order=order)
+        mutation = '''
+        mutation updateOrderItems($orderId: ID!, $changes: [OrderItemChangeInput!]!) {
+            updateOrderItems(orderId: $orderId, changes: $changes) {
+                operationResult {
+                    success
+                    message
+                }
+                errors {
+                    index
+                    message
+                }
+            }
+        }
+        '''
+        changes = [
+            {'id': str(changed.id), 'quantity': 2},
+            {'id': str(removed.id), 'remove': True},
+            {'productId': str(product2.id), 'quantity': 3},
+        ]
+
+        response = self.query(mutation, operation_name='updateOrderItems', variables={'orderId': str(order.id), 'changes': [*changes, {'productId': '99999', 'quantity': 1}, {'id': str(changed.id), 'quantity': 0}]})
+
+        self.assertResponseNoErrors(response)
+        self.assertFalse(response.json()['data']['updateOrderItems']['operationResult']['success'])
+        self.assertEqual(response.json()['data']['updateOrderItems']['errors'], [
+            {'index': 3, 'message': "Product not found."},
+            {'index': 4, 'message': "An order item can only be changed once."},
+        ])
+        self.assertEqual(order.items.count(), 2)
+
+        response = self.query(mutation, operation_name='updateOrderItems', variables={'orderId': str(order.id), 'changes': changes})
+
+        self.assertResponseNoErrors(response)
+        self.assertTrue(response.json()['data']['updateOrderItems']['operationResult']['success'])
+        self.assertEqual(sorted(order.items.values_list('product_id', 'quantity', 'cost')), [(product1.id, 2, Decimal('10.75')), (product2.id, 3, Decimal('4.00'))])
+        order.refresh_from_db()
+        self.assertEqual(order.total_cost, Decimal('33.50'))
+
+        self.client.force_login(self.user2)
+        response = self.query(mutation, operation_name='updateOrderItems', variables={'orderId': str(order.id), 'changes': changes})
+
+        self.assertIn("You can only edit your own orders.", response.json()['data']['updateOrderItems']['operationResult']['message'])
+
     def test_update_order_item_not_found(self):
         variables = {
             'id': {'type': 'ID!', 'value': 9999},
@@ -363,8 +662,12 @@ class OrderQueryTests(GraphQLTestCase):
         query = '''
         query {
             allOrders {
-                id
-                totalCost
+                edges {
+                    node {
+                        id
+                        totalCost
+                    }
+                }
             }
         }
         '''
@@ -372,7 +675,7 @@ class OrderQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['allOrders']), 2)
+        self.assertEqual(len(response.json()['data']['allOrders']['edges']), 2)
 
     def test_all_orders_invalid_user(self):
         self.client.force_login(self.user2)
@@ -380,8 +683,12 @@ class OrderQueryTests(GraphQLTestCase):
         query = '''
         query {
             allOrders {
-                id
-                totalCost
+                edges {
+                    node {
+                        id
+                        totalCost
+                    }
+                }
             }
         }
         '''
@@ -389,7 +696,7 @@ class OrderQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['allOrders']), 0)
+        self.assertEqual(len(response.json()['data']['allOrders']['edges']), 0)
     
     def test_all_orders_unauthorized(self):
         self.client.logout()
@@ -397,8 +704,12 @@ class OrderQueryTests(GraphQLTestCase):
         query = '''
         query {
             allOrders {
-                id
-                totalCost
+                edges {
+                    node {
+                        id
+                        totalCost
+                    }
+                }
             }
         }
         '''
@@ -407,6 +718,49 @@ class OrderQueryTests(GraphQLTestCase):
 
         self.assertResponseHasErrors(response)
 
+    def test_all_orders_batches_nested_relations(self):
+        query = '''
+        query {
+            allOrders {
+                edges {
+                    node {
+                        id
+                        user {
+                            username
+                        }
+                        items {
+                            quantity
+                            product {
+                                name
+                                tags {
+                                    name
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        '''
+
+        self.query(query)
+        with CaptureQueriesContext(connection) as initial:
+            response = self.query(query)
+        self.assertResponseNoErrors(response)
+
+        for _ in range(3):
+            order = Order.objects.create(user=self.user1, total_cost=5.25)
+            product = Product.objects.create(name='Pen', description='A pen', cost=5.25, supply=10)
+            OrderItem.objects.create(product=product, cost=5.25, quantity=1, order=order)
+
+        with CaptureQueriesContext(connection) as grown:
+            response = self.query(query)
+        self.assertResponseNoErrors(response)
+
+        self.assertEqual(len(response.json()['data']['allOrders']['edges']), 5)
+        self.assertEqual(response.json()['data']['allOrders']['edges'][0]['node']['items'][0]['product']['name'], 'Journal')
+        self.assertEqual(len(grown.captured_queries), len(initial.captured_queries))
+
     def test_order_by_id(self):
         query = f'''
         query {{
@@ -443,8 +797,12 @@ class OrderQueryTests(GraphQLTestCase):
         query = f'''
         query {{
             searchOrders(minCost: 50) {{
-                id
-                totalCost
+                edges {{
+                    node {{
+                        id
+                        totalCost
+                    }}
+                }}
             }}
         }}
         '''
@@ -452,14 +810,18 @@ class OrderQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchOrders']), 1)
+        self.assertEqual(len(response.json()['data']['searchOrders']['edges']), 1)
 
     def test_search_orders_by_max_cost(self):
         query = f'''
         query {{
             searchOrders(maxCost: 50) {{
-                id
-                totalCost
+                edges {{
+                    node {{
+                        id
+                        totalCost
+                    }}
+                }}
             }}
         }}
         '''
@@ -467,14 +829,18 @@ class OrderQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchOrders']), 1)
+        self.assertEqual(len(response.json()['data']['searchOrders']['edges']), 1)
 
     def test_search_orders_by_start_date(self):
         query = f'''
         query {{
             searchOrders(startDate: "2022-01-01") {{
-                id
-                totalCost
+                edges {{
+                    node {{
+                        id
+                        totalCost
+                    }}
+                }}
             }}
         }}
         '''
@@ -482,14 +848,18 @@ class OrderQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchOrders']), 2)
+        self.assertEqual(len(response.json()['data']['searchOrders']['edges']), 2)
 
     def test_search_orders_by_end_date(self):
         query = f'''
         query {{
             searchOrders(endDate: "2022-01-01") {{
-                id
-                totalCost
+                edges {{
+                    node {{
+                        id
+                        totalCost
+                    }}
+                }}
             }}
         }}
         '''
@@ -497,7 +867,7 @@ class OrderQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchOrders']), 1)
+        self.assertEqual(len(response.json()['data']['searchOrders']['edges']), 1)
 
     def test_orders_per_month(self):
         self.client.force_login(self.admin_user)
@@ -0,0 +1,21 @@
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Order, OrderItem
+
+def update_order_total(order_id):
+    """
+    Recomputes an order's total cost from its items with a single UPDATE whose subquery sums
+    cost * quantity in the database, so no items are loaded into Python. Call it in the
+    transaction that changed the items.
+    """
+    total = OrderItem.objects \
+        .filter(order=OuterRef('pk')) \
+        .values('order') \
+        .annotate(total=Sum(F('cost') * F('quantity'), output_field=DecimalField(max_digits=10, decimal_places=2))) \
+        .values('total')
+
+    Order.objects.filter(pk=order_id).update(
+        total_cost=Coalesce(Subquery(total), Value(0), output_field=DecimalField(max_digits=10, decimal_places=2)),
+        updated_at=timezone.now(),
+    )
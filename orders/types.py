@@ -1,6 +1,8 @@
 import graphene
 from graphene_django import DjangoObjectType
-from .models import Order, OrderItem
+from .models import Order, OrderItem, OrderTicket
+from gql.loaders import load_related
+from gql.pagination import CountableConnection
 
 class OrderItemType(DjangoObjectType):
     """
@@ -11,6 +13,12 @@ class OrderItemType(DjangoObjectType):
         model = OrderItem
         fields = '__all__'
 
+    def resolve_order(self, info):
+        return load_related(info, self, 'order')
+
+    def resolve_product(self, info):
+        return load_related(info, self, 'product')
+
 class OrderType(DjangoObjectType):
     """
     Represents the Order model in GraphQL. This type exposes all fields of the Order model,
@@ -23,7 +31,14 @@ class OrderType(DjangoObjectType):
         fields = '__all__'
 
     def resolve_items(self, info):
-        return self.items.all()
+        return load_related(info, self, 'items')
+
+    def resolve_user(self, info):
+        return load_related(info, self, 'user')
+
+class OrderConnection(CountableConnection):
+    class Meta:
+        node = OrderType
 
 class OrdersPerMonthType(graphene.ObjectType):
     """
@@ -39,4 +54,35 @@ class CreateOrderInput(graphene.InputObjectType):
     Represents the input needed to create an order.
     """
     product_id = graphene.ID(required=True)
-    quantity = graphene.Int(required=True)
\ No newline at end of file
+    quantity = graphene.Int(required=True)
+
+class OrderItemChangeInput(graphene.InputObjectType):
+    """
+    Represents a change to an order: an item ID with a new quantity, an item ID with remove set,
+    or a product ID with a quantity to add a new item.
+    """
+    id = graphene.ID(description="The ID of the order item to change or remove.")
+    product_id = graphene.ID(description="The ID of the product to add to the order.")
+    quantity = graphene.Int(description="The new quantity of the item, or the quantity of the added product.")
+    remove = graphene.Boolean(default_value=False, description="Whether to remove the item.")
+
+class OrderItemErrorType(graphene.ObjectType):
+    """
+    An order item that could not be supplied.
+    """
+    index = graphene.Int(required=True, description="The position of the item in the order, starting at 0.")
+    message = graphene.String(required=True, description="Why the item could not be supplied.")
+
+class OrderTicketType(DjangoObjectType):
+    """
+    Represents an order queued in intake mode. Clients poll it until an intake worker has
+    accepted the order, which is then set, or rejected it with the errors of its items.
+    """
+    errors = graphene.List(graphene.NonNull(OrderItemErrorType), required=True, description="The order items that could not be supplied.")
+
+    class Meta:
+        model = OrderTicket
+        fields = ('id', 'status', 'order', 'created_at', 'processed_at')
+
+    def resolve_errors(self, info):
+        return [OrderItemErrorType(index=index, message=message) for index, message in self.errors]
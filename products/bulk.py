@@ -0,0 +1,168 @@
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from itertools import islice
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from gql.response_cache import invalidate_catalogue
+from tags.bitmaps import tag_bitmaps
+from .models import Product
+from .search import get_search_backend
+from .suggestions import suggestion_index
+
+FIELDS = ('name', 'description', 'cost', 'supply')
+CHUNK_SIZE = 1000
+
+def validate_product(values):
+    """
+    Checks the product field values that are set, with the rules of CreateProduct and
+    UpdateProduct and the limits of the model fields, such as the name's maximum length and the
+    cost's digits. Values that are None are not checked. A float cost, as GraphQL passes it, is
+    checked as the decimal it is written as, like coerce_product does.
+
+    Returns:
+        The error message of the first invalid value, or None if they are all valid.
+    """
+    if values.get('cost') is not None and values['cost'] < 0:
+        return "Cost must be a positive value."
+    if values.get('supply') is not None and values['supply'] < 0:
+        return "Supply must be a positive value."
+    if values.get('name') is not None and not values['name']:
+        return "Name cannot be empty."
+    if values.get('description') is not None and not values['description']:
+        return "Description cannot be empty."
+
+    fields = {field: values[field] for field in FIELDS if values.get(field) is not None}
+    if isinstance(fields.get('cost'), float):
+        fields['cost'] = Decimal(str(fields['cost']))
+    try:
+        Product(**fields).clean_fields(exclude=[field.name for field in Product._meta.fields if field.name not in fields])
+    except ValidationError as e:
+        field, messages = next(iter(e.message_dict.items()))
+        return f"{field.capitalize()}: {messages[0]}"
+    return None
+
+def coerce_product(row):
+    """
+    Converts an input row, such as a parsed CSV or NDJSON line, to product field values. Missing
+    fields are None.
+
+    Returns:
+        A tuple of (product id or None, dict of field values).
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object of product fields.")
+
+    try:
+        product_id = None if row.get('id') is None else int(row.get('id'))
+    except (TypeError, ValueError):
+        raise ValueError("ID must be an integer.")
+    try:
+        cost = None if row.get('cost') is None else Decimal(str(row.get('cost')))
+    except InvalidOperation:
+        raise ValueError("Cost must be a number.")
+    if cost is not None and not cost.is_finite():
+        raise ValueError("Cost must be a number.")
+    try:
+        supply = None if row.get('supply') is None else int(row.get('supply'))
+    except (TypeError, ValueError):
+        raise ValueError("Supply must be an integer.")
+
+    return product_id, {
+        'name': None if row.get('name') is None else str(row.get('name')),
+        'description': None if row.get('description') is None else str(row.get('description')),
+        'cost': cost,
+        'supply': supply,
+    }
+
+def _upsert_chunk(chunk, result):
+    """
+    Validates and writes one chunk of (index, row) pairs in its own transaction. Rows without
+    an ID are inserted with bulk_create and rows with one are updated with bulk_update. If the
+    database rejects the chunk, its rows are retried one at a time.
+    """
+    creates = []
+    updates = []
+    for index, row in chunk:
+        try:
+            product_id, values = coerce_product(row)
+        except ValueError as e:
+            result['errors'].append((index, str(e)))
+            continue
+
+        message = validate_product(values)
+        if message is None and product_id is None:
+            missing = [field for field in FIELDS if values[field] is None]
+            if missing:
+                message = f"{missing[0].capitalize()} is required."
+        if message is not None:
+            result['errors'].append((index, message))
+        elif product_id is None:
+            creates.append((index, Product(**values)))
+        else:
+            updates.append((index, product_id, values))
+
+    not_found = []
+    try:
+        with transaction.atomic():
+            existing = Product.objects.select_for_update().in_bulk([product_id for _, product_id, _ in updates])
+            updated = {}
+            for index, product_id, values in updates:
+                product = existing.get(product_id)
+                if product is None:
+                    not_found.append((index, "Product not found."))
+                    continue
+                for field, value in values.items():
+                    if value is not None:
+                        setattr(product, field, value)
+                product.updated_at = timezone.now()
+                updated[product_id] = product
+
+            created = Product.objects.bulk_create([product for _, product in creates], batch_size=CHUNK_SIZE)
+            Product.objects.bulk_update(list(updated.values()), [*FIELDS, 'updated_at'], batch_size=CHUNK_SIZE)
+
+            # Bulk writes send no signals, so the indexes the signals maintain are refreshed here.
+            # MySQL does not return the IDs of bulk inserted rows, but its FULLTEXT index needs
+            # no indexing.
+            get_search_backend().index([product for product in [*created, *updated.values()] if product.pk is not None])
+            transaction.on_commit(suggestion_index.invalidate)
+            if created:
+                transaction.on_commit(tag_bitmaps.invalidate)
+    except DatabaseError as e:
+        written = [index for index, _ in creates] + [index for index, _, _ in updates]
+        if len(written) == 1:
+            result['errors'].append((written[0], f"The row could not be written: {e}"))
+            return
+        # Retry the rows one at a time so only the rows the database rejects are reported.
+        rows = dict(chunk)
+        for index in sorted(written):
+            _upsert_chunk([(index, rows[index])], result)
+        return
+
+    result['errors'].extend(not_found)
+    result['created'] += len(created)
+    result['updated'] += len(updated)
+
+def upsert_products(rows, chunk_size=CHUNK_SIZE):
+    """
+    Inserts and updates products from an iterable of rows in chunks, each written in its own
+    transaction, so input of any size is streamed rather than loaded at once. Rows with an ID
+    update that product and rows without one create a product. Invalid rows are reported and
+    skipped without aborting the rest of the input.
+
+    Returns:
+        A dict with the number of created and updated products and the (row index, message)
+        pairs of the rows that were not written.
+    """
+    result = {'created': 0, 'updated': 0, 'errors': []}
+    rows = enumerate(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        _upsert_chunk(chunk, result)
+
+    if result['created'] or result['updated']:
+        invalidate_catalogue()
+    result['errors'].sort()
+    return result
@@ -0,0 +1,62 @@
+from django.db.models import Count, Q
+from graphql import GraphQLError
+from .models import Product
+
+COST_BOUNDARIES = (0, 10, 25, 50, 100, 250, 500, 1000)
+SUPPLY_BOUNDARIES = (0, 1, 10, 50, 100, 500)
+MAX_BUCKETS = 20
+MAX_TAGS = 100
+
+def _buckets(boundaries, argument):
+    """
+    Turns ascending boundaries into (min, max) buckets. The last bucket has no upper bound.
+    """
+    boundaries = list(boundaries)
+    if not boundaries or len(boundaries) > MAX_BUCKETS:
+        raise GraphQLError(f"The `{argument}` argument must have between 1 and {MAX_BUCKETS} boundaries.")
+    if any(lower >= upper for lower, upper in zip(boundaries, boundaries[1:])):
+        raise GraphQLError(f"The `{argument}` argument must be in ascending order.")
+    return list(zip(boundaries, boundaries[1:] + [None]))
+
+def _bucket_filter(field, lower, upper):
+    condition = Q(**{f'{field}__gte': lower})
+    if upper is not None:
+        condition &= Q(**{f'{field}__lt': upper})
+    return condition
+
+def product_facets(queryset, cost_boundaries=COST_BOUNDARIES, supply_boundaries=SUPPLY_BOUNDARIES, tag_limit=20):
+    """
+    Counts the products of a filtered queryset per tag, per cost bucket and per supply bucket.
+    Every bucket count is a filtered COUNT of one aggregate query and the tag counts come from
+    one grouped query on the tag table, so the number of queries does not depend on the
+    number of tags or buckets.
+
+    Returns:
+        A dict with the total count, the tag counts as (tag id, name, count) tuples with the
+        most common tags first, and the cost and supply buckets as (min, max, count) tuples.
+    """
+    if tag_limit < 0 or tag_limit > MAX_TAGS:
+        raise GraphQLError(f"The `tagLimit` argument must be between 0 and {MAX_TAGS}.")
+    cost_buckets = _buckets(cost_boundaries, 'costBoundaries')
+    supply_buckets = _buckets(supply_boundaries, 'supplyBoundaries')
+
+    counts = queryset.order_by().aggregate(
+        total_count=Count('id'),
+        **{f'cost_{index}': Count('id', filter=_bucket_filter('cost', *bucket)) for index, bucket in enumerate(cost_buckets)},
+        **{f'supply_{index}': Count('id', filter=_bucket_filter('supply', *bucket)) for index, bucket in enumerate(supply_buckets)},
+    )
+
+    tags = []
+    if tag_limit:
+        tags = Product.tags.through.objects \
+            .filter(product_id__in=queryset.order_by().values('pk')) \
+            .values('tag_id', 'tag__name') \
+            .annotate(count=Count('product_id')) \
+            .order_by('-count', 'tag_id')[:tag_limit]
+
+    return {
+        'total_count': counts['total_count'],
+        'tags': [(row['tag_id'], row['tag__name'], row['count']) for row in tags],
+        'cost': [(lower, upper, counts[f'cost_{index}']) for index, (lower, upper) in enumerate(cost_buckets)],
+        'supply': [(lower, upper, counts[f'supply_{index}']) for index, (lower, upper) in enumerate(supply_buckets)],
+    }
@@ -0,0 +1,79 @@
+import graphene
+from datetime import datetime, time
+from django.db.models import Count
+from django.utils import timezone
+from .models import Product
+from .search import get_search_backend
+from .types import TagMatch
+
+FILTERS = ('query', 'name', 'product_description', 'min_cost', 'max_cost', 'min_supply', 'max_supply', 'start_date', 'end_date')
+
+def product_filter_args():
+    """
+    Returns the filter arguments shared by the product search and facet fields.
+    """
+    return {
+        'query': graphene.String(default_value=None, description="Full-text search terms matched against product names and descriptions using the search index."),
+        'name': graphene.String(default_value=None, description="A substring of the product name to filter by. Case-insensitive."),
+        'product_description': graphene.String(default_value=None, description="A substring of the product description to filter by. Case-insensitive."),
+        'min_cost': graphene.Float(default_value=None, description="The minimum cost of products to retrieve."),
+        'max_cost': graphene.Float(default_value=None, description="The maximum cost of products to retrieve."),
+        'min_supply': graphene.Int(default_value=None, description="The minimum supply of products to retrieve."),
+        'max_supply': graphene.Int(default_value=None, description="The maximum supply of products to retrieve."),
+        'start_date': graphene.Date(default_value=None, description="The start date of products to retrieve."),
+        'end_date': graphene.Date(default_value=None, description="The end date of products to retrieve."),
+        'tags': graphene.List(graphene.Int, default_value=None, description="The IDs of the tags to filter by."),
+        'tag_match': graphene.Argument(TagMatch, default_value=TagMatch.ANY, description="Whether products must carry any or all of the tags."),
+        'exclude_tags': graphene.List(graphene.Int, default_value=None, description="The IDs of tags the products must not carry."),
+    }
+
+def has_filters(**kwargs):
+    """
+    Returns whether any filter other than the tag filters is set.
+    """
+    return any(kwargs.get(name) not in (None, '') for name in FILTERS)
+
+def filter_products(queryset=None, **kwargs):
+    """
+    Applies the product filter arguments to a queryset. The query argument is answered from the
+    full-text search index, which annotates each match with its relevance. Tags are matched with
+    a semi-join, so a product carrying several of the tags is returned once.
+
+    Returns:
+        The filtered queryset.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+
+    if kwargs.get('query') is not None:
+        queryset = get_search_backend().search(queryset, kwargs['query'])
+    if kwargs.get('name'):
+        queryset = queryset.filter(name__icontains=kwargs['name'])
+    if kwargs.get('product_description'):
+        queryset = queryset.filter(description__icontains=kwargs['product_description'])
+    if kwargs.get('min_cost') is not None:
+        queryset = queryset.filter(cost__gte=kwargs['min_cost'])
+    if kwargs.get('max_cost') is not None:
+        queryset = queryset.filter(cost__lte=kwargs['max_cost'])
+    if kwargs.get('min_supply') is not None:
+        queryset = queryset.filter(supply__gte=kwargs['min_supply'])
+    if kwargs.get('max_supply') is not None:
+        queryset = queryset.filter(supply__lte=kwargs['max_supply'])
+    if kwargs.get('start_date') is not None:
+        start_datetime = timezone.make_aware(datetime.combine(kwargs['start_date'], time.min), timezone.get_default_timezone())
+        queryset = queryset.filter(created_at__gte=start_datetime)
+    if kwargs.get('end_date') is not None:
+        end_datetime = timezone.make_aware(datetime.combine(kwargs['end_date'], time.max), timezone.get_default_timezone())
+        queryset = queryset.filter(created_at__lte=end_datetime)
+
+    tag_match = kwargs.get('tag_match', TagMatch.ANY)
+    tag_ids = set(kwargs['tags']) if kwargs.get('tags') is not None else None
+    if tag_ids is not None and (tag_ids or tag_match == TagMatch.ANY):
+        tagged = Product.tags.through.objects.filter(tag_id__in=tag_ids).values('product_id')
+        if tag_match == TagMatch.ALL:
+            tagged = tagged.annotate(tag_count=Count('tag_id')).filter(tag_count=len(tag_ids)).values('product_id')
+        queryset = queryset.filter(pk__in=tagged)
+    if kwargs.get('exclude_tags'):
+        queryset = queryset.exclude(pk__in=Product.tags.through.objects.filter(tag_id__in=set(kwargs['exclude_tags'])).values('product_id'))
+
+    return queryset
@@ -0,0 +1,62 @@
+import csv
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from products.bulk import CHUNK_SIZE, upsert_products
+
+def read_csv(file):
+    """
+    Yields the rows of a CSV file with a header line. Empty fields are treated as missing, so
+    an update only changes the columns that have a value.
+    """
+    for row in csv.DictReader(file):
+        yield {field: value if value != '' else None for field, value in row.items()}
+
+def read_ndjson(file):
+    """
+    Yields the objects of a file with one JSON object per line. Lines that are not valid JSON
+    are yielded as None so they are reported as invalid rows. Blank lines are skipped.
+    """
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+class Command(BaseCommand):
+    help = (
+        "Creates and updates products from a CSV or NDJSON file with id, name, description, cost and "
+        "supply fields. Rows with an id update that product and rows without one create a product."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The file to import, or - to read from standard input.")
+        parser.add_argument('--format', choices=sorted(READERS), help="The input format. Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="The number of rows written per transaction.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or (path.rsplit('.', 1)[-1].lower() if '.' in path else None)
+        if input_format == 'jsonl':
+            input_format = 'ndjson'
+        if input_format not in READERS:
+            raise CommandError("Cannot tell the input format from the path, pass --format.")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be a positive integer.")
+
+        file = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            result = upsert_products(READERS[input_format](file), options['chunk_size'])
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        for index, message in result['errors']:
+            self.stderr.write(f"Row {index + 1}: {message}")
+
+        summary = f"Created {result['created']} and updated {result['updated']} products with {len(result['errors'])} errors."
+        self.stdout.write(self.style.WARNING(summary) if result['errors'] else self.style.SUCCESS(summary))
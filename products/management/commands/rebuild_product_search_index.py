@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from products.models import Product
+from products.search import get_search_backend
+
+class Command(BaseCommand):
+    help = "Rebuilds the product search index, e.g. after rows were written without signals."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="The number of products indexed at a time.")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        batch = []
+        count = 0
+
+        for product in Product.objects.only('id', 'name', 'description').order_by('id').iterator(chunk_size=options['batch_size']):
+            batch.append(product)
+            if len(batch) >= options['batch_size']:
+                backend.index(batch)
+                count += len(batch)
+                batch = []
+
+        backend.index(batch)
+        count += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FULLTEXT_INDEX = 'products_product_name_description_ft'
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE products_product ADD FULLTEXT INDEX {FULLTEXT_INDEX} (name, description)')
+
+def remove_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE products_product DROP INDEX {FULLTEXT_INDEX}')
+
+def index_products(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        return
+
+    from products.search import term_weights
+
+    Product = apps.get_model('products', 'Product')
+    ProductSearchTerm = apps.get_model('products', 'ProductSearchTerm')
+    terms = []
+    for product in Product.objects.only('id', 'name', 'description').iterator():
+        weights = term_weights(product.name, product.description)
+        terms.extend(ProductSearchTerm(product_id=product.id, term=term, weight=weight) for term, weight in weights.items())
+    ProductSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'product'], name='products_pr_term_519224_idx')],
+            },
+        ),
+        migrations.RunPython(add_fulltext_index, remove_fulltext_index),
+        migrations.RunPython(index_products, migrations.RunPython.noop),
+    ]
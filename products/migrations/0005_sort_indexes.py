@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:25
+
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+def populate_average_rating(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Product.objects.filter(review_count__gt=0).update(
+        average_rating=Cast('rating_sum', FloatField()) / F('review_count'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_review_aggregates'),
+        ('reviews', '0007_product_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_cost_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_supply_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='average_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(populate_average_rating, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['cost', 'id'], name='product_cost_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['supply', 'id'], name='product_supply_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['review_count', 'id'], name='product_review_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['average_rating', 'id'], name='product_average_rating_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+RATINGS = range(1, 11)
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -7,6 +9,47 @@ class Product(models.Model):
     supply = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    rating_count_1 = models.PositiveIntegerField(default=0)
+    rating_count_2 = models.PositiveIntegerField(default=0)
+    rating_count_3 = models.PositiveIntegerField(default=0)
+    rating_count_4 = models.PositiveIntegerField(default=0)
+    rating_count_5 = models.PositiveIntegerField(default=0)
+    rating_count_6 = models.PositiveIntegerField(default=0)
+    rating_count_7 = models.PositiveIntegerField(default=0)
+    rating_count_8 = models.PositiveIntegerField(default=0)
+    rating_count_9 = models.PositiveIntegerField(default=0)
+    rating_count_10 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_created_at_idx'),
+            models.Index(fields=['cost', 'id'], name='product_cost_idx'),
+            models.Index(fields=['supply', 'id'], name='product_supply_idx'),
+            models.Index(fields=['review_count', 'id'], name='product_review_count_idx'),
+            models.Index(fields=['average_rating', 'id'], name='product_average_rating_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    @property
+    def rating_distribution(self):
+        """
+        Returns the number of reviews with each rating from 1 to 10.
+        """
+        return [getattr(self, f'rating_count_{rating}') for rating in RATINGS]
+
+class ProductSearchTerm(models.Model):
+    """
+    A weighted token of a product's name and description, used for full-text search on databases
+    without a FULLTEXT index.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['term', 'product'])]
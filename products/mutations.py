@@ -1,7 +1,13 @@
 import graphene
 from gql.types import OperationResult
+from .bulk import upsert_products, validate_product
 from .models import Product
+from .types import ProductUpsertErrorType, ProductUpsertInput
+from gql.response_cache import invalidate_catalogue
 from graphql_jwt.decorators import user_passes_test
+from common.roles import is_admin
+
+MAX_UPSERT_PRODUCTS = 1000
 
 class CreateProduct(graphene.Mutation):
     """
@@ -16,20 +22,16 @@ class CreateProduct(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, name, description, cost, supply):
-        if cost < 0:
-            return CreateProduct(operation_result=OperationResult(success=False, message="Cost must be a positive value."))
-        if supply < 0:
-            return CreateProduct(operation_result=OperationResult(success=False, message="Supply must be a positive value."))
-        if not name:
-            return CreateProduct(operation_result=OperationResult(success=False, message="Name cannot be empty."))
-        if not description:
-            return CreateProduct(operation_result=OperationResult(success=False, message="Description cannot be empty."))
+        message = validate_product({'name': name, 'description': description, 'cost': cost, 'supply': supply})
+        if message is not None:
+            return CreateProduct(operation_result=OperationResult(success=False, message=message))
 
         product = Product(name=name, description=description, cost=cost, supply=supply)
         product.save()
+        invalidate_catalogue()
 
         return CreateProduct(operation_result=OperationResult(success=True, message="Product created successfully."))
 
@@ -47,7 +49,7 @@ class UpdateProduct(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, id, **kwargs):
         try:
@@ -55,19 +57,16 @@ class UpdateProduct(graphene.Mutation):
         except Product.DoesNotExist:
             return UpdateProduct(operation_result=OperationResult(success=False, message="Product not found."))
         
+        message = validate_product(kwargs)
+        if message is not None:
+            return UpdateProduct(operation_result=OperationResult(success=False, message=message))
+
         for field, value in kwargs.items():
             if value is not None:
-                if field == 'cost' and value < 0:
-                    return UpdateProduct(operation_result=OperationResult(success=False, message="Cost must be a positive value."))
-                if field == 'supply' and value < 0:
-                    return UpdateProduct(operation_result=OperationResult(success=False, message="Supply must be a positive value."))
-                if field == 'name' and not value:
-                    return UpdateProduct(operation_result=OperationResult(success=False, message="Name cannot be empty."))
-                if field == 'description' and not value:
-                    return UpdateProduct(operation_result=OperationResult(success=False, message="Description cannot be empty."))
                 setattr(product, field, value)
         
         product.save()
+        invalidate_catalogue()
         
         return UpdateProduct(operation_result=OperationResult(success=True, message="Product updated successfully."))
 
@@ -81,7 +80,7 @@ class DeleteProduct(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, id):
         try:
@@ -90,10 +89,46 @@ class DeleteProduct(graphene.Mutation):
             return UpdateProduct(operation_result=OperationResult(success=False, message="Product not found."))
         
         product.delete()
+        invalidate_catalogue()
 
         return DeleteProduct(operation_result=OperationResult(success=True, message="Product deleted successfully."))
 
+class BulkUpsertProducts(graphene.Mutation):
+    """
+    Creates and updates many products in one request. Products with an ID are updated and
+    products without one are created, with the validation rules of CreateProduct and
+    UpdateProduct. The products are written in chunks with bulk inserts and updates, and invalid
+    products are reported without preventing the others from being written.
+    """
+    class Arguments:
+        products = graphene.List(graphene.NonNull(ProductUpsertInput), required=True, description=f"The products to create or update, at most {MAX_UPSERT_PRODUCTS}.")
+
+    operation_result = graphene.Field(OperationResult)
+    created = graphene.Int(description="The number of products created.")
+    updated = graphene.Int(description="The number of products updated.")
+    errors = graphene.List(graphene.NonNull(ProductUpsertErrorType), description="The products that were not written and why.")
+
+    @user_passes_test(is_admin)
+    @staticmethod
+    def mutate(root, info, products):
+        if len(products) > MAX_UPSERT_PRODUCTS:
+            return BulkUpsertProducts(operation_result=OperationResult(success=False, message=f"At most {MAX_UPSERT_PRODUCTS} products can be upserted at once."))
+
+        result = upsert_products(dict(product) for product in products)
+        errors = [ProductUpsertErrorType(index=index, message=message) for index, message in result['errors']]
+
+        return BulkUpsertProducts(
+            operation_result=OperationResult(
+                success=not errors,
+                message=f"Created {result['created']} and updated {result['updated']} products with {len(errors)} errors.",
+            ),
+            created=result['created'],
+            updated=result['updated'],
+            errors=errors,
+        )
+
 class ProductMutations(graphene.ObjectType):
     create_product = CreateProduct.Field(description="Creates a new product with the specified details.")
     update_product = UpdateProduct.Field(description="Updates an existing product with new values for any of the specified fields.")
-    delete_product = DeleteProduct.Field(description="Deletes the product identified by the given ID. Returns success=True if deleted.")
\ No newline at end of file
+    delete_product = DeleteProduct.Field(description="Deletes the product identified by the given ID. Returns success=True if deleted.")
+    bulk_upsert_products = BulkUpsertProducts.Field(description="Creates or updates many products at once, reporting the products that could not be written.")
\ No newline at end of file
@@ -4,14 +4,34 @@ from django.db.models.functions import TruncMonth
 from django.utils.timezone import now
 from dateutil.relativedelta import relativedelta
 from datetime import datetime, time
-from .types import ProductType, ProductsPerMonthType
+from .types import CostBucketType, ProductFacetsType, ProductType, ProductConnection, ProductSearchOrder, ProductSuggestionType, ProductsPerMonthType, SupplyBucketType, TagFacetType, TagMatch
 from .models import Product
+from .facets import COST_BOUNDARIES, SUPPLY_BOUNDARIES, product_facets
+from .filters import filter_products, has_filters, product_filter_args
+from .suggestions import MAX_LIMIT, suggestion_index
+from gql.pagination import connection_args, paginate, paginate_bitmap
+from tags.bitmaps import tag_bitmaps
+from graphql import GraphQLError
 from graphql_jwt.decorators import user_passes_test
 from django.utils import timezone
+from common.roles import is_admin
+
+ORDER_KEYS = {
+    ProductSearchOrder.CREATED_AT: ('created_at', 'id'),
+    ProductSearchOrder.CREATED_AT_DESC: ('-created_at', '-id'),
+    ProductSearchOrder.COST: ('cost', 'id'),
+    ProductSearchOrder.COST_DESC: ('-cost', '-id'),
+    ProductSearchOrder.SUPPLY: ('supply', 'id'),
+    ProductSearchOrder.SUPPLY_DESC: ('-supply', '-id'),
+    ProductSearchOrder.MOST_REVIEWED: ('-review_count', '-id'),
+    ProductSearchOrder.BEST_RATED: ('-average_rating', '-id'),
+    ProductSearchOrder.RELEVANCE: ('-relevance', 'id'),
+}
 
 class ProductQuery(graphene.ObjectType):
-    all_products = graphene.List(
-        ProductType, 
+    all_products = graphene.Field(
+        ProductConnection,
+        **connection_args(),
         description="Retrieve all products."
     )
     product_by_id = graphene.Field(
@@ -19,32 +39,40 @@ class ProductQuery(graphene.ObjectType):
         id=graphene.Int(required=True, description="The ID of the product to retrieve."), 
         description="Retrieve a single product by its ID."
     )
-    search_products = graphene.List(
-        ProductType,
-        name=graphene.String(default_value=None, description="A substring of the product name to filter by. Case-insensitive."),
-        product_description=graphene.String(default_value=None, description="A substring of the product description to filter by. Case-insensitive."),
-        min_cost=graphene.Float(default_value=None, description="The minimum cost of products to retrieve."),
-        max_cost=graphene.Float(default_value=None, description="The maximum cost of products to retrieve."),
-        min_supply=graphene.Int(default_value=None, description="The minimum supply of products to retrieve."),
-        max_supply=graphene.Int(default_value=None, description="The maximum supply of products to retrieve."),
-        start_date=graphene.Date(default_value=None, description="The start date of products to retrieve."),
-        end_date=graphene.Date(default_value=None, description="The end date of products to retrieve."),
-        tags=graphene.List(graphene.Int, default_value=None, description="The IDs of the tags to filter by."),
+    search_products = graphene.Field(
+        ProductConnection,
+        **connection_args(),
+        **product_filter_args(),
+        order_by=graphene.Argument(ProductSearchOrder, default_value=ProductSearchOrder.CREATED_AT, description="The order of the results."),
         description="Search for products based on various criteria such as name, description, cost range, and supply range."
     )
+    product_facets = graphene.Field(
+        graphene.NonNull(ProductFacetsType),
+        **product_filter_args(),
+        cost_boundaries=graphene.List(graphene.NonNull(graphene.Float), default_value=COST_BOUNDARIES, description="The ascending lower bounds of the cost buckets."),
+        supply_boundaries=graphene.List(graphene.NonNull(graphene.Int), default_value=SUPPLY_BOUNDARIES, description="The ascending lower bounds of the supply buckets."),
+        tag_limit=graphene.Int(default_value=20, description="The maximum number of tags to count."),
+        description="Count the products matching the search filters per tag, cost range and supply range."
+    )
+    product_suggestions = graphene.List(
+        graphene.NonNull(ProductSuggestionType),
+        prefix=graphene.String(required=True, description="The typed prefix of a word in the product name. Case-insensitive."),
+        limit=graphene.Int(default_value=10, description=f"The maximum number of suggestions to return, at most {MAX_LIMIT}."),
+        description="Suggest product names for a search box from the in-memory name index."
+    )
     products_per_month = graphene.List(
         ProductsPerMonthType, 
         last_n_months=graphene.Int(required=True, description="The number of months to include in the count, counting backwards from the current month."),
     )
 
-    def resolve_all_products(self, info):
+    def resolve_all_products(self, info, first, after):
         """
         Fetches all product instances from the database.
         
         Returns:
-            List of all Product instances.
+            A page of Product instances.
         """
-        return Product.objects.all()
+        return paginate(info, Product.objects.all(), first, after)
     
     def resolve_product_by_id(self, info, id):
         """
@@ -55,39 +83,62 @@ class ProductQuery(graphene.ObjectType):
         """
         return Product.objects.filter(pk=id).first()
 
-    def resolve_search_products(self, info, **kwargs):
+    def resolve_search_products(self, info, first, after, order_by, **kwargs):
         """
-        Searches for products matching the given criteria.
+        Searches for products matching the given criteria. When tags are the only criteria they
+        are answered from the in-memory tag bitmaps, ordered by id. Every other ordering is
+        backed by an index on its column and the product ID, so the first page is read from the
+        index without sorting the matching rows.
         
         Returns:
-            List of Product instances matching the search criteria.
+            A page of Product instances matching the search criteria.
         """
-        queryset = Product.objects.all()
+        tag_ids = set(kwargs['tags']) if kwargs.get('tags') is not None else None
+        exclude_tag_ids = set(kwargs.get('exclude_tags') or ())
 
-        if kwargs.get('name'):
-            queryset = queryset.filter(name__icontains=kwargs['name'])
-        if kwargs.get('product_description'):
-            queryset = queryset.filter(description__icontains=kwargs['product_description'])
-        if kwargs.get('min_cost') is not None:
-            queryset = queryset.filter(cost__gte=kwargs['min_cost'])
-        if kwargs.get('max_cost') is not None:
-            queryset = queryset.filter(cost__lte=kwargs['max_cost'])
-        if kwargs.get('min_supply') is not None:
-            queryset = queryset.filter(supply__gte=kwargs['min_supply'])
-        if kwargs.get('max_supply') is not None:
-            queryset = queryset.filter(supply__lte=kwargs['max_supply'])
-        if kwargs.get('start_date') is not None:
-            start_datetime = timezone.make_aware(datetime.combine(kwargs['start_date'], time.min), timezone.get_default_timezone())
-            queryset = queryset.filter(created_at__gte=start_datetime)
-        if kwargs.get('end_date') is not None:
-            end_datetime = timezone.make_aware(datetime.combine(kwargs['end_date'], time.max), timezone.get_default_timezone())
-            queryset = queryset.filter(created_at__lte=end_datetime)
-        if kwargs.get('tags') is not None:
-            queryset = queryset.filter(tags__id__in=kwargs['tags'])
+        if not has_filters(**kwargs) and order_by == ProductSearchOrder.CREATED_AT and (tag_ids is not None or exclude_tag_ids):
+            if kwargs['tag_match'] == TagMatch.ALL:
+                bitmap = tag_bitmaps.match(None, tag_ids or (), exclude_tag_ids)
+            else:
+                bitmap = tag_bitmaps.match(tag_ids, (), exclude_tag_ids)
+            return paginate_bitmap(info, Product.objects.all(), bitmap, first, after)
+
+        if order_by == ProductSearchOrder.RELEVANCE and kwargs.get('query') is None:
+            raise GraphQLError("Ordering by relevance requires a query.")
+
+        return paginate(info, filter_products(**kwargs), first, after, ORDER_KEYS[order_by])
+
+    def resolve_product_facets(self, info, cost_boundaries, supply_boundaries, tag_limit, **kwargs):
+        """
+        Counts the products matching the search filters per tag, cost bucket and supply bucket
+        with two grouped queries.
 
-        return queryset
+        Returns:
+            A ProductFacetsType instance.
+        """
+        facets = product_facets(filter_products(**kwargs), cost_boundaries, supply_boundaries, tag_limit)
+        return ProductFacetsType(
+            total_count=facets['total_count'],
+            tags=[TagFacetType(tag_id=tag_id, name=name, count=count) for tag_id, name, count in facets['tags']],
+            cost=[CostBucketType(min=lower, max=upper, count=count) for lower, upper, count in facets['cost']],
+            supply=[SupplyBucketType(min=lower, max=upper, count=count) for lower, upper, count in facets['supply']],
+        )
     
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    def resolve_product_suggestions(self, info, prefix, limit):
+        """
+        Looks up product names with a word starting with the prefix.
+
+        Returns:
+            A list of ProductSuggestionType instances.
+        """
+        if limit < 0 or limit > MAX_LIMIT:
+            raise GraphQLError(f"The `limit` argument must be between 0 and {MAX_LIMIT}.")
+        if not prefix.strip():
+            return []
+
+        return [ProductSuggestionType(id=product_id, name=name) for product_id, name in suggestion_index.search(prefix.strip(), limit)]
+
+    @user_passes_test(is_admin)
     def resolve_products_per_month(self, info, last_n_months):
         """
         Calculates the number of products created each month for the last N months.
@@ -99,7 +150,10 @@ class ProductQuery(graphene.ObjectType):
         start_date = end_date.replace(day=1) - relativedelta(months=last_n_months-1)
 
         queryset = Product.objects \
-            .filter(created_at__date__gte=start_date, created_at__date__lte=end_date) \
+            .filter(
+                created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min), timezone.get_current_timezone()),
+                created_at__lte=timezone.make_aware(datetime.combine(end_date, time.max), timezone.get_current_timezone()),
+            ) \
             .annotate(month=TruncMonth('created_at')) \
             .values('month') \
             .annotate(product_count=Count('id')) \
@@ -0,0 +1,103 @@
+import re
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import FloatField, OuterRef, Subquery, Sum
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils.module_loading import import_string
+from .models import Product, ProductSearchTerm
+
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+MAX_TERM_LENGTH = 64
+
+def tokenize(text):
+    """
+    Splits text into lowercase word tokens.
+    """
+    return [token[:MAX_TERM_LENGTH] for token in re.findall(r'\w+', (text or '').lower())]
+
+def term_weights(name, description):
+    """
+    Returns the weight of every token of a product's name and description. Name tokens weigh
+    more than description tokens.
+    """
+    weights = {}
+    for token in tokenize(name):
+        weights[token] = weights.get(token, 0) + NAME_WEIGHT
+    for token in tokenize(description):
+        weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+    return weights
+
+class FullTextBackend:
+    """
+    Product search on MySQL using the FULLTEXT index on name and description. InnoDB keeps the
+    index in sync with the table, so indexing is a no-op.
+    """
+    def index(self, products):
+        pass
+
+    def search(self, queryset, query):
+        """
+        Filters a product queryset to the rows matching the query in natural language mode.
+
+        Returns:
+            The queryset annotated with a relevance score.
+        """
+        table = Product._meta.db_table
+        relevance = RawSQL(
+            f"MATCH (`{table}`.`name`, `{table}`.`description`) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(relevance=relevance).filter(relevance__gt=0)
+
+class TermIndexBackend:
+    """
+    Portable product search for databases without a usable full-text index, such as SQLite in
+    tests. Each product's name and description tokens are stored in the ProductSearchTerm table
+    with a weight, and a product's relevance is the summed weight of the query terms it contains.
+    """
+    def index(self, products):
+        """
+        Replaces the indexed terms of the given products.
+        """
+        products = list(products)
+        ProductSearchTerm.objects.filter(product__in=products).delete()
+
+        terms = []
+        for product in products:
+            weights = term_weights(product.name, product.description)
+            terms.extend(ProductSearchTerm(product=product, term=term, weight=weight) for term, weight in weights.items())
+
+        ProductSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+    def search(self, queryset, query):
+        """
+        Filters a product queryset to the rows containing any of the query terms.
+
+        Returns:
+            The queryset annotated with a relevance score.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return queryset.none()
+
+        matches = ProductSearchTerm.objects.filter(term__in=terms)
+        relevance = matches.filter(product=OuterRef('pk')).values('product').annotate(total=Sum('weight')).values('total')
+        return queryset \
+            .filter(pk__in=matches.values('product')) \
+            .annotate(relevance=Coalesce(Subquery(relevance, output_field=FloatField()), 0.0))
+
+def get_search_backend():
+    """
+    Returns the search backend named by the PRODUCT_SEARCH_BACKEND setting, or else the one for
+    the database products are read from: the FULLTEXT index on MySQL and the term index
+    elsewhere.
+    """
+    backend = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+    if backend:
+        return import_string(backend)()
+    if connections[router.db_for_read(Product)].vendor == 'mysql':
+        return FullTextBackend()
+    return TermIndexBackend()
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Product
+from .search import get_search_backend
+from .suggestions import suggestion_index
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields, **kwargs):
+    """
+    Keeps the search index and name suggestions in sync when a product's name or description
+    is saved. Deleted products drop out of the search index with their rows.
+    """
+    if update_fields is not None and not {'name', 'description'} & set(update_fields):
+        return
+    get_search_backend().index([instance])
+
+    product_id, name = instance.pk, instance.name
+    transaction.on_commit(lambda: suggestion_index.add(product_id, name))
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    """
+    Removes a deleted product from the name suggestions once the delete commits.
+    """
+    product_id = instance.pk
+    transaction.on_commit(lambda: suggestion_index.remove(product_id))
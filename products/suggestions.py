@@ -0,0 +1,137 @@
+from bisect import bisect_left, insort
+from threading import Lock
+from gql.stamps import Stamp
+from .models import Product
+from .search import tokenize
+
+VERSION_KEY = 'products:suggestions:version'
+MAX_LIMIT = 50
+# Seconds a version stamp read is reused for, so typeahead lookups do not each query it.
+STAMP_MAX_AGE = 1
+
+def _keys(product_id, name):
+    """
+    Returns the index keys of a product name: the lowercased name from the start of each word,
+    so a prefix can match any word of the name.
+    """
+    lowered = name.lower()
+    keys = []
+    start = 0
+    for token in tokenize(name):
+        start = lowered.index(token, start)
+        keys.append((lowered[start:], product_id))
+        start += len(token)
+    return keys
+
+class PrefixIndex:
+    """
+    Sorted array of (name suffix, product id) keys. The keys starting with a prefix are
+    contiguous, so a lookup is a binary search followed by a short scan.
+    """
+    def __init__(self):
+        self.keys = []
+        self.names = {}
+
+    def add(self, product_id, name):
+        self.remove(product_id)
+        self.names[product_id] = name
+        for key in _keys(product_id, name):
+            insort(self.keys, key)
+
+    def remove(self, product_id):
+        name = self.names.pop(product_id, None)
+        if name is None:
+            return
+        for key in _keys(product_id, name):
+            position = bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+
+    def search(self, prefix, limit):
+        """
+        Returns:
+            Up to limit (product id, name) pairs whose name has a word starting with the prefix.
+        """
+        prefix = prefix.lower()
+        results = {}
+        position = bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and len(results) < limit:
+            key, product_id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            results.setdefault(product_id, self.names[product_id])
+            position += 1
+        return list(results.items())
+
+class ProductSuggestions:
+    """
+    In-process typeahead index over product names. It is built from the database on first use,
+    updated incrementally as products change and rebuilt when another process has changed the
+    catalogue, which it detects through a version stamp checked at most once per STAMP_MAX_AGE
+    seconds.
+    """
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._stamp = Stamp(VERSION_KEY, STAMP_MAX_AGE)
+        self._lock = Lock()
+
+    def build(self):
+        """
+        Builds the index from the names of all products.
+        """
+        index = PrefixIndex()
+        rows = sorted(
+            (key, product_id, name)
+            for product_id, name in Product.objects.values_list('id', 'name').iterator()
+            for key, _ in _keys(product_id, name)
+        )
+        index.keys = [(key, product_id) for key, product_id, name in rows]
+        index.names = {product_id: name for key, product_id, name in rows}
+        return index
+
+    def search(self, prefix, limit=10):
+        """
+        Returns:
+            Up to limit (product id, name) pairs whose name has a word starting with the prefix.
+        """
+        version = self._stamp.current()
+        with self._lock:
+            if self._index is not None and self._version == version:
+                return self._index.search(prefix, limit)
+
+        index = self.build()
+        with self._lock:
+            self._index, self._version = index, version
+            return index.search(prefix, limit)
+
+    def _apply(self, change):
+        version = self._stamp.bump()
+        with self._lock:
+            if self._index is None or self._version != version - 1:
+                self._index = None
+                return
+            change(self._index)
+            self._version = version
+
+    def add(self, product_id, name):
+        self._apply(lambda index: index.add(product_id, name))
+
+    def remove(self, product_id):
+        self._apply(lambda index: index.remove(product_id))
+
+    def invalidate(self):
+        """
+        Makes every process rebuild from the database on next use, e.g. after bulk writes that
+        sent no signals.
+        """
+        self._stamp.bump()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+            self._version = None
+        self._stamp.forget()
+
+suggestion_index = ProductSuggestions()
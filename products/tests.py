@@ -1,4 +1,18 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from tags.models import Tag
+from .bulk import upsert_products
 from .models import Product
+from .search import TermIndexBackend
+from .suggestions import suggestion_index
+from tags.bitmaps import tag_bitmaps
 from graphene_django.utils.testing import GraphQLTestCase
 from common.utils import execute_mutation
 from django.contrib.auth.models import User, Group
@@ -29,6 +43,35 @@ class ProductMutationTests(GraphQLTestCase):
         self.assertResponseNoErrors(response)
         self.assertTrue(response.json()['data']['createProduct']['operationResult']['success'])
 
+    def test_create_product_inexact_float_cost(self):
+        variables = {
+            'name': {'type': 'String!', 'value': 'Test Name'},
+            'description': {'type': 'String!', 'value': 'Test Description'},
+            'cost': {'type': 'Float!', 'value': 19.99},
+            'supply': {'type': 'Int!', 'value': 100}
+        }
+
+        response = execute_mutation(self, 'createProduct', variables)
+
+        self.assertResponseNoErrors(response)
+        self.assertTrue(response.json()['data']['createProduct']['operationResult']['success'])
+        self.assertEqual(str(Product.objects.get(name='Test Name').cost), '19.99')
+
+    def test_update_product_inexact_float_cost(self):
+        product = Product.objects.create(name='Test Name', description='Test Description', cost=10.75, supply=100)
+
+        variables = {
+            'id': {'type': 'ID!', 'value': product.id},
+            'cost': {'type': 'Float', 'value': 19.99}
+        }
+
+        response = execute_mutation(self, 'updateProduct', variables)
+
+        self.assertResponseNoErrors(response)
+        self.assertTrue(response.json()['data']['updateProduct']['operationResult']['success'])
+        product.refresh_from_db()
+        self.assertEqual(str(product.cost), '19.99')
+
     def test_create_product_invalid_name(self):
         variables = {
             'name': {'type': 'String!', 'value': ''},
@@ -291,8 +334,105 @@ class ProductMutationTests(GraphQLTestCase):
         self.assertResponseHasErrors(response)
         self.assertIn("You do not have permission", str(response.content))
 
+    def test_bulk_upsert_products(self):
+        cache.clear()
+        suggestion_index.clear()
+        product = Product.objects.create(name='Test Name', description='Test Description', cost=10.75, supply=100)
+        suggestion_index.search('test')
+        mutation = '''
+        mutation bulkUpsertProducts($products: [ProductUpsertInput!]!) {
+            bulkUpsertProducts(products: $products) {
+                operationResult {
+                    success
+                }
+                created
+                updated
+                errors {
+                    index
+                    message
+                }
+            }
+        }
+        '''
+        products = [
+            {'name': 'Notebook', 'description': 'Lined pages', 'cost': 3.5, 'supply': 20},
+            {'id': str(product.id), 'cost': 12, 'name': 'Renamed'},
+            {'name': 'Pencil', 'description': 'HB', 'cost': -1, 'supply': 5},
+            {'name': 'Eraser', 'description': 'Soft'},
+            {'id': '99999', 'supply': 1},
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.query(mutation, operation_name='bulkUpsertProducts', variables={'products': products})
+
+        self.assertResponseNoErrors(response)
+        result = response.json()['data']['bulkUpsertProducts']
+        self.assertFalse(result['operationResult']['success'])
+        self.assertEqual((result['created'], result['updated']), (1, 1))
+        self.assertEqual(result['errors'], [
+            {'index': 2, 'message': "Cost must be a positive value."},
+            {'index': 3, 'message': "Cost is required."},
+            {'index': 4, 'message': "Product not found."},
+        ])
+
+        product.refresh_from_db()
+        self.assertEqual((product.name, product.cost, product.supply), ('Renamed', 12, 100))
+        self.assertTrue(Product.objects.filter(name='Notebook', cost=3.5, supply=20).exists())
+        self.assertEqual([name for _, name in suggestion_index.search('re')], ['Renamed'])
+
+    def test_upsert_products_field_limits_and_rejected_rows(self):
+        def index(products):
+            if any(product.name == 'Broken' for product in products):
+                raise DatabaseError("rejected")
+
+        rows = [
+            {'name': 'Notebook', 'description': 'Lined pages', 'cost': 3.5, 'supply': 20},
+            {'name': 'Broken', 'description': 'Rejected by the database', 'cost': 1, 'supply': 1},
+            {'name': 'N' * 256, 'description': 'Too long', 'cost': 1, 'supply': 1},
+            {'name': 'Safe', 'description': 'Too expensive', 'cost': '123456789.99', 'supply': 1},
+            {'name': 'Pen', 'description': 'Blue ink', 'cost': 2, 'supply': 10},
+        ]
+
+        with mock.patch('products.bulk.get_search_backend') as backend:
+            backend.return_value.index.side_effect = index
+            result = upsert_products(rows)
+
+        self.assertEqual((result['created'], result['updated']), (2, 0))
+        self.assertEqual(result['errors'], [
+            (1, "The row could not be written: rejected"),
+            (2, "Name: Ensure this value has at most 255 characters (it has 256)."),
+            (3, "Cost: Ensure that there are no more than 10 digits in total."),
+        ])
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['Notebook', 'Pen'])
+
+    def test_import_products_command(self):
+        product = Product.objects.create(name='Test Name', description='Test Description', cost=10.75, supply=100)
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'products.csv')
+            with open(csv_path, 'w', newline='') as file:
+                file.write(f'id,name,description,cost,supply\n{product.id},,,9.99,\n,Stapler,Desk stapler,7,30\n,Tape,,2,10\n')
+            ndjson_path = os.path.join(directory, 'products.ndjson')
+            with open(ndjson_path, 'w') as file:
+                file.write('{"name": "Ruler", "description": "30 cm", "cost": 1.5, "supply": 40}\nnot json\n')
+
+            stdout, stderr = StringIO(), StringIO()
+            call_command('import_products', csv_path, chunk_size=2, stdout=stdout, stderr=stderr)
+            call_command('import_products', ndjson_path, stdout=stdout, stderr=stderr)
+
+        product.refresh_from_db()
+        self.assertEqual((product.name, str(product.cost), product.supply), ('Test Name', '9.99', 100))
+        self.assertTrue(Product.objects.filter(name='Stapler', supply=30).exists())
+        self.assertTrue(Product.objects.filter(name='Ruler', supply=40).exists())
+        self.assertFalse(Product.objects.filter(name='Tape').exists())
+        self.assertIn("Row 3: Description is required.", stderr.getvalue())
+        self.assertIn("Row 2: Row must be an object of product fields.", stderr.getvalue())
+
 class ProductQueryTests(GraphQLTestCase):
     def setUp(self):
+        cache.clear()
+        suggestion_index.clear()
+        tag_bitmaps.clear()
+
         self.user_group, _ = Group.objects.get_or_create(name='user')
         self.admin_group, _ = Group.objects.get_or_create(name='admin')
 
@@ -311,11 +451,15 @@ class ProductQueryTests(GraphQLTestCase):
         query = '''
         query {
             allProducts {
-                id
-                name
-                description
-                cost
-                supply
+                edges {
+                    node {
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }
+                }
             }
         }
         '''
@@ -323,7 +467,113 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['allProducts']), 2)
+        self.assertEqual(len(response.json()['data']['allProducts']['edges']), 2)
+
+    def test_all_products_paginates_with_cursor(self):
+        query = '''
+        query allProducts($after: String) {
+            allProducts(first: 1, after: $after) {
+                totalCount
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+                edges {
+                    node {
+                        name
+                    }
+                }
+            }
+        }
+        '''
+
+        response = self.query(query, operation_name='allProducts')
+
+        self.assertResponseNoErrors(response)
+        page = response.json()['data']['allProducts']
+        self.assertEqual(page['totalCount'], 2)
+        self.assertTrue(page['pageInfo']['hasNextPage'])
+        self.assertEqual(page['edges'][0]['node']['name'], self.product1.name)
+
+        response = self.query(query, operation_name='allProducts', variables={'after': page['pageInfo']['endCursor']})
+
+        self.assertResponseNoErrors(response)
+        page = response.json()['data']['allProducts']
+        self.assertFalse(page['pageInfo']['hasNextPage'])
+        self.assertEqual(len(page['edges']), 1)
+        self.assertEqual(page['edges'][0]['node']['name'], self.product2.name)
+
+    def test_all_products_page_size_limit(self):
+        query = '''
+        query {
+            allProducts(first: 1000) {
+                edges {
+                    node {
+                        id
+                    }
+                }
+            }
+        }
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("exceeds the `first` limit", str(response.content))
+
+    def test_all_products_loads_only_selected_columns(self):
+        query = '''
+        query {
+            allProducts {
+                edges {
+                    node {
+                        id
+                        name
+                        cost
+                    }
+                }
+            }
+        }
+        '''
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['allProducts']['edges'][0]['node']['name'], self.product1.name)
+        product_queries = [query['sql'] for query in context.captured_queries if 'products_product' in query['sql']]
+        self.assertEqual(len(product_queries), 1)
+        self.assertIn('"products_product"."cost"', product_queries[0])
+        self.assertNotIn('"products_product"."description"', product_queries[0])
+
+    def test_all_products_prefetches_selected_relations(self):
+        Tag.objects.create(name='Paper', description='Paper goods').product.add(self.product1, self.product2)
+
+        query = '''
+        query {
+            allProducts {
+                edges {
+                    node {
+                        name
+                        tags {
+                            name
+                        }
+                        reviews {
+                            title
+                        }
+                    }
+                }
+            }
+        }
+        '''
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['allProducts']['edges'][1]['node']['tags'][0]['name'], 'Paper')
+        tag_queries = [query['sql'] for query in context.captured_queries if 'tags_tag' in query['sql']]
+        self.assertEqual(len(tag_queries), 1)
 
     def test_product_by_id(self):
         query = f'''
@@ -368,11 +618,15 @@ class ProductQueryTests(GraphQLTestCase):
         query = f'''
         query {{
             searchProducts(name: "Book") {{
-                id
-                name
-                description
-                cost
-                supply
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }}
+                }}
             }}
         }}
         '''
@@ -380,21 +634,354 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchProducts']), 1)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['name'], self.product2.name)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['description'], self.product2.description)
-        self.assertEqual(float(response.json()['data']['searchProducts'][0]['cost']), self.product2.cost)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['supply'], self.product2.supply)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], self.product2.name)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['description'], self.product2.description)
+        self.assertEqual(float(response.json()['data']['searchProducts']['edges'][0]['node']['cost']), self.product2.cost)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['supply'], self.product2.supply)
+
+    @override_settings(PRODUCT_SEARCH_BACKEND='products.search.TermIndexBackend')
+    def test_search_products_full_text_by_relevance(self):
+        TermIndexBackend().index([self.product1, self.product2])
+        product3 = Product.objects.create(name='Brain Teasers', description='Puzzles for the weekend', cost=3, supply=5)
+        query = '''
+        query {
+            searchProducts(query: "brain", orderBy: RELEVANCE, first: 2) {
+                totalCount
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+                edges {
+                    node {
+                        name
+                    }
+                }
+            }
+        }
+        '''
 
-    def test_search_products_by_description(self):
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['searchProducts']['totalCount'], 3)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], product3.name)
+        self.assertTrue(response.json()['data']['searchProducts']['pageInfo']['hasNextPage'])
+
+        cursor = response.json()['data']['searchProducts']['pageInfo']['endCursor']
+        response = self.query(query.replace('first: 2', f'first: 2, after: "{cursor}"'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 1)
+
+    @override_settings(PRODUCT_SEARCH_BACKEND='products.search.TermIndexBackend')
+    def test_search_products_index_follows_changes(self):
+        TermIndexBackend().index([self.product1, self.product2])
+        query = '''
+        query {
+            searchProducts(query: "notebook") {
+                edges {
+                    node {
+                        name
+                    }
+                }
+            }
+        }
+        '''
+
+        self.assertEqual(len(self.query(query).json()['data']['searchProducts']['edges']), 0)
+
+        execute_mutation(self, 'updateProduct', {
+            'id': {'type': 'ID!', 'value': self.product2.id},
+            'name': {'type': 'String', 'value': 'Notebook'},
+        })
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], 'Notebook')
+
+        execute_mutation(self, 'deleteProduct', {'id': {'type': 'ID!', 'value': self.product2.id}})
+
+        self.assertEqual(len(self.query(query).json()['data']['searchProducts']['edges']), 0)
+
+    def test_search_products_by_tags(self):
+        paper = Tag.objects.create(name='Paper', description='Made of paper')
+        gift = Tag.objects.create(name='Gift', description='Good as a gift')
+        paper.product.add(self.product1, self.product2)
+        gift.product.add(self.product1)
         query = f'''
         query {{
-            searchProducts(productDescription: "journal") {{
+            any: searchProducts(tags: [{paper.id}, {gift.id}]) {{
+                totalCount
+                edges {{
+                    node {{
+                        name
+                    }}
+                }}
+            }}
+            all: searchProducts(tags: [{paper.id}, {gift.id}], tagMatch: ALL) {{
+                totalCount
+                edges {{
+                    node {{
+                        name
+                    }}
+                }}
+            }}
+        }}
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['any']['totalCount'], 2)
+        self.assertEqual(len(response.json()['data']['any']['edges']), 2)
+        self.assertEqual(response.json()['data']['all']['totalCount'], 1)
+        self.assertEqual(response.json()['data']['all']['edges'][0]['node']['name'], self.product1.name)
+
+        query = f'''
+        query {{
+            bitmap: searchProducts(excludeTags: [{gift.id}]) {{
+                totalCount
+                edges {{
+                    node {{
+                        name
+                    }}
+                }}
+            }}
+            sql: searchProducts(tags: [{paper.id}], excludeTags: [{gift.id}], maxCost: 100) {{
+                totalCount
+                edges {{
+                    node {{
+                        name
+                    }}
+                }}
+            }}
+        }}
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['bitmap']['totalCount'], 1)
+        self.assertEqual(response.json()['data']['bitmap']['edges'][0]['node']['name'], self.product2.name)
+        self.assertEqual(response.json()['data']['sql']['totalCount'], 1)
+        self.assertEqual(response.json()['data']['sql']['edges'][0]['node']['name'], self.product2.name)
+
+    def test_product_facets(self):
+        self.client.logout()
+        Product.objects.create(name='Pen', description='A pen', cost=2, supply=0)
+        paper = Tag.objects.create(name='Paper', description='Paper goods')
+        gift = Tag.objects.create(name='Gift', description='Gift ideas')
+        paper.product.add(self.product1, self.product2)
+        gift.product.add(self.product2)
+        query = '''
+        query {
+            productFacets(maxCost: 50, costBoundaries: [0, 5, 10], supplyBoundaries: [0, 1, 50]) {
+                totalCount
+                tags {
+                    tagId
+                    name
+                    count
+                }
+                cost {
+                    min
+                    max
+                    count
+                }
+                supply {
+                    min
+                    max
+                    count
+                }
+            }
+        }
+        '''
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query)
+
+        # Reads and writes of the shared response cache, their savepoints and the catalogue
+        # version stamp read are not part of the facet computation.
+        facet_queries = [query for query in context.captured_queries if not any(marker in query['sql'] for marker in ('shared_cache', 'gql_versionstamp', 'SAVEPOINT'))]
+        self.assertEqual(len(facet_queries), 2)
+        self.assertResponseNoErrors(response)
+        facets = response.json()['data']['productFacets']
+        self.assertEqual(facets['totalCount'], 3)
+        self.assertEqual(facets['tags'], [
+            {'tagId': str(paper.id), 'name': 'Paper', 'count': 2},
+            {'tagId': str(gift.id), 'name': 'Gift', 'count': 1},
+        ])
+        self.assertEqual(facets['cost'], [
+            {'min': 0, 'max': 5, 'count': 1},
+            {'min': 5, 'max': 10, 'count': 1},
+            {'min': 10, 'max': None, 'count': 1},
+        ])
+        self.assertEqual([bucket['count'] for bucket in facets['supply']], [1, 1, 1])
+
+        response = self.query(query.replace('maxCost: 50', f'tags: [{gift.id}]'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['productFacets']['totalCount'], 1)
+        self.assertEqual(response.json()['data']['productFacets']['cost'][2]['count'], 1)
+
+        response = self.query(query.replace('[0, 5, 10]', '[10, 5]'))
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("ascending order", str(response.content))
+
+    def test_product_suggestions(self):
+        self.client.logout()
+        suggestion_index.clear()
+        Product.objects.create(name='Brain Teasers', description='Puzzles for the weekend', cost=3, supply=5)
+        query = '''
+        query {
+            productSuggestions(prefix: "B") {
                 id
                 name
-                description
-                cost
-                supply
+            }
+        }
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual([suggestion['name'] for suggestion in response.json()['data']['productSuggestions']], ['Book', 'Brain Teasers'])
+        self.assertEqual(response.json()['data']['productSuggestions'][0]['id'], str(self.product2.id))
+
+        # The version stamp read by the first lookup is reused.
+        with mock.patch.object(suggestion_index._stamp, 'max_age', 60), self.assertNumQueries(0):
+            response = self.query(query.replace('"B"', '"tea"'))
+
+        self.assertEqual([suggestion['name'] for suggestion in response.json()['data']['productSuggestions']], ['Brain Teasers'])
+
+    def test_product_suggestions_follow_changes(self):
+        suggestion_index.clear()
+        query = '''
+        query {
+            productSuggestions(prefix: "note", limit: 5) {
+                name
+            }
+        }
+        '''
+
+        self.assertEqual(self.query(query).json()['data']['productSuggestions'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            execute_mutation(self, 'updateProduct', {
+                'id': {'type': 'ID!', 'value': self.product2.id},
+                'name': {'type': 'String', 'value': 'Notebook'},
+            })
+
+        self.assertEqual(self.query(query).json()['data']['productSuggestions'], [{'name': 'Notebook'}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            execute_mutation(self, 'deleteProduct', {'id': {'type': 'ID!', 'value': self.product2.id}})
+
+        self.assertEqual(self.query(query).json()['data']['productSuggestions'], [])
+
+    def test_search_products_by_review_aggregates(self):
+        Product.objects.filter(pk=self.product1.pk).update(review_count=3, rating_sum=15, average_rating=5, rating_count_5=3)
+        Product.objects.filter(pk=self.product2.pk).update(review_count=1, rating_sum=9, average_rating=9, rating_count_9=1)
+        query = '''
+        query {
+            searchProducts(orderBy: BEST_RATED, first: 1) {
+                pageInfo {
+                    endCursor
+                }
+                edges {
+                    node {
+                        name
+                        reviewCount
+                        averageRating
+                        ratingDistribution {
+                            rating
+                            count
+                        }
+                    }
+                }
+            }
+        }
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        node = response.json()['data']['searchProducts']['edges'][0]['node']
+        self.assertEqual(node['name'], self.product2.name)
+        self.assertEqual(node['averageRating'], 9.0)
+        self.assertEqual(node['ratingDistribution'][8], {'rating': 9, 'count': 1})
+
+        cursor = response.json()['data']['searchProducts']['pageInfo']['endCursor']
+        response = self.query(query.replace('first: 1', f'first: 1, after: "{cursor}"'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], self.product1.name)
+
+        response = self.query(query.replace('BEST_RATED', 'MOST_REVIEWED'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['reviewCount'], 3)
+
+    def test_search_products_ordered_by_cost(self):
+        product3 = Product.objects.create(name='Pen', description='A pen', cost=10, supply=5)
+        query = '''
+        query {
+            searchProducts(orderBy: COST_DESC, first: 2) {
+                pageInfo {
+                    endCursor
+                }
+                edges {
+                    node {
+                        name
+                    }
+                }
+            }
+        }
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual([edge['node']['name'] for edge in response.json()['data']['searchProducts']['edges']], [product3.name, self.product2.name])
+
+        cursor = response.json()['data']['searchProducts']['pageInfo']['endCursor']
+        response = self.query(query.replace('first: 2', f'first: 2, after: "{cursor}"'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual([edge['node']['name'] for edge in response.json()['data']['searchProducts']['edges']], [self.product1.name])
+
+        response = self.query(query.replace('COST_DESC', 'COST'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual([edge['node']['name'] for edge in response.json()['data']['searchProducts']['edges']], [self.product1.name, self.product2.name])
+
+    def test_search_products_relevance_requires_query(self):
+        query = '''
+        query {
+            searchProducts(orderBy: RELEVANCE) {
+                totalCount
+            }
+        }
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("Ordering by relevance requires a query", str(response.content))
+
+    def test_search_products_by_description(self):
+        query = f'''
+        query {{
+            searchProducts(productDescription: "journal") {{
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }}
+                }}
             }}
         }}
         '''
@@ -402,21 +989,25 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchProducts']), 1)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['name'], self.product1.name)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['description'], self.product1.description)
-        self.assertEqual(float(response.json()['data']['searchProducts'][0]['cost']), self.product1.cost)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['supply'], self.product1.supply)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], self.product1.name)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['description'], self.product1.description)
+        self.assertEqual(float(response.json()['data']['searchProducts']['edges'][0]['node']['cost']), self.product1.cost)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['supply'], self.product1.supply)
     
     def test_search_products_by_min_cost(self):
         query = f'''
         query {{
             searchProducts(minCost: 6.1) {{
-                id
-                name
-                description
-                cost
-                supply
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }}
+                }}
             }}
         }}
         '''
@@ -424,21 +1015,25 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchProducts']), 1)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['name'], self.product2.name)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['description'], self.product2.description)
-        self.assertEqual(float(response.json()['data']['searchProducts'][0]['cost']), self.product2.cost)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['supply'], self.product2.supply)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], self.product2.name)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['description'], self.product2.description)
+        self.assertEqual(float(response.json()['data']['searchProducts']['edges'][0]['node']['cost']), self.product2.cost)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['supply'], self.product2.supply)
 
     def test_search_products_by_max_cost(self):
         query = f'''
         query {{
             searchProducts(maxCost: 5) {{
-                id
-                name
-                description
-                cost
-                supply
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }}
+                }}
             }}
         }}
         '''
@@ -446,17 +1041,21 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchProducts']), 0)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 0)
     
     def test_search_products_by_min_supply(self):
         query = f'''
         query {{
             searchProducts(minSupply: 11) {{
-                id
-                name
-                description
-                cost
-                supply
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }}
+                }}
             }}
         }}
         '''
@@ -464,21 +1063,25 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchProducts']), 1)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['name'], self.product2.name)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['description'], self.product2.description)
-        self.assertEqual(float(response.json()['data']['searchProducts'][0]['cost']), self.product2.cost)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['supply'], self.product2.supply)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], self.product2.name)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['description'], self.product2.description)
+        self.assertEqual(float(response.json()['data']['searchProducts']['edges'][0]['node']['cost']), self.product2.cost)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['supply'], self.product2.supply)
 
     def test_search_products_by_max_supply(self):
         query = f'''
         query {{
             searchProducts(maxSupply: 10) {{
-                id
-                name
-                description
-                cost
-                supply
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                        cost
+                        supply
+                    }}
+                }}
             }}
         }}
         '''
@@ -486,11 +1089,11 @@ class ProductQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchProducts']), 1)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['name'], self.product1.name)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['description'], self.product1.description)
-        self.assertEqual(float(response.json()['data']['searchProducts'][0]['cost']), self.product1.cost)
-        self.assertEqual(response.json()['data']['searchProducts'][0]['supply'], self.product1.supply)
+        self.assertEqual(len(response.json()['data']['searchProducts']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['name'], self.product1.name)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['description'], self.product1.description)
+        self.assertEqual(float(response.json()['data']['searchProducts']['edges'][0]['node']['cost']), self.product1.cost)
+        self.assertEqual(response.json()['data']['searchProducts']['edges'][0]['node']['supply'], self.product1.supply)
 
     def test_products_per_month(self):
         query = f'''
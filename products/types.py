@@ -1,15 +1,146 @@
 import graphene
 from graphene_django import DjangoObjectType
-from .models import Product
+from .models import RATINGS, Product
+from gql.loaders import load_related
+from gql.pagination import CountableConnection
+
+class RatingCountType(graphene.ObjectType):
+    """
+    The number of reviews of a product with a given rating.
+    """
+    rating = graphene.Int(required=True, description="The rating, from 1 to 10.")
+    count = graphene.Int(required=True, description="The number of reviews with this rating.")
 
 class ProductType(DjangoObjectType):
     """
     Represents the Product model in GraphQL. This type exposes all fields of the Product model,
-    facilitating queries on products in the database.
+    facilitating queries on products in the database. Review statistics are read from the
+    aggregates stored on the product rather than computed from its reviews.
     """
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ['rating_sum', *(f'rating_count_{rating}' for rating in RATINGS)]
+
+    average_rating = graphene.Float(description="The average rating of the product's reviews, or null if it has none.")
+    rating_distribution = graphene.List(graphene.NonNull(RatingCountType), required=True, description="The number of reviews with each rating from 1 to 10.")
+
+    def resolve_average_rating(self, info):
+        return self.average_rating or None
+
+    def resolve_rating_distribution(self, info):
+        return [RatingCountType(rating=rating, count=count) for rating, count in zip(RATINGS, self.rating_distribution)]
+
+    def resolve_reviews(self, info):
+        return load_related(info, self, 'reviews')
+
+    def resolve_tags(self, info):
+        return load_related(info, self, 'tags')
+
+    def resolve_order_items(self, info):
+        return load_related(info, self, 'order_items')
+
+class ProductConnection(CountableConnection):
+    class Meta:
+        node = ProductType
+
+class ProductSearchOrder(graphene.Enum):
+    """
+    The orderings available on product search. Ties are broken by product ID in the same
+    direction, so every ordering is deterministic and can be read from a single index.
+    """
+    CREATED_AT = 'created_at'
+    CREATED_AT_DESC = 'created_at_desc'
+    COST = 'cost'
+    COST_DESC = 'cost_desc'
+    SUPPLY = 'supply'
+    SUPPLY_DESC = 'supply_desc'
+    MOST_REVIEWED = 'most_reviewed'
+    BEST_RATED = 'best_rated'
+    RELEVANCE = 'relevance'
+
+    @property
+    def description(self):
+        return {
+            ProductSearchOrder.CREATED_AT: "Oldest products first.",
+            ProductSearchOrder.CREATED_AT_DESC: "Newest products first.",
+            ProductSearchOrder.COST: "Cheapest products first.",
+            ProductSearchOrder.COST_DESC: "Most expensive products first.",
+            ProductSearchOrder.SUPPLY: "Products with the least supply first.",
+            ProductSearchOrder.SUPPLY_DESC: "Products with the most supply first.",
+            ProductSearchOrder.MOST_REVIEWED: "Products with the most reviews first.",
+            ProductSearchOrder.BEST_RATED: "Products with the highest average rating first. Products without reviews come last.",
+            ProductSearchOrder.RELEVANCE: "Best full-text matches first. Requires the query argument.",
+        }.get(self)
+
+class TagMatch(graphene.Enum):
+    """
+    How a product's tags must match a list of tags.
+    """
+    ANY = 'any'
+    ALL = 'all'
+
+    @property
+    def description(self):
+        if self == TagMatch.ALL:
+            return "Products carrying every one of the tags."
+        return "Products carrying at least one of the tags."
+
+class ProductSuggestionType(graphene.ObjectType):
+    """
+    A product name suggested for a typed prefix.
+    """
+    id = graphene.ID(required=True, description="The ID of the product.")
+    name = graphene.String(required=True, description="The name of the product.")
+
+class TagFacetType(graphene.ObjectType):
+    """
+    The number of matching products carrying a tag.
+    """
+    tag_id = graphene.ID(required=True, description="The ID of the tag.")
+    name = graphene.String(required=True, description="The name of the tag.")
+    count = graphene.Int(required=True, description="The number of matching products carrying the tag.")
+
+class CostBucketType(graphene.ObjectType):
+    """
+    The number of matching products with a cost in a range.
+    """
+    min = graphene.Float(required=True, description="The inclusive lower bound of the range.")
+    max = graphene.Float(description="The exclusive upper bound of the range, or null for the last bucket.")
+    count = graphene.Int(required=True, description="The number of matching products in the range.")
+
+class SupplyBucketType(graphene.ObjectType):
+    """
+    The number of matching products with a supply in a range.
+    """
+    min = graphene.Int(required=True, description="The inclusive lower bound of the range.")
+    max = graphene.Int(description="The exclusive upper bound of the range, or null for the last bucket.")
+    count = graphene.Int(required=True, description="The number of matching products in the range.")
+
+class ProductFacetsType(graphene.ObjectType):
+    """
+    Counts of the products matching a search, broken down by tag, cost and supply.
+    """
+    total_count = graphene.Int(required=True, description="The number of matching products.")
+    tags = graphene.List(graphene.NonNull(TagFacetType), required=True, description="The most common tags of the matching products, most common first.")
+    cost = graphene.List(graphene.NonNull(CostBucketType), required=True, description="The cost histogram of the matching products.")
+    supply = graphene.List(graphene.NonNull(SupplyBucketType), required=True, description="The supply histogram of the matching products.")
+
+class ProductUpsertInput(graphene.InputObjectType):
+    """
+    Represents a product to create, or to update when an ID is given.
+    """
+    id = graphene.ID(description="The ID of the product to update. A product is created when omitted.")
+    name = graphene.String(description="The name of the product. Required when creating.")
+    description = graphene.String(description="The description of the product. Required when creating.")
+    cost = graphene.Float(description="The cost of the product. Must be positive. Required when creating.")
+    supply = graphene.Int(description="The supply of the product. Must be positive. Required when creating.")
+
+class ProductUpsertErrorType(graphene.ObjectType):
+    """
+    A product of a bulk upsert that was not written.
+    """
+    index = graphene.Int(required=True, description="The position of the product in the input, starting at 0.")
+    message = graphene.String(required=True, description="Why the product was not written.")
 
 class ProductsPerMonthType(graphene.ObjectType):
     """
@@ -0,0 +1,63 @@
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from products.models import RATINGS, Product
+from .models import Review
+
+def update_review_aggregates(product_id, added=None, removed=None):
+    """
+    Applies a review change to a product's review count, rating sum and rating histogram with a
+    single UPDATE of F() expressions, so concurrent changes cannot overwrite each other. The
+    stored average rating is then recomputed from the updated columns while the row is locked.
+    `added` is the rating of a new or updated review and `removed` the rating it replaces.
+    Decrements stop at zero so aggregates that drifted, for example because reviews were written
+    outside the mutations, never violate the unsigned columns; repair_review_aggregates fixes them.
+    """
+    deltas = {}
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating is None:
+            continue
+        deltas['review_count'] = deltas.get('review_count', 0) + sign
+        deltas['rating_sum'] = deltas.get('rating_sum', 0) + sign * rating
+        deltas[f'rating_count_{rating}'] = deltas.get(f'rating_count_{rating}', 0) + sign
+
+    changes = {}
+    for field, delta in deltas.items():
+        if delta > 0:
+            changes[field] = F(field) + delta
+        elif delta < 0:
+            changes[field] = Case(When(**{f'{field}__gte': -delta}, then=F(field) + delta), default=Value(0))
+    if changes:
+        products = Product.objects.filter(pk=product_id)
+        products.update(**changes)
+        products.update(average_rating=Case(
+            When(review_count=0, then=Value(0.0)),
+            default=Cast('rating_sum', FloatField()) / F('review_count'),
+            output_field=FloatField(),
+        ))
+
+def compute_review_aggregates(product_ids):
+    """
+    Recomputes the review aggregates of the given products from the reviews table with one
+    grouped query.
+
+    Returns:
+        A dict mapping every product id to its aggregate field values.
+    """
+    empty = {'review_count': 0, 'rating_sum': 0, **{f'rating_count_{rating}': 0 for rating in RATINGS}}
+    aggregates = {product_id: dict(empty) for product_id in product_ids}
+
+    rows = Review.objects \
+        .filter(product_id__in=product_ids) \
+        .values('product_id') \
+        .annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_count_{rating}': Count('id', filter=Q(rating=rating)) for rating in RATINGS}
+        ) \
+        .order_by()
+
+    for row in rows:
+        aggregates[row.pop('product_id')].update(row)
+    for values in aggregates.values():
+        values['average_rating'] = values['rating_sum'] / values['review_count'] if values['review_count'] else 0.0
+    return aggregates
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from reviews.search import review_index
+
+class Command(BaseCommand):
+    help = (
+        "Invalidates the in-process review search index of every server process, or of one product, "
+        "so each process rebuilds it from the database on its next search."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, default=None, help="Only rebuild the index of this product.")
+
+    def handle(self, *args, **options):
+        review_index.invalidate(options['product'])
+
+        scope = "every product" if options['product'] is None else f"product {options['product']}"
+        self.stdout.write(self.style.SUCCESS(
+            f"Invalidated the review search index of {scope}. "
+            "Server processes rebuild it on their next search."
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from gql.response_cache import invalidate_catalogue
+from products.models import RATINGS, Product
+from reviews.aggregates import compute_review_aggregates
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized review count, rating sum, average rating and rating histogram of every product."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="The number of products repaired per transaction.")
+
+    def handle(self, *args, **options):
+        fields = ['review_count', 'rating_sum', 'average_rating', *(f'rating_count_{rating}' for rating in RATINGS)]
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        repaired = 0
+
+        for start in range(0, len(product_ids), options['batch_size']):
+            batch = product_ids[start:start + options['batch_size']]
+            with transaction.atomic():
+                products = Product.objects.select_for_update().only('id', *fields).in_bulk(batch)
+                aggregates = compute_review_aggregates(batch)
+
+                changed = []
+                for product_id, values in aggregates.items():
+                    product = products.get(product_id)
+                    if product is not None and any(getattr(product, field) != value for field, value in values.items()):
+                        for field, value in values.items():
+                            setattr(product, field, value)
+                        changed.append(product)
+
+                Product.objects.bulk_update(changed, fields)
+                repaired += len(changed)
+
+        if repaired:
+            invalidate_catalogue()
+        self.stdout.write(self.style.SUCCESS(f"Repaired the review aggregates of {repaired} of {len(product_ids)} products."))
@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+def populate_review_aggregates(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    fields = ['review_count', 'rating_sum', *(f'rating_count_{rating}' for rating in range(1, 11))]
+
+    rows = Review.objects \
+        .values('product_id') \
+        .annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_count_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 11)}
+        ) \
+        .order_by()
+
+    products = []
+    for row in rows.iterator():
+        product = Product(pk=row.pop('product_id'))
+        for field, value in row.items():
+            setattr(product, field, value)
+        products.append(product)
+    Product.objects.bulk_update(products, fields, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_review_aggregates'),
+        ('reviews', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_review_aggregates, migrations.RunPython.noop),
+    ]
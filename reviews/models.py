@@ -12,5 +12,12 @@ class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='review_created_at_idx'),
+            models.Index(fields=['product', 'created_at', 'id'], name='review_product_created_at_idx'),
+            models.Index(fields=['product', 'rating', 'created_at'], name='review_product_rating_idx'),
+        ]
+
     def __str__(self):
         return self.title
@@ -1,8 +1,12 @@
 import graphene
+from django.db import transaction
 from gql.types import OperationResult
+from .aggregates import update_review_aggregates
 from .models import Review
 from products.models import Product
+from gql.response_cache import invalidate_catalogue
 from graphql_jwt.decorators import login_required
+from common.roles import is_admin
 
 class CreateReview(graphene.Mutation):
     """
@@ -29,7 +33,10 @@ class CreateReview(graphene.Mutation):
             return CreateReview(operation_result=OperationResult(success=False, message="Product not found."))
 
         review = Review(title=title, body=body, rating=rating, product=product, user=info.context.user)
-        review.save()
+        with transaction.atomic():
+            review.save()
+            update_review_aggregates(product.id, added=rating)
+        invalidate_catalogue()
 
         return CreateReview(operation_result=OperationResult(success=True, message="Review created successfully."))
 
@@ -54,7 +61,7 @@ class UpdateReview(graphene.Mutation):
         except Review.DoesNotExist:
             return UpdateReview(operation_result=OperationResult(success=False, message="Review not found."))
 
-        if review.user != info.context.user and not info.context.user.groups.filter(name='admin').exists():
+        if review.user != info.context.user and not is_admin(info.context.user):
             return UpdateReview(operation_result=OperationResult(success=False, message="You can only update your own reviews."))
 
         for field, value in kwargs.items():
@@ -62,7 +69,13 @@ class UpdateReview(graphene.Mutation):
                 return UpdateReview(operation_result=OperationResult(success=False, message="Rating must be between 1 and 10."))
             setattr(review, field, value)
 
-        review.save()
+        with transaction.atomic():
+            previous_rating = Review.objects.select_for_update().filter(pk=review.pk).values_list('rating', flat=True).first()
+            if previous_rating is None:
+                return UpdateReview(operation_result=OperationResult(success=False, message="Review not found."))
+            review.save()
+            update_review_aggregates(review.product_id, added=review.rating, removed=previous_rating)
+        invalidate_catalogue()
         return UpdateReview(operation_result=OperationResult(success=True, message="Review updated successfully."))
 
 class DeleteReview(graphene.Mutation):
@@ -82,10 +95,15 @@ class DeleteReview(graphene.Mutation):
         except Review.DoesNotExist:
             return DeleteReview(operation_result=OperationResult(success=False, message="Review not found."))
         
-        if review.user != info.context.user and not info.context.user.groups.filter(name='admin').exists():
+        if review.user != info.context.user and not is_admin(info.context.user):
             return DeleteReview(operation_result=OperationResult(success=False, message="You can only delete your own reviews."))
 
-        review.delete()
+        with transaction.atomic():
+            rating = Review.objects.select_for_update().filter(pk=review.pk).values_list('rating', flat=True).first()
+            if rating is not None:
+                review.delete()
+                update_review_aggregates(review.product_id, removed=rating)
+        invalidate_catalogue()
         return DeleteReview(operation_result=OperationResult(success=True, message="Review deleted successfully."))
 
 class ReviewMutations(graphene.ObjectType):
@@ -1,12 +1,15 @@
 import graphene
 from datetime import datetime, time
-from .types import ReviewType
+from .types import ReviewType, ReviewConnection
 from .models import Review
+from .search import review_index
+from gql.pagination import connection_args, paginate, paginate_ranked
 from django.utils import timezone
 
 class ReviewQuery(graphene.ObjectType):
-    all_reviews = graphene.List(
-        ReviewType, 
+    all_reviews = graphene.Field(
+        ReviewConnection,
+        **connection_args(),
         description="Retrieve all reviews."
     )
     review_by_id = graphene.Field(
@@ -14,9 +17,11 @@ class ReviewQuery(graphene.ObjectType):
         id=graphene.Int(required=True, description="The ID of the review to retrieve."), 
         description="Retrieve a single review by its ID."
     )
-    search_reviews = graphene.List(
-        ReviewType,
+    search_reviews = graphene.Field(
+        ReviewConnection,
+        **connection_args(),
         product_id=graphene.Int(required=True, description="The ID of the product to filter by."),
+        query=graphene.String(default_value=None, description="Search terms matched against review titles and bodies using the review search index. Results are ranked by relevance."),
         title=graphene.String(default_value=None, description="A substring of the review title to filter by. Case-insensitive."),
         body=graphene.String(default_value=None, description="A substring of the review body to filter by. Case-insensitive."),
         min_rating=graphene.Float(default_value=None, description="The minimum rating of reviews to retrieve."),
@@ -26,14 +31,14 @@ class ReviewQuery(graphene.ObjectType):
         description="Search for reviews based on various criteria such as title, body, rating range, and date range."
     )
 
-    def resolve_all_reviews(self, info):
+    def resolve_all_reviews(self, info, first, after):
         """
         Fetches all reviews from the database.
         
         Returns:
-            List of all reviews.
+            A page of reviews.
         """
-        return Review.objects.all()
+        return paginate(info, Review.objects.all(), first, after)
     
     def resolve_review_by_id(self, info, id):
         """
@@ -44,12 +49,13 @@ class ReviewQuery(graphene.ObjectType):
         """
         return Review.objects.filter(pk=id).first()
 
-    def resolve_search_reviews(self, info, **kwargs):
+    def resolve_search_reviews(self, info, first, after, **kwargs):
         """
-        Searches for reviews matching the given criteria.
+        Searches for reviews matching the given criteria. The query argument is answered from
+        the in-process review index and ranked with BM25; the other criteria narrow the ranking.
         
         Returns:
-            List of review instances matching the search criteria.
+            A page of review instances matching the search criteria.
         """
         queryset = Review.objects.filter(product_id=kwargs['product_id'])
 
@@ -67,5 +73,13 @@ class ReviewQuery(graphene.ObjectType):
         if kwargs.get('end_date') is not None:
             end_datetime = timezone.make_aware(datetime.combine(kwargs['end_date'], time.max), timezone.get_default_timezone())
             queryset = queryset.filter(created_at__lte=end_datetime)
+
+        if kwargs.get('query') is not None:
+            ranked = review_index.search(kwargs['product_id'], kwargs['query'])
+            filters = ('title', 'body', 'min_rating', 'max_rating', 'start_date', 'end_date')
+            if any(kwargs.get(name) not in (None, '') for name in filters):
+                matching = set(queryset.values_list('id', flat=True))
+                ranked = [(score, pk) for score, pk in ranked if pk in matching]
+            return paginate_ranked(info, queryset, ranked, first, after)
         
-        return queryset
\ No newline at end of file
+        return paginate(info, queryset, first, after)
\ No newline at end of file
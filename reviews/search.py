@@ -0,0 +1,183 @@
+import math
+from collections import Counter, OrderedDict
+from threading import Lock
+from django.conf import settings
+from gql.stamps import bump_version, read_version, read_versions
+from products.search import tokenize
+from .models import Review
+
+GENERATION_KEY = 'reviews:index:generation'
+
+def _version_key(product_id):
+    return f'reviews:index:{product_id}'
+
+class ProductReviewIndex:
+    """
+    Inverted index over the title and body of one product's reviews: a postings list of review
+    ids and term frequencies per term, plus each review's length for BM25 normalization.
+    """
+    def __init__(self):
+        self.postings = {}
+        self.terms = {}
+        self.lengths = {}
+        self.total_length = 0
+
+    def add(self, review_id, title, body):
+        self.remove(review_id)
+        frequencies = Counter(tokenize(title) + tokenize(body))
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[review_id] = frequency
+        self.terms[review_id] = tuple(frequencies)
+        self.lengths[review_id] = sum(frequencies.values())
+        self.total_length += self.lengths[review_id]
+
+    def remove(self, review_id):
+        for term in self.terms.pop(review_id, ()):
+            postings = self.postings[term]
+            del postings[review_id]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(review_id, 0)
+
+    def copy(self):
+        copy = ProductReviewIndex()
+        copy.postings = {term: dict(postings) for term, postings in self.postings.items()}
+        copy.terms = dict(self.terms)
+        copy.lengths = dict(self.lengths)
+        copy.total_length = self.total_length
+        return copy
+
+    def search(self, query, k1=1.2, b=0.75):
+        """
+        Scores the reviews containing any of the query terms with BM25.
+
+        Returns:
+            A list of (score, review id) pairs, best first.
+        """
+        count = len(self.lengths)
+        if not count:
+            return []
+
+        average_length = self.total_length / count or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log((count - len(postings) + 0.5) / (len(postings) + 0.5) + 1)
+            for review_id, frequency in postings.items():
+                norm = k1 * (1 - b + b * self.lengths[review_id] / average_length)
+                scores[review_id] = scores.get(review_id, 0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        return sorted(((score, review_id) for review_id, score in scores.items()), key=lambda item: (-item[0], item[1]))
+
+class ReviewIndex:
+    """
+    In-process review search index holding a ProductReviewIndex for the most recently searched
+    products. Each product's index is built from the database on first use and then updated
+    incrementally as reviews change. Changes bump a per-product version stamp, so other
+    processes notice the change and rebuild that product's index on their next search. Changes
+    are applied to a copy of the index, so searches score without a lock and only the rebuild
+    of a product's index is serialized.
+    """
+    def __init__(self, max_products=1000):
+        self.max_products = max_products
+        self._products = OrderedDict()
+        self._builds = {}
+        self._lock = Lock()
+
+    def _version(self, product_id):
+        versions = read_versions([GENERATION_KEY, _version_key(product_id)])
+        return (versions[GENERATION_KEY], versions[_version_key(product_id)])
+
+    def _cached(self, product_id, version):
+        with self._lock:
+            entry = self._products.get(product_id)
+            if entry is not None and entry[0] == version:
+                self._products.move_to_end(product_id)
+                return entry[1]
+        return None
+
+    def build(self, product_id):
+        """
+        Builds the index of a product's reviews from the database.
+        """
+        index = ProductReviewIndex()
+        for review_id, title, body in Review.objects.filter(product_id=product_id).values_list('id', 'title', 'body').iterator():
+            index.add(review_id, title, body)
+        return index
+
+    def get(self, product_id):
+        """
+        Returns the index of a product's reviews, building it if it is missing or stale. Only
+        one thread builds a product's index; the others wait for it instead of building it too.
+        """
+        version = self._version(product_id)
+        index = self._cached(product_id, version)
+        if index is not None:
+            return index
+
+        with self._lock:
+            build_lock = self._builds.setdefault(product_id, Lock())
+        with build_lock:
+            index = self._cached(product_id, version)
+            if index is not None:
+                return index
+
+            index = self.build(product_id)
+            with self._lock:
+                self._products[product_id] = (version, index)
+                self._products.move_to_end(product_id)
+                while len(self._products) > self.max_products:
+                    evicted, _ = self._products.popitem(last=False)
+                    self._builds.pop(evicted, None)
+        return index
+
+    def search(self, product_id, query):
+        """
+        Returns:
+            A list of (BM25 score, review id) pairs for the product's reviews, best first.
+        """
+        return self.get(product_id).search(query)
+
+    def _apply(self, product_id, change):
+        product_version = bump_version(_version_key(product_id))
+        version = (read_version(GENERATION_KEY), product_version)
+
+        with self._lock:
+            entry = self._products.get(product_id)
+            if entry is None:
+                return
+            if entry[0] != (version[0], version[1] - 1):
+                del self._products[product_id]
+                return
+
+        index = entry[1].copy()
+        change(index)
+        with self._lock:
+            if self._products.get(product_id) is entry:
+                self._products[product_id] = (version, index)
+            else:
+                self._products.pop(product_id, None)
+
+    def add(self, product_id, review_id, title, body):
+        """
+        Adds or re-indexes a saved review.
+        """
+        self._apply(product_id, lambda index: index.add(review_id, title, body))
+
+    def remove(self, product_id, review_id):
+        self._apply(product_id, lambda index: index.remove(review_id))
+
+    def invalidate(self, product_id=None):
+        """
+        Makes every process rebuild the index of one product, or of all products, on next use.
+        """
+        bump_version(GENERATION_KEY if product_id is None else _version_key(product_id))
+
+    def clear(self):
+        with self._lock:
+            self._products.clear()
+            self._builds.clear()
+
+review_index = ReviewIndex(getattr(settings, 'REVIEW_SEARCH_INDEX_SIZE', 1000))
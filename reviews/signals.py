@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Review
+from .search import review_index
+
+@receiver(post_save, sender=Review)
+def index_review(sender, instance, **kwargs):
+    """
+    Adds a created or updated review to the review search index once the write commits.
+    """
+    product_id, review_id, title, body = instance.product_id, instance.pk, instance.title, instance.body
+    transaction.on_commit(lambda: review_index.add(product_id, review_id, title, body))
+
+@receiver(post_delete, sender=Review)
+def unindex_review(sender, instance, **kwargs):
+    """
+    Removes a deleted review from the review search index once the delete commits.
+    """
+    product_id, review_id = instance.product_id, instance.pk
+    transaction.on_commit(lambda: review_index.remove(product_id, review_id))
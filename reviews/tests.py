@@ -1,6 +1,12 @@
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
 from django.utils import timezone
 from products.models import Product
 from .models import Review
+from gql.stamps import bump_version
+from .search import _version_key, review_index
 from graphene_django.utils.testing import GraphQLTestCase
 from common.utils import execute_mutation
 from django.contrib.auth.models import User, Group
@@ -100,6 +106,27 @@ class ReviewMutationTests(GraphQLTestCase):
         self.assertFalse(response.json()['data']['updateReview']['operationResult']['success'])
         self.assertIn("Review not found", response.json()['data']['updateReview']['operationResult']['message'])
 
+    def test_update_review_deleted_concurrently(self):
+        product = Product.objects.create(name='Test Product', description='Test Description', cost=10, supply=10)
+        review = Review.objects.create(title='Test Title', body='Test Body', rating=10, product=product, user=self.user)
+        get = Review.objects.get
+
+        def get_then_delete(*args, **kwargs):
+            found = get(*args, **kwargs)
+            Review.objects.filter(pk=found.pk).delete()
+            return found
+
+        with mock.patch.object(Review.objects, 'get', side_effect=get_then_delete):
+            response = execute_mutation(self, 'updateReview', {
+                'id': {'type': 'ID!', 'value': str(review.id)},
+                'rating': {'type': 'Int', 'value': 5},
+            })
+
+        self.assertResponseNoErrors(response)
+        self.assertFalse(response.json()['data']['updateReview']['operationResult']['success'])
+        self.assertEqual(response.json()['data']['updateReview']['operationResult']['message'], "Review not found.")
+        self.assertFalse(Review.objects.exists())
+
     def test_update_review_rating_invalid(self):
         product = Product.objects.create(name='Test Product', description='Test Description', cost=10, supply=10)
         review = Review.objects.create(title='Test Title', body='Test Body', rating=10, product=product, user=self.user)
@@ -203,8 +230,52 @@ class ReviewMutationTests(GraphQLTestCase):
         self.assertFalse(response.json()['data']['deleteReview']['operationResult']['success'])
         self.assertIn("You can only delete your own reviews.", response.json()['data']['deleteReview']['operationResult']['message'])
 
+    def test_review_mutations_maintain_product_aggregates(self):
+        product = Product.objects.create(name='Test Product', description='Test Description', cost=10, supply=10)
+        execute_mutation(self, 'createReview', {
+            'title': {'type': 'String!', 'value': 'Test Title'},
+            'body': {'type': 'String!', 'value': 'Test Body'},
+            'rating': {'type': 'Int!', 'value': 8},
+            'productId': {'type': 'ID!', 'value': str(product.id)}
+        })
+        review = Review.objects.get(product=product)
+        execute_mutation(self, 'createReview', {
+            'title': {'type': 'String!', 'value': 'Other Title'},
+            'body': {'type': 'String!', 'value': 'Other Body'},
+            'rating': {'type': 'Int!', 'value': 4},
+            'productId': {'type': 'ID!', 'value': str(product.id)}
+        })
+        execute_mutation(self, 'updateReview', {
+            'id': {'type': 'ID!', 'value': str(review.id)},
+            'rating': {'type': 'Int', 'value': 6}
+        })
+
+        product.refresh_from_db()
+        self.assertEqual((product.review_count, product.rating_sum, product.average_rating), (2, 10, 5.0))
+        self.assertEqual(product.rating_distribution, [0, 0, 0, 1, 0, 1, 0, 0, 0, 0])
+
+        execute_mutation(self, 'deleteReview', {'id': {'type': 'ID!', 'value': str(review.id)}})
+
+        product.refresh_from_db()
+        self.assertEqual((product.review_count, product.rating_sum), (1, 4))
+        self.assertEqual(product.rating_distribution, [0, 0, 0, 1, 0, 0, 0, 0, 0, 0])
+
+    def test_repair_review_aggregates(self):
+        product = Product.objects.create(name='Test Product', description='Test Description', cost=10, supply=10)
+        Review.objects.create(title='Test Title', body='Test Body', rating=7, product=product, user=self.user)
+        Review.objects.create(title='Other Title', body='Other Body', rating=9, product=product, user=self.user)
+
+        call_command('repair_review_aggregates', batch_size=1, stdout=StringIO())
+
+        product.refresh_from_db()
+        self.assertEqual((product.review_count, product.rating_sum, product.average_rating), (2, 16, 8.0))
+        self.assertEqual(product.rating_distribution, [0, 0, 0, 0, 0, 0, 1, 0, 1, 0])
+
 class ReviewQueryTests(GraphQLTestCase):
     def setUp(self):
+        cache.clear()
+        review_index.clear()
+
         self.user1 = User.objects.create_user(username='Alice', email='alice@example.com')
         self.user2 = User.objects.create_user(username='Bob', email='bob@example.com')
 
@@ -248,10 +319,14 @@ class ReviewQueryTests(GraphQLTestCase):
         query = '''
         query {
             allReviews {
-                id
-                title
-                body
-                rating
+                edges {
+                    node {
+                        id
+                        title
+                        body
+                        rating
+                    }
+                }
             }
         }
         '''
@@ -259,7 +334,7 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['allReviews']), 3)
+        self.assertEqual(len(response.json()['data']['allReviews']['edges']), 3)
 
     def test_review_by_id(self):
         query = f'''
@@ -297,14 +372,87 @@ class ReviewQueryTests(GraphQLTestCase):
         self.assertResponseNoErrors(response)
         self.assertIsNone(response.json()['data']['reviewById'])
     
+    def test_search_reviews_by_query_ranked(self):
+        query = f'''
+        query {{
+            searchReviews(productId: {self.product1.id}, query: "bad product") {{
+                totalCount
+                edges {{
+                    node {{
+                        title
+                    }}
+                }}
+            }}
+        }}
+        '''
+
+        response = self.query(query)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['searchReviews']['totalCount'], 2)
+        self.assertEqual(response.json()['data']['searchReviews']['edges'][0]['node']['title'], self.review2.title)
+        self.assertEqual(response.json()['data']['searchReviews']['edges'][1]['node']['title'], self.review1.title)
+
+        response = self.query(query.replace('query: "bad product"', 'query: "bad product", minRating: 5'))
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['searchReviews']['totalCount'], 1)
+        self.assertEqual(response.json()['data']['searchReviews']['edges'][0]['node']['title'], self.review1.title)
+
+    def test_search_reviews_index_follows_changes(self):
+        self.assertEqual(review_index.search(self.product1.id, 'terrible'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(title='Terrible', body='Broke on day one', rating=1, product=self.product1, user=self.user2)
+
+        self.assertEqual([pk for score, pk in review_index.search(self.product1.id, 'terrible')], [review.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+
+        self.assertEqual(review_index.search(self.product1.id, 'terrible'), [])
+
+    def test_review_index_changes_copy_and_rebuild_invalidates(self):
+        index = review_index.get(self.product1.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(title='Terrible', body='Broke on day one', rating=1, product=self.product1, user=self.user2)
+
+        # Searches holding the previous index are not changed underneath.
+        self.assertEqual(index.search('terrible'), [])
+        updated = review_index.get(self.product1.id)
+        self.assertEqual(len(updated.search('terrible')), 1)
+
+        out = StringIO()
+        call_command('rebuild_review_search_index', stdout=out)
+
+        self.assertIn("every product", out.getvalue())
+        self.assertIsNot(review_index.get(self.product1.id), updated)
+
+    def test_review_index_rebuilds_after_change_in_other_process(self):
+        review_index.get(self.product1.id)
+
+        # Another process adds a review and stamps the change.
+        other = Review.objects.create(title='Terrible', body='Broke on day one', rating=1, product=self.product1, user=self.user1)
+        bump_version(_version_key(self.product1.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(title='Terrible too', body='Broke on day two', rating=1, product=self.product1, user=self.user2)
+
+        self.assertEqual(sorted(pk for score, pk in review_index.search(self.product1.id, 'terrible')), [other.id, review.id])
+
     def test_search_reviews_by_title(self):
         query = f'''
         query {{
             searchReviews(productId: {self.product1.id}, title: "Great") {{
-                id
-                title
-                body
-                rating
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                    }}
+                }}
             }}
         }}
         '''
@@ -312,16 +460,20 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 1)
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 1)
 
     def test_search_reviews_by_body(self):
         query = f'''
         query {{
             searchReviews(productId: {self.product1.id}, body: "bad") {{
-                id
-                title
-                body
-                rating
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                    }}
+                }}
             }}
         }}
         '''
@@ -329,16 +481,20 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 1)
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 1)
     
     def test_search_reviews_by_min_rating(self):
         query = f'''
         query {{
             searchReviews(productId: {self.product2.id}, minRating: 9) {{
-                id
-                title
-                body
-                rating
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                    }}
+                }}
             }}
         }}
         '''
@@ -346,16 +502,20 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 1)
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 1)
     
     def test_search_reviews_by_max_rating(self):
         query = f'''
         query {{
             searchReviews(productId: {self.product1.id}, maxRating: 1) {{
-                id
-                title
-                body
-                rating
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                    }}
+                }}
             }}
         }}
         '''
@@ -363,16 +523,20 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 1)
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 1)
     
     def test_search_reviews_by_start_date(self):
         query = f'''
         query {{
             searchReviews(productId: {self.product1.id}, startDate: "2023-01-01") {{
-                id
-                title
-                body
-                rating
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                    }}
+                }}
             }}
         }}
         '''
@@ -380,17 +544,21 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 1)
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 1)
     
     def test_search_reviews_by_end_date(self):
         query = f'''
         query {{
             searchReviews(productId: {self.product1.id}, endDate: "2023-01-01") {{
-                id
-                title
-                body
-                rating
-                createdAt
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                        createdAt
+                    }}
+                }}
             }}
         }}
         '''
@@ -398,16 +566,20 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 2)
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 2)
     
     def test_search_reviews_product_not_found(self):
         query = f'''
         query {{
             searchReviews(productId: 99999) {{
-                id
-                title
-                body
-                rating
+                edges {{
+                    node {{
+                        id
+                        title
+                        body
+                        rating
+                    }}
+                }}
             }}
         }}
         '''
@@ -415,4 +587,4 @@ class ReviewQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchReviews']), 0)
\ No newline at end of file
+        self.assertEqual(len(response.json()['data']['searchReviews']['edges']), 0)
\ No newline at end of file
@@ -1,6 +1,8 @@
 import graphene
 from graphene_django import DjangoObjectType
 from .models import Review
+from gql.loaders import load_related
+from gql.pagination import CountableConnection
 
 class ReviewType(DjangoObjectType):
     """
@@ -9,4 +11,14 @@ class ReviewType(DjangoObjectType):
     """
     class Meta:
         model = Review
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    def resolve_product(self, info):
+        return load_related(info, self, 'product')
+
+    def resolve_user(self, info):
+        return load_related(info, self, 'user')
+
+class ReviewConnection(CountableConnection):
+    class Meta:
+        node = ReviewType
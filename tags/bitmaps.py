@@ -0,0 +1,136 @@
+from threading import Lock
+from gql.stamps import Stamp
+from products.models import Product
+from .models import Tag
+
+VERSION_KEY = 'tags:bitmaps:version'
+
+def _bitmap(ids):
+    """
+    Builds a bitmap with the bit of every id set. Bits are set in a bytearray and converted
+    once, since setting them one at a time on an int copies it for every id.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for id in ids:
+        buffer[id >> 3] |= 1 << (id & 7)
+    return int.from_bytes(buffer, 'little')
+
+class TagBitmaps:
+    """
+    Bitmaps of the products carrying each tag, keyed on product id, plus a bitmap of every
+    product so exclusions can be answered without a tag filter. Tag combinations are then
+    bitwise operations on Python ints instead of joins through the tag table.
+    """
+    def __init__(self, tags=None, products=0):
+        self.tags = tags or {}
+        self.products = products
+
+    def add(self, tag_id, product_ids):
+        self.tags[tag_id] = self.tags.get(tag_id, 0) | _bitmap(product_ids)
+
+    def remove(self, tag_id, product_ids):
+        self.tags[tag_id] = self.tags.get(tag_id, 0) & ~_bitmap(product_ids)
+
+    def remove_tag(self, tag_id):
+        self.tags.pop(tag_id, None)
+
+    def add_product(self, product_id):
+        self.products |= 1 << product_id
+
+    def remove_product(self, product_id):
+        bit = 1 << product_id
+        self.products &= ~bit
+        for tag_id, bitmap in self.tags.items():
+            if bitmap & bit:
+                self.tags[tag_id] = bitmap & ~bit
+
+    def match(self, any_of=None, all_of=(), none_of=()):
+        """
+        Combines tag bitmaps: products carrying any of the first tags, all of the second and
+        none of the third. any_of does not constrain when it is None.
+
+        Returns:
+            The bitmap of matching product ids.
+        """
+        bitmap = self.products
+        if any_of is not None:
+            matching = 0
+            for tag_id in any_of:
+                matching |= self.tags.get(tag_id, 0)
+            bitmap &= matching
+        for tag_id in all_of:
+            bitmap &= self.tags.get(tag_id, 0)
+        for tag_id in none_of:
+            bitmap &= ~self.tags.get(tag_id, 0)
+        return bitmap
+
+class TagBitmapIndex:
+    """
+    In-process TagBitmaps built from the database on first use and updated incrementally as tags
+    are added to and removed from products. A version stamp tells other processes to rebuild
+    after changes they did not apply.
+    """
+    def __init__(self):
+        self._bitmaps = None
+        self._version = None
+        self._stamp = Stamp(VERSION_KEY)
+        self._lock = Lock()
+
+    def build(self):
+        """
+        Builds the bitmaps from the tag table.
+        """
+        product_ids = {}
+        for tag_id, product_id in Tag.product.through.objects.values_list('tag_id', 'product_id').iterator():
+            product_ids.setdefault(tag_id, []).append(product_id)
+        return TagBitmaps(
+            {tag_id: _bitmap(ids) for tag_id, ids in product_ids.items()},
+            _bitmap(Product.objects.values_list('id', flat=True).iterator()),
+        )
+
+    def match(self, any_of=None, all_of=(), none_of=()):
+        """
+        Returns:
+            The bitmap of product ids matching the tag combination, see TagBitmaps.match.
+        """
+        version = self._stamp.current()
+        with self._lock:
+            if self._bitmaps is not None and self._version == version:
+                return self._bitmaps.match(any_of, all_of, none_of)
+
+        bitmaps = self.build()
+        with self._lock:
+            self._bitmaps, self._version = bitmaps, version
+            return bitmaps.match(any_of, all_of, none_of)
+
+    def apply(self, change):
+        """
+        Bumps the version stamp for other processes and applies the change to the in-process
+        bitmaps. They are dropped instead if any other change was stamped since they were built
+        or last updated, since they would miss it.
+        """
+        version = self._stamp.bump()
+        with self._lock:
+            if self._bitmaps is None or self._version != version - 1:
+                self._bitmaps = None
+                return
+            change(self._bitmaps)
+            self._version = version
+
+    def invalidate(self):
+        """
+        Makes every process rebuild from the database on next use, e.g. after bulk writes that
+        sent no signals.
+        """
+        self._stamp.bump()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._bitmaps = None
+            self._version = None
+
+tag_bitmaps = TagBitmapIndex()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_indexes'),
+        ('tags', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['created_at', 'id'], name='tag_created_at_idx'),
+        ),
+    ]
@@ -8,5 +8,10 @@ class Tag(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     product = models.ManyToManyField(Product, related_name='tags')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='tag_created_at_idx'),
+        ]
+
     def __str__(self):
         return self.name
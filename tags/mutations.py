@@ -2,7 +2,9 @@ import graphene
 from gql.types import OperationResult
 from .models import Tag
 from products.models import Product
+from gql.response_cache import invalidate_catalogue
 from graphql_jwt.decorators import user_passes_test
+from common.roles import is_admin
 
 class CreateTag(graphene.Mutation):
     """
@@ -15,11 +17,12 @@ class CreateTag(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, name, description):
         tag = Tag(name=name, description=description)
         tag.save()
+        invalidate_catalogue()
 
         return CreateTag(operation_result=OperationResult(success=True, message="Tag created successfully."))
 
@@ -35,7 +38,7 @@ class UpdateTag(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, id, **kwargs):
         try:
@@ -47,6 +50,7 @@ class UpdateTag(graphene.Mutation):
             setattr(tag, field, value)
 
         tag.save()
+        invalidate_catalogue()
         return UpdateTag(operation_result=OperationResult(success=True, message="Tag updated successfully."))
 
 class DeleteTag(graphene.Mutation):
@@ -58,7 +62,7 @@ class DeleteTag(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, id):
         try:
@@ -67,6 +71,7 @@ class DeleteTag(graphene.Mutation):
             return DeleteTag(operation_result=OperationResult(success=False, message="Tag not found."))
         
         tag.delete()
+        invalidate_catalogue()
         return DeleteTag(operation_result=OperationResult(success=True, message="Tag deleted successfully."))
 
 class AddTagToProduct(graphene.Mutation):
@@ -76,7 +81,7 @@ class AddTagToProduct(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, product_id, tag_id):
         """
@@ -93,6 +98,7 @@ class AddTagToProduct(graphene.Mutation):
             return AddTagToProduct(operation_result=OperationResult(success=False, message="Tag not found."))
 
         product.tags.add(tag)
+        invalidate_catalogue()
         
         return AddTagToProduct(operation_result=OperationResult(success=True, message="Tag added to product successfully."))
 
@@ -1,13 +1,16 @@
 import graphene
 from datetime import datetime, time
-from .types import TagType
+from .types import TagType, TagConnection
 from .models import Tag
+from gql.pagination import connection_args, paginate
 from graphql_jwt.decorators import user_passes_test
 from django.utils import timezone
+from common.roles import is_admin
 
 class TagQuery(graphene.ObjectType):
-    all_tags = graphene.List(
-        TagType, 
+    all_tags = graphene.Field(
+        TagConnection,
+        **connection_args(),
         description="Retrieve all tags."
     )
     tag_by_id = graphene.Field(
@@ -15,8 +18,9 @@ class TagQuery(graphene.ObjectType):
         id=graphene.Int(required=True, description="The ID of the tag to retrieve."), 
         description="Retrieve a single tag by its ID."
     )
-    search_tags = graphene.List(
-        TagType,
+    search_tags = graphene.Field(
+        TagConnection,
+        **connection_args(),
         name=graphene.String(default_value=None, description="A substring of the tag name to filter by. Case-insensitive."),
         tag_description=graphene.String(default_value=None, description="A substring of the tag description to filter by. Case-insensitive."),
         start_date=graphene.Date(default_value=None, description="The start date of tags to retrieve."),
@@ -24,17 +28,17 @@ class TagQuery(graphene.ObjectType):
         description="Search for tags based on various criteria such as title, and description."
     )
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
-    def resolve_all_tags(self, info):
+    @user_passes_test(is_admin)
+    def resolve_all_tags(self, info, first, after):
         """
         Fetches all tags from the database.
         
         Returns:
-            List of all tags.
+            A page of tags.
         """
-        return Tag.objects.all()
+        return paginate(info, Tag.objects.all(), first, after)
     
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     def resolve_tag_by_id(self, info, id):
         """
         Retrieves a single tag by its ID.
@@ -44,13 +48,13 @@ class TagQuery(graphene.ObjectType):
         """
         return Tag.objects.filter(pk=id).first()
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
-    def resolve_search_tags(self, info, **kwargs):
+    @user_passes_test(is_admin)
+    def resolve_search_tags(self, info, first, after, **kwargs):
         """
         Searches for tags matching the given criteria.
         
         Returns:
-            List of tag instances matching the search criteria.
+            A page of tag instances matching the search criteria.
         """
         queryset = Tag.objects.all()
 
@@ -65,4 +69,4 @@ class TagQuery(graphene.ObjectType):
             end_datetime = timezone.make_aware(datetime.combine(kwargs['end_date'], time.max), timezone.get_default_timezone())
             queryset = queryset.filter(created_at__lte=end_datetime)
         
-        return queryset
\ No newline at end of file
+        return paginate(info, queryset, first, after)
\ No newline at end of file
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from products.models import Product
+from .bitmaps import tag_bitmaps
+from .models import Tag
+
+def _pairs(instance, reverse, pk_set):
+    """
+    Returns the (tag id, product ids) pairs touched by a change to Tag.product from either side.
+    """
+    if reverse:
+        return [(tag_id, [instance.pk]) for tag_id in pk_set]
+    return [(instance.pk, list(pk_set))]
+
+@receiver(m2m_changed, sender=Tag.product.through)
+def update_tag_bitmaps(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the tag bitmaps in sync when tags are added to or removed from products, including
+    through AddTagToProduct. Ids removed by clear() are captured before the rows are deleted.
+    """
+    if action == 'pre_clear':
+        related = instance.tags if reverse else instance.product
+        instance._cleared_pk_set = set(related.values_list('id', flat=True))
+        return
+
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_pk_set', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+
+    pairs = _pairs(instance, reverse, pk_set)
+    adding = action == 'post_add'
+
+    def change(bitmaps):
+        for tag_id, product_ids in pairs:
+            if adding:
+                bitmaps.add(tag_id, product_ids)
+            else:
+                bitmaps.remove(tag_id, product_ids)
+
+    transaction.on_commit(lambda: tag_bitmaps.apply(change))
+
+@receiver(post_delete, sender=Tag)
+def remove_tag_bitmap(sender, instance, **kwargs):
+    tag_id = instance.pk
+    transaction.on_commit(lambda: tag_bitmaps.apply(lambda bitmaps: bitmaps.remove_tag(tag_id)))
+
+@receiver(post_save, sender=Product)
+def add_product_bit(sender, instance, created, **kwargs):
+    if created:
+        product_id = instance.pk
+        transaction.on_commit(lambda: tag_bitmaps.apply(lambda bitmaps: bitmaps.add_product(product_id)))
+
+@receiver(post_delete, sender=Product)
+def remove_product_bits(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: tag_bitmaps.apply(lambda bitmaps: bitmaps.remove_product(product_id)))
@@ -1,4 +1,6 @@
 from products.models import Product
+from gql.stamps import bump_version
+from .bitmaps import VERSION_KEY, tag_bitmaps
 from .models import Tag
 from graphene_django.utils.testing import GraphQLTestCase
 from common.utils import execute_mutation
@@ -127,6 +129,44 @@ class TagMutationTests(GraphQLTestCase):
         self.assertResponseNoErrors(response)
         self.assertTrue(response.json()['data']['addTagToProduct']['operationResult']['success'])
 
+    def test_tag_bitmaps_follow_changes(self):
+        product = Product.objects.create(name="Sample Product", description="Sample description", cost=10.10, supply=10)
+        tag = Tag.objects.create(name="Sample Tag", description="Sample description")
+        tag_bitmaps.clear()
+        self.assertEqual(tag_bitmaps.match({tag.id}), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            execute_mutation(self, 'addTagToProduct', {
+                'productId': {'type': 'ID!', 'value': str(product.id)},
+                'tagId': {'type': 'ID!', 'value': str(tag.id)}
+            })
+
+        self.assertEqual(tag_bitmaps.match({tag.id}), 1 << product.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+
+        self.assertEqual(tag_bitmaps.match({tag.id}), 0)
+
+    def test_tag_bitmaps_rebuild_after_change_in_other_process(self):
+        product = Product.objects.create(name="Sample Product", description="Sample description", cost=10.10, supply=10)
+        other = Product.objects.create(name="Other Product", description="Other description", cost=10.10, supply=10)
+        tag = Tag.objects.create(name="Sample Tag", description="Sample description")
+        tag_bitmaps.clear()
+        self.assertEqual(tag_bitmaps.match({tag.id}), 0)
+
+        # Another process tags a product and stamps the change.
+        Tag.product.through.objects.create(tag=tag, product=other)
+        bump_version(VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            execute_mutation(self, 'addTagToProduct', {
+                'productId': {'type': 'ID!', 'value': str(product.id)},
+                'tagId': {'type': 'ID!', 'value': str(tag.id)}
+            })
+
+        self.assertEqual(tag_bitmaps.match({tag.id}), 1 << product.id | 1 << other.id)
+
     def test_add_tag_to_product_invalid_tag_id(self):
         product = Product.objects.create(name="Sample Product", description="Sample description", cost=10.10, supply=10)
         variables = {
@@ -187,9 +227,13 @@ class TagQueryTests(GraphQLTestCase):
         query = '''
         query {
             allTags {
-                id
-                name
-                description
+                edges {
+                    node {
+                        id
+                        name
+                        description
+                    }
+                }
             }
         }
         '''
@@ -197,16 +241,20 @@ class TagQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['allTags']), 2)
+        self.assertEqual(len(response.json()['data']['allTags']['edges']), 2)
 
     def test_all_tags_permission_denied(self):
         self.client.force_login(self.user)
         query = '''
         query {
             allTags {
-                id
-                name
-                description
+                edges {
+                    node {
+                        id
+                        name
+                        description
+                    }
+                }
             }
         }
         '''
@@ -272,9 +320,13 @@ class TagQueryTests(GraphQLTestCase):
         query = f'''
         query {{
             searchTags(name: "{self.tag1.name}") {{
-                id
-                name
-                description
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                    }}
+                }}
             }}
         }}
         '''
@@ -282,17 +334,21 @@ class TagQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchTags']), 1)
-        self.assertEqual(response.json()['data']['searchTags'][0]['name'], self.tag1.name)
-        self.assertEqual(response.json()['data']['searchTags'][0]['description'], self.tag1.description)
+        self.assertEqual(len(response.json()['data']['searchTags']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchTags']['edges'][0]['node']['name'], self.tag1.name)
+        self.assertEqual(response.json()['data']['searchTags']['edges'][0]['node']['description'], self.tag1.description)
 
     def test_search_tags_by_description(self):
         query = f'''
         query {{
             searchTags(tagDescription: "{self.tag2.description}") {{
-                id
-                name
-                description
+                edges {{
+                    node {{
+                        id
+                        name
+                        description
+                    }}
+                }}
             }}
         }}
         '''
@@ -300,18 +356,22 @@ class TagQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchTags']), 1)
-        self.assertEqual(response.json()['data']['searchTags'][0]['name'], self.tag2.name)
-        self.assertEqual(response.json()['data']['searchTags'][0]['description'], self.tag2.description)
+        self.assertEqual(len(response.json()['data']['searchTags']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchTags']['edges'][0]['node']['name'], self.tag2.name)
+        self.assertEqual(response.json()['data']['searchTags']['edges'][0]['node']['description'], self.tag2.description)
     
     def test_search_tags_permission_denied(self):
         self.client.force_login(self.user)
         query = '''
         query {
             searchTags{
-                id
-                name
-                description
+                edges {
+                    node {
+                        id
+                        name
+                        description
+                    }
+                }
             }
         }
         '''
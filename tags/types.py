@@ -1,6 +1,8 @@
 import graphene
 from graphene_django import DjangoObjectType
 from .models import Tag
+from gql.loaders import load_related
+from gql.pagination import CountableConnection
 
 class TagType(DjangoObjectType):
     """
@@ -9,4 +11,11 @@ class TagType(DjangoObjectType):
     """
     class Meta:
         model = Tag
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    def resolve_product(self, info):
+        return load_related(info, self, 'product')
+
+class TagConnection(CountableConnection):
+    class Meta:
+        node = TagType
@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from gql.types import OperationResult
 from graphql_jwt.decorators import user_passes_test
+from common.roles import is_admin
 
 class RegisterUser(graphene.Mutation):
     """
@@ -46,7 +47,7 @@ class MakeAdmin(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, user_id):
         try:
@@ -70,7 +71,7 @@ class RemoveAdmin(graphene.Mutation):
 
     operation_result = graphene.Field(OperationResult)
 
-    @user_passes_test(lambda user: user.groups.filter(name='admin').exists())
+    @user_passes_test(is_admin)
     @staticmethod
     def mutate(root, info, user_id):
         try:
@@ -1,10 +1,12 @@
 from django.contrib.auth.models import User
 import graphene
-from .types import UserType
+from .types import UserType, UserConnection
+from gql.pagination import connection_args, paginate
 
 class UserQuery(graphene.ObjectType):
-    all_users = graphene.List(
-        UserType, 
+    all_users = graphene.Field(
+        UserConnection,
+        **connection_args(),
         description="Retrieve all users."
     )
     user_by_id = graphene.Field(
@@ -12,21 +14,22 @@ class UserQuery(graphene.ObjectType):
         id=graphene.Int(required=True, description="The ID of the user to retrieve."),
         description="Retrieve a single user by its ID."
     )
-    search_users = graphene.List(
-        UserType,
+    search_users = graphene.Field(
+        UserConnection,
+        **connection_args(),
         username=graphene.String(default_value=None, description="A substring of the user name to filter by. Case-insensitive."),
         email=graphene.String(default_value=None, description="A substring of the user email to filter by. Case-insensitive."),
         description="Search for users based on various criteria such as name and email."
     )
 
-    def resolve_all_users(self, info):
+    def resolve_all_users(self, info, first, after):
         """
         Fetches all users from the database.
         
         Returns:
-            List of all users.
+            A page of users.
         """
-        return User.objects.all()
+        return paginate(info, User.objects.all(), first, after, ('date_joined', 'id'))
     
     def resolve_user_by_id(self, info, id):
         """
@@ -37,16 +40,16 @@ class UserQuery(graphene.ObjectType):
         """
         return User.objects.filter(pk=id).first()
     
-    def resolve_search_users(self, info, username, email):
+    def resolve_search_users(self, info, first, after, username, email):
         """
         Search for users based on various criteria such as name and email.
 
         Returns:
-            List of users that match the search criteria.
+            A page of users that match the search criteria.
         """
         queryset = User.objects.all()
         if username:
             queryset = queryset.filter(username__icontains=username)
         if email:
             queryset = queryset.filter(email__icontains=email)
-        return queryset
\ No newline at end of file
+        return paginate(info, queryset, first, after, ('date_joined', 'id'))
\ No newline at end of file
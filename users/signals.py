@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from common.roles import invalidate_roles, revoke_tokens
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidates cached roles whenever a user's groups change, including through MakeAdmin and
+    RemoveAdmin.
+    """
+    if not action.startswith('post_'):
+        return
+
+    if reverse:
+        for user in User.objects.filter(pk__in=pk_set or ()):
+            invalidate_roles(user)
+    else:
+        invalidate_roles(instance)
+
+@receiver(post_save, sender=User)
+def revoke_disabled_user_tokens(sender, instance, **kwargs):
+    """
+    Revokes the tokens of a user saved as inactive, so stateless authentication stops
+    accepting them.
+    """
+    if not instance.is_active:
+        revoke_tokens(instance.pk)
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    """
+    Revokes the tokens of a deleted user, so stateless authentication stops accepting them.
+    """
+    revoke_tokens(instance.pk)
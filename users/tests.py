@@ -1,5 +1,9 @@
 from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from graphene_django.utils.testing import GraphQLTestCase
+from authentication.models import TokenRevocation
 from common.utils import execute_mutation
 
 class UserMutationTests(GraphQLTestCase):
@@ -112,10 +116,14 @@ class UserQueryTests(GraphQLTestCase):
         query = '''
         query {
             allUsers {
-                id
-                username
-                email
-                groups
+                edges {
+                    node {
+                        id
+                        username
+                        email
+                        groups
+                    }
+                }
             }
         }
         '''
@@ -123,7 +131,7 @@ class UserQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['allUsers']), 2)
+        self.assertEqual(len(response.json()['data']['allUsers']['edges']), 2)
 
     def test_user_by_id(self):
         query = f'''
@@ -149,10 +157,14 @@ class UserQueryTests(GraphQLTestCase):
         query = '''
         query {
             searchUsers(username: "Alice") {
-                id
-                username
-                email
-                groups
+                edges {
+                    node {
+                        id
+                        username
+                        email
+                        groups
+                    }
+                }
             }
         }
         '''
@@ -160,20 +172,24 @@ class UserQueryTests(GraphQLTestCase):
         response = self.query(query)
 
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchUsers']), 1)
-        self.assertEqual(response.json()['data']['searchUsers'][0]['username'], 'Alice')
-        self.assertEqual(response.json()['data']['searchUsers'][0]['email'], 'alice@example.com')
-        self.assertEqual(len(response.json()['data']['searchUsers'][0]['groups']), 1)
-        self.assertEqual(response.json()['data']['searchUsers'][0]['groups'][0], 'user')
+        self.assertEqual(len(response.json()['data']['searchUsers']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchUsers']['edges'][0]['node']['username'], 'Alice')
+        self.assertEqual(response.json()['data']['searchUsers']['edges'][0]['node']['email'], 'alice@example.com')
+        self.assertEqual(len(response.json()['data']['searchUsers']['edges'][0]['node']['groups']), 1)
+        self.assertEqual(response.json()['data']['searchUsers']['edges'][0]['node']['groups'][0], 'user')
 
     def test_search_users_by_email(self):
         query = '''
         query {
             searchUsers(email: "bob@example.com") {
-                id
-                username
-                email
-                groups
+                edges {
+                    node {
+                        id
+                        username
+                        email
+                        groups
+                    }
+                }
             }
         }
         '''
@@ -181,8 +197,76 @@ class UserQueryTests(GraphQLTestCase):
         response = self.query(query)
         
         self.assertResponseNoErrors(response)
-        self.assertEqual(len(response.json()['data']['searchUsers']), 1)
-        self.assertEqual(response.json()['data']['searchUsers'][0]['username'], 'Bob')
-        self.assertEqual(response.json()['data']['searchUsers'][0]['email'], 'bob@example.com')
-        self.assertEqual(len(response.json()['data']['searchUsers'][0]['groups']), 1)
-        self.assertEqual(response.json()['data']['searchUsers'][0]['groups'][0], 'admin')
+        self.assertEqual(len(response.json()['data']['searchUsers']['edges']), 1)
+        self.assertEqual(response.json()['data']['searchUsers']['edges'][0]['node']['username'], 'Bob')
+        self.assertEqual(response.json()['data']['searchUsers']['edges'][0]['node']['email'], 'bob@example.com')
+        self.assertEqual(len(response.json()['data']['searchUsers']['edges'][0]['node']['groups']), 1)
+        self.assertEqual(response.json()['data']['searchUsers']['edges'][0]['node']['groups'][0], 'admin')
+
+class RoleTests(GraphQLTestCase):
+    all_tags_query = '''
+    query {
+        allTags {
+            totalCount
+        }
+    }
+    '''
+
+    def setUp(self):
+        self.user_group, _ = Group.objects.get_or_create(name='user')
+        self.admin_group, _ = Group.objects.get_or_create(name='admin')
+
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='password')
+        self.admin_user = User.objects.create_user(username='adminuser', email='admin@admin.com', password='password')
+
+        self.user.groups.add(self.user_group)
+        self.admin_user.groups.add(self.admin_group)
+
+    def token(self, username):
+        mutation = '''
+        mutation tokenAuth($username: String!, $password: String!) {
+            tokenAuth(username: $username, password: $password) {
+                token
+            }
+        }
+        '''
+        response = self.query(mutation, variables={'username': username, 'password': 'password'}, operation_name='tokenAuth')
+        return response.json()['data']['tokenAuth']['token']
+
+    def test_make_admin_and_remove_admin_invalidate_roles(self):
+        self.client.force_login(self.user)
+        self.assertResponseHasErrors(self.query(self.all_tags_query))
+
+        self.client.force_login(self.admin_user)
+        execute_mutation(self, 'makeAdmin', {'userId': {'type': 'Int!', 'value': self.user.id}})
+
+        self.client.force_login(self.user)
+        self.assertResponseNoErrors(self.query(self.all_tags_query))
+
+        self.client.force_login(self.admin_user)
+        execute_mutation(self, 'removeAdmin', {'userId': {'type': 'Int!', 'value': self.user.id}})
+
+        self.client.force_login(self.user)
+        self.assertResponseHasErrors(self.query(self.all_tags_query))
+
+    def test_token_claims_used_for_roles(self):
+        # Role changes made in the same second as the token is issued distrust its claims.
+        TokenRevocation.objects.all().delete()
+        token = self.token('adminuser')
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(self.all_tags_query, headers={'Authorization': f'JWT {token}'})
+
+        self.assertResponseNoErrors(response)
+        self.assertFalse(any('auth_group' in query['sql'] for query in context.captured_queries))
+
+    def test_token_claims_ignored_after_roles_change(self):
+        token = self.token('adminuser')
+        self.admin_user.groups.set([self.user_group])
+        # The change is stored in the database, so it holds in processes whose cache never saw it.
+        cache.clear()
+
+        response = self.query(self.all_tags_query, headers={'Authorization': f'JWT {token}'})
+
+        self.assertResponseHasErrors(response)
+        self.assertIn("You do not have permission", str(response.content))
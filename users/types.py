@@ -1,6 +1,8 @@
 from graphene_django import DjangoObjectType
 from django.contrib.auth.models import User
 import graphene
+from gql.loaders import load_related
+from gql.pagination import CountableConnection
 
 class UserType(DjangoObjectType):
     class Meta:
@@ -10,4 +12,8 @@ class UserType(DjangoObjectType):
     groups = graphene.List(graphene.String)
 
     def resolve_groups(self, info):
-        return [group.name for group in self.groups.all()]
\ No newline at end of file
+        return [group.name for group in load_related(info, self, 'groups')]
+
+class UserConnection(CountableConnection):
+    class Meta:
+        node = UserType